@@ -1,64 +1,228 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from pydantic import BaseModel
-from app.util import save_uploaded_file
-from app.services.downloader import download_youtube_audio
-from app.services.transcriber import transcribe_audio
-from app.services.summarizer import summarize_text
-from app.services.generator import generate_social_posts
-from app.models.schemas import ProcessRequest, ProcessResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+from app.util import save_uploaded_file, remove_file, UploadTooLargeError
+from app.services.jobs import get_job_manager, QueueFullError
+from app.services.pipeline import replace_posts, run_pipeline
+from app.services.batch import expand_urls, start_batch, get_batch
+from app.services import generator, metrics
+from app.services.transcript_store import get_transcript_store
+from app.utils.helpers import normalize_video_id
+from app import config
+from app.models.schemas import (
+    ProcessRequest, ProcessResponse, JobSubmitted, JobStatus, BatchRequest, BatchSubmitted, BatchStatus,
+    VideoRecord, SearchResults, SummaryMode, QualityTier, RegeneratedPost,
+)
+import json
 import traceback
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
 
 router = APIRouter()
 
-# Request and Response Schemas
-class ProcessRequest(BaseModel):
-    url: str
 
-class ProcessResponse(BaseModel):
-    transcript: str
-    summary: str
-    social_posts: dict
+def _submit(kind: str, fn=run_pipeline, stream: bool = False, **kwargs):
+    try:
+        return get_job_manager().submit(kind, fn, stream=stream, **kwargs)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
 
-@router.post("/process", response_model=ProcessResponse)
-def process_video(request: ProcessRequest):
+def _submit_upload(file: UploadFile, summary_mode: Optional[str] = None,
+                   max_latency_s: Optional[float] = None, quality: Optional[str] = None):
+    try:
+        audio_path = save_uploaded_file(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Failed to save uploaded file")
     try:
-        # Step 1: Download YouTube audio
-        audio_path = download_youtube_audio(request.url)
+        # The job owns the file from here on and deletes it when it finishes
+        return _submit("upload", audio_path=audio_path, title=file.filename, summary_mode=summary_mode,
+                       max_latency_s=max_latency_s, quality=quality, cleanup_paths=[audio_path])
+    except HTTPException:
+        remove_file(audio_path)
+        raise
 
-        # Step 2: Transcribe audio
-        transcript = transcribe_audio(audio_path)
 
-        # Step 3: Summarize transcript
-        summary = summarize_text(transcript)
+def _process_kwargs(request: ProcessRequest) -> dict:
+    if request.start_s is not None and request.end_s is not None and request.end_s <= request.start_s:
+        raise HTTPException(status_code=422, detail="end_s must be greater than start_s")
+    return {"url": str(request.url), "summary_mode": request.summary_mode,
+            "start_s": request.start_s, "end_s": request.end_s,
+            "max_latency_s": request.max_latency_s, "quality": request.quality}
 
-        # Step 4: Generate social media content
-        social_posts = generate_social_posts(summary)
 
-        return {
-            "transcript": transcript,
-            "summary": summary,
-            "social_posts": social_posts
-        }
+@router.post("/jobs", response_model=JobSubmitted, status_code=202)
+def create_job(request: ProcessRequest):
+    job = _submit("process", **_process_kwargs(request))
+    return {"job_id": job.id, "status": job.status}
 
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+@router.post("/jobs/upload", response_model=JobSubmitted, status_code=202)
+def create_upload_job(file: UploadFile = File(...), summary_mode: Optional[SummaryMode] = None,
+                      max_latency_s: Optional[float] = Query(None, gt=0), quality: Optional[QualityTier] = None):
+    job = _submit_upload(file, summary_mode, max_latency_s, quality)
+    return {"job_id": job.id, "status": job.status}
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+def _event_stream(job):
+    # Server-Sent Events: one "event:"/"data:" block per job event, comments as heartbeats
+    for event in job.iter_events():
+        if event is None:
+            yield ": keep-alive\n\n"
+            continue
+        yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _sse_response(job):
+    return StreamingResponse(
+        _event_stream(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _sse_response(job)
+
+
+@router.get("/process/stream")
+def process_video_stream(url: str, summary_mode: Optional[SummaryMode] = None,
+                         start_s: Optional[float] = None, end_s: Optional[float] = None,
+                         max_latency_s: Optional[float] = None, quality: Optional[QualityTier] = None):
+    """
+    Streams pipeline progress as Server-Sent Events: stage updates, the transcript
+    and summary as soon as they exist, then caption tokens as Ollama produces them.
+    GET so that the browser's EventSource can consume it directly.
+    """
     try:
-        # Save the uploaded file (implement save_uploaded_file in util.py)
-        audio_path = save_uploaded_file(file)
-        # Process the audio as needed (transcribe, summarize, generate posts)
-        transcript = transcribe_audio(audio_path)
-        summary = summarize_text(transcript)
-        social_posts = generate_social_posts(summary)
-        return {
-            "audio_src": file.filename,
-            "transcript": transcript,
-            "summary": summary,
-            "social_posts": social_posts,
-        }
-    except Exception as e:
+        request = ProcessRequest(url=url, summary_mode=summary_mode, start_s=start_s, end_s=end_s,
+                                 max_latency_s=max_latency_s, quality=quality)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+    job = _submit("process", stream=True, **_process_kwargs(request))
+    return _sse_response(job)
+
+
+@router.post("/batch", response_model=BatchSubmitted, status_code=202)
+def create_batch(request: BatchRequest):
+    """Processes a list of URLs and/or every video of a playlist or channel, pipelined by stage."""
+    try:
+        urls = expand_urls([str(u) for u in request.urls],
+                           str(request.playlist_url) if request.playlist_url else None,
+                           limit=config.BATCH_MAX_ITEMS)
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not urls:
+        raise HTTPException(status_code=400, detail="No videos to process")
+    try:
+        run = start_batch(urls, request.summary_mode)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return {"batch_id": run.id, "items": len(urls)}
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatus)
+def get_batch_status(batch_id: str):
+    run = get_batch(batch_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return run.to_dict()
+
+
+@router.post("/process", response_model=ProcessResponse, response_model_exclude_none=True)
+def process_video(request: ProcessRequest, timings: bool = False):
+    # Same pool as /jobs, the handler just waits for the result
+    job = _submit("process", **_process_kwargs(request))
+    job.wait()
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if timings:
+        return {**job.result, "timings": job.timings}
+    return job.result
+
+
+@router.post("/upload")
+def upload_file(file: UploadFile = File(...), timings: bool = False, summary_mode: Optional[SummaryMode] = None,
+                max_latency_s: Optional[float] = Query(None, gt=0), quality: Optional[QualityTier] = None):
+    # Sync handler: saving and processing run off the event loop, and the
+    # pipeline itself runs on the bounded job pool like /process
+    job = _submit_upload(file, summary_mode, max_latency_s, quality)
+    job.wait()
+    if job.status == "failed":
         raise HTTPException(status_code=500, detail="Failed to process uploaded file")
+    response = {
+        "audio_src": file.filename,
+        **job.result,
+    }
+    if timings:
+        response["timings"] = job.timings
+    return response
+
+
+def _store():
+    store = get_transcript_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Transcript store is disabled")
+    return store
+
+
+@router.get("/videos/{video_id:path}", response_model=VideoRecord)
+def get_video(video_id: str):
+    """Stored result for a video: a YouTube ID or URL, or an upload's "sha256:..." ID."""
+    record = _store().get(normalize_video_id(video_id))
+    if record is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    return record
+
+
+@router.post("/videos/{video_id:path}/posts/{platform}", response_model=RegeneratedPost)
+def regenerate_post(video_id: str, platform: str):
+    """
+    Generates a new post for one platform from the stored summary, without
+    rerunning the pipeline, and saves it in place of the old one (also in the
+    result cache, so reprocessing the video keeps it).
+    """
+    if platform not in generator.PLATFORMS:
+        raise HTTPException(status_code=404,
+                            detail=f"Unknown platform, expected one of {', '.join(generator.PLATFORMS)}")
+    store = _store()
+    video_id = normalize_video_id(video_id)
+    record = store.get(video_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    if not record["summary"]:
+        raise HTTPException(status_code=409, detail="Video has no summary to generate from")
+    text = generator.generate_platform_post(record["summary"], platform)
+    if text is None:
+        raise HTTPException(status_code=503, detail="Caption generation failed, try again later",
+                            headers={"Retry-After": "30"})
+    social_posts = {**(record["social_posts"] or {}), platform: text}
+    replace_posts(video_id, record["summary"], social_posts)
+    return {"video_id": video_id, "platform": platform, "text": text, "social_posts": social_posts}
+
+
+@router.get("/search", response_model=SearchResults)
+def search_transcripts(q: str = Query(..., min_length=2), limit: int = Query(20, ge=1, le=100)):
+    """Full-text search over stored transcript segments; every word must match."""
+    return {"query": q, "results": _store().search(q, limit)}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of the per-stage counters and histograms."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
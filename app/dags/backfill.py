@@ -0,0 +1,154 @@
+# dags/backfill.py
+import json
+import os
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from airflow.decorators import dag, task
+from airflow.models.param import Param
+
+# Adding the project root to Python path so we can import from app/
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# Pools cap how many mapped task instances of each kind run at once across all
+# DAG runs. They are created by airflow-init in docker-compose.yml; adjust with
+#   airflow pools set whisper_pool <slots> "Whisper transcription"
+DOWNLOAD_POOL = "download_pool"
+WHISPER_POOL = "whisper_pool"
+SUMMARIZER_POOL = "summarizer_pool"
+OLLAMA_POOL = "ollama_pool"
+
+def _artifact_name(video, *inputs) -> str:
+    """
+    Artifact name of one stage's output for video: the video ID plus a hash of
+    the models and parameters that produced it, so a run with other settings
+    never reuses it.
+    """
+    from app.services.cache import sha256_text
+
+    return f"{video['video_id']}-{sha256_text(':'.join(str(i) for i in inputs))[:12]}"
+
+
+default_args = {
+    'owner': 'airflow',
+    'depends_on_past': False,
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=5)
+}
+
+
+@dag(
+    dag_id='youtube_backfill',
+    default_args=default_args,
+    description='Bulk backfill: fan out download, transcribe, summarize and generate over many videos',
+    schedule=None,
+    start_date=datetime(2024, 1, 1),
+    catchup=False,
+    max_active_runs=4,
+    params={
+        "urls": Param([], type="array", description="Video URLs to process"),
+        "playlist_url": Param(None, type=["null", "string"], description="Optional playlist or channel URL"),
+    },
+    tags=['youtube', 'transcription', 'ai', 'backfill'],
+    doc_md="""
+    ## YouTube Backfill
+    Trigger with `{"urls": [...]}` and/or `{"playlist_url": "..."}` in the run conf.
+    Every video becomes one mapped task instance per stage. Tasks exchange only
+    artifact references through XCom; transcripts, summaries and posts live in
+    the artifact store (`ARTIFACT_DIR`), named by video and by the models and
+    parameters that produced them. Existing artifacts are reused, so re-running
+    a backfill only does the missing work. Stages run through the pipeline, so
+    they share the API's result cache, and results land in the transcript store.
+    """,
+)
+def youtube_backfill():
+
+    @task
+    def list_videos(**context):
+        """Expands the run conf into one small dict per video"""
+        from app import config
+        from app.services.batch import expand_urls
+        from app.utils.helpers import extract_video_id
+
+        params = context["params"]
+        urls = expand_urls(params.get("urls") or [], params.get("playlist_url"),
+                           limit=config.BACKFILL_MAX_ITEMS)
+        print(f"Backfilling {len(urls)} videos")
+        return [{"url": url, "video_id": extract_video_id(url)} for url in urls]
+
+    @task(pool=DOWNLOAD_POOL)
+    def download(video):
+        from app.services.pipeline import download_stage
+
+        # The managed audio store (ARTIFACT_DIR/audio) reuses audio downloaded before
+        audio_path, source = download_stage(video["url"])
+        return {**video, "video_id": source, "audio_path": audio_path}
+
+    @task(pool=WHISPER_POOL)
+    def transcribe(video):
+        from app.services.artifacts import get_artifact_store
+        from app.services.pipeline import transcribe_stage, whisper_model_id
+
+        store = get_artifact_store()
+        name = _artifact_name(video, whisper_model_id())
+        ref = store.ref("transcripts", name, "json")
+        if not store.exists(ref):
+            audio_path = video["audio_path"]
+            if not os.path.exists(audio_path):
+                # Evicted from the audio store since the download task ran
+                from app.services.pipeline import download_stage
+                audio_path, _ = download_stage(video["url"])
+            # Through the pipeline's stages, so the API's result cache serves and receives the work
+            store.put_json("transcripts", name, transcribe_stage(audio_path, video["video_id"]))
+        return {**video, "transcript_ref": ref}
+
+    @task(pool=SUMMARIZER_POOL)
+    def summarize(video):
+        from app import config
+        from app.services import summarizer
+        from app.services.artifacts import get_artifact_store
+        from app.services.pipeline import summarize_stage
+
+        store = get_artifact_store()
+        name = _artifact_name(video, video["transcript_ref"], config.SUMMARIZER_MODEL,
+                              json.dumps(summarizer.cache_params(config.SUMMARY_MODE), sort_keys=True))
+        ref = store.ref("summaries", name, "txt")
+        if not store.exists(ref):
+            transcript = store.get_json(video["transcript_ref"])["text"]
+            store.put_text("summaries", name, summarize_stage(transcript))
+        return {**video, "summary_ref": ref}
+
+    @task(pool=OLLAMA_POOL)
+    def generate(video):
+        from app.services.artifacts import get_artifact_store
+        from app.services.generator import missing_posts
+        from app.services.pipeline import generate_key, generate_stage, save_result
+
+        store = get_artifact_store()
+        summary = store.get_text(video["summary_ref"])
+        name = _artifact_name(video, generate_key(summary))
+        ref = store.ref("posts", name, "json")
+        if store.exists(ref):
+            posts = store.get_json(ref)
+        else:
+            posts = generate_stage(summary)
+            if missing_posts(posts):
+                # Ollama failed; storing these would make reruns skip the video for good
+                raise RuntimeError(f"Caption generation failed for {video['video_id']}, leaving it for a retry")
+            store.put_json("posts", name, posts)
+        # The transcript store is what the API's /videos and /search read
+        save_result(video["video_id"], store.get_json(video["transcript_ref"]), summary, posts, url=video["url"])
+        return {**video, "posts_ref": ref}
+
+    videos = list_videos()
+    downloaded = download.expand(video=videos)
+    transcribed = transcribe.expand(video=downloaded)
+    summarized = summarize.expand(video=transcribed)
+    generate.expand(video=summarized)
+
+
+youtube_backfill()
@@ -39,10 +39,11 @@ def download_audio(ti, **kwargs):
     """Download audio from YouTube URL"""
     try:
         # Import inside function to avoid import issues at DAG parsing time
-        from app.services.downloader import download_audio_from_youtube
+        from app.services.pipeline import download_stage
         
+        # Audio is kept in the managed audio store, so reruns reuse it
         print(f"Downloading audio from: {YOUTUBE_URL}")
-        filepath = download_audio_from_youtube(YOUTUBE_URL)
+        filepath, _ = download_stage(YOUTUBE_URL)
         print(f"Audio downloaded to: {filepath}")
         
         # Push filepath to XCom for next task
@@ -56,6 +57,7 @@ def download_audio(ti, **kwargs):
 def transcribe_audio_task(ti, **kwargs):
     """Transcribe downloaded audio file"""
     try:
+        from app.services.artifacts import get_artifact_store
         from app.services.transcriber import transcribe_audio
         
         # Get audio path from previous task
@@ -67,9 +69,11 @@ def transcribe_audio_task(ti, **kwargs):
         transcript = transcribe_audio(audio_path)
         print(f"Transcription completed. Length: {len(transcript)} characters")
         
-        # Push transcript to XCom for next task
-        ti.xcom_push(key='transcript', value=transcript)
-        return transcript
+        # Store the transcript as an artifact and push only its reference to XCom,
+        # keeping large payloads out of the Airflow metadata DB
+        ref = get_artifact_store().put_text('transcripts', ti.run_id, transcript)
+        ti.xcom_push(key='transcript_ref', value=ref)
+        return ref
         
     except Exception as e:
         print(f"Error transcribing audio: {str(e)}")
@@ -78,20 +82,23 @@ def transcribe_audio_task(ti, **kwargs):
 def summarize_transcript(ti, **kwargs):
     """Summarize the transcribed text"""
     try:
+        from app.services.artifacts import get_artifact_store
         from app.services.summarizer import summarize_text
         
         # Getting transcript from previous task
-        transcript = ti.xcom_pull(key='transcript', task_ids='transcribe_audio')
-        if not transcript:
+        ref = ti.xcom_pull(key='transcript_ref', task_ids='transcribe_audio')
+        if not ref:
             raise ValueError("No transcript received from transcribe task")
+        transcript = get_artifact_store().get_text(ref)
             
         print(f"Summarizing transcript of {len(transcript)} characters")
         summary = summarize_text(transcript)
         print(f"Summary generated. Length: {len(summary)} characters")
         
-        # Pushing summary to XCom for next task
-        ti.xcom_push(key='summary', value=summary)
-        return summary
+        # Pushing the summary reference to XCom for next task
+        ref = get_artifact_store().put_text('summaries', ti.run_id, summary)
+        ti.xcom_push(key='summary_ref', value=ref)
+        return ref
         
     except Exception as e:
         print(f"Error summarizing text: {str(e)}")
@@ -100,12 +107,14 @@ def summarize_transcript(ti, **kwargs):
 def generate_social_posts(ti, **kwargs):
     """Generate social media posts from summary"""
     try:
+        from app.services.artifacts import get_artifact_store
         from app.services.generator import generate_social_posts
         
         # Getting summary from the previous task
-        summary = ti.xcom_pull(key='summary', task_ids='summarize_transcript')
-        if not summary:
+        ref = ti.xcom_pull(key='summary_ref', task_ids='summarize_transcript')
+        if not ref:
             raise ValueError("No summary received from summarize task")
+        summary = get_artifact_store().get_text(ref)
             
         print(f"Generating social posts from summary")
         posts = generate_social_posts(summary)
@@ -114,9 +123,10 @@ def generate_social_posts(ti, **kwargs):
         print(posts)
         print("=" * 50)
         
-        # Optionally we can push posts to XCom for potential downstream tasks
-        ti.xcom_push(key='social_posts', value=posts)
-        return posts
+        # Optionally we can push the posts reference to XCom for potential downstream tasks
+        ref = get_artifact_store().put_json('posts', ti.run_id, posts)
+        ti.xcom_push(key='social_posts_ref', value=ref)
+        return ref
         
     except Exception as e:
         print(f"Error generating social posts: {str(e)}")
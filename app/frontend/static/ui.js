@@ -39,10 +39,60 @@ const outputDiv = document.getElementById('output');
 const transcriptEl = document.getElementById('transcript');
 const summaryEl = document.getElementById('summary');
 
-form.addEventListener('submit', async (e) => {
+form.addEventListener('submit', (e) => {
   e.preventDefault();
   const url = document.getElementById('urlInput').value;
 
+  if (!window.EventSource) {
+    processBlocking(url);
+    return;
+  }
+
+  // Stream progress: transcript and summary render as soon as each stage finishes,
+  // captions fill in token by token.
+  transcriptEl.textContent = 'Downloading and transcribing…';
+  summaryEl.textContent = '';
+  document.getElementById('socialPosts').innerHTML = '';
+  outputDiv.style.display = 'block';
+
+  const source = new EventSource('/process/stream?url=' + encodeURIComponent(url));
+  let received = false;
+
+  source.addEventListener('stage', (event) => {
+    received = true;
+    const { stage, status } = JSON.parse(event.data);
+    if (status === 'running' && stage === 'summarize') summaryEl.textContent = 'Summarizing…';
+  });
+  source.addEventListener('transcript', (event) => {
+    transcriptEl.textContent = JSON.parse(event.data);
+  });
+  source.addEventListener('summary', (event) => {
+    summaryEl.textContent = JSON.parse(event.data);
+  });
+  source.addEventListener('partial', (event) => {
+    renderSocialPosts({ social_posts: JSON.parse(event.data) });
+  });
+  source.addEventListener('done', (event) => {
+    source.close();
+    const data = JSON.parse(event.data);
+    transcriptEl.textContent = data.transcript;
+    summaryEl.textContent = data.summary;
+    renderSocialPosts(data);
+    saveToHistory(url, data);
+  });
+  source.addEventListener('error', (event) => {
+    source.close();
+    // Server-sent "error" events carry a detail; connection failures don't
+    const detail = event.data ? JSON.parse(event.data).detail : null;
+    if (!received && !detail) {
+      processBlocking(url);
+      return;
+    }
+    alert('Error processing the video: ' + (detail || 'connection lost'));
+  });
+});
+
+async function processBlocking(url) {
   try {
     const response = await fetch('/process', {
       method: 'POST',
@@ -63,7 +113,7 @@ form.addEventListener('submit', async (e) => {
     alert('Error processing the video: ' + err.message);
     console.error(err);
   }
-});
+}
 
 function renderSocialPosts(data) {
   const socialPostsEl = document.getElementById('socialPosts');
@@ -0,0 +1,97 @@
+"""
+Shared inference server: one long-lived process that owns Whisper and the
+summarizer, so API workers, queue workers and DAG tasks don't each load a copy.
+
+    python -m app.inference_server
+    INFERENCE_BACKEND=server uvicorn app.main:app ...   # clients
+
+Listens on INFERENCE_SERVER_ADDRESS (host:port, or unix:/path) with
+multiprocessing.connection; each client connection gets a thread. Models load
+on first use and stay resident, and MODEL_MEMORY_BUDGET_MB unloads the least
+recently used ones (see model_registry). Requests are pickled, so a
+non-loopback address requires INFERENCE_AUTHKEY.
+"""
+import signal
+import threading
+import time
+import traceback
+from multiprocessing.connection import Connection, Listener
+
+from app import config
+from app.services import model_registry
+from app.services.inference_client import authkey, parse_address
+from app.services.summarizer import run_summarizer
+from app.services.transcriber import transcribe_local
+
+_started = time.time()
+_served = {"transcribe": 0, "summarize": 0}
+
+
+def _status(**_):
+    return {
+        "uptime_s": round(time.time() - _started, 1),
+        "served": dict(_served),
+        "memory_budget_mb": config.MODEL_MEMORY_BUDGET_MB,
+        "models": model_registry.residency(),
+    }
+
+
+OPS = {
+    "transcribe": lambda audio, model_name=None: transcribe_local(audio, model_name),
+    "summarize": lambda chunks, model_name=None, batch_size=None: run_summarizer(chunks, model_name, batch_size),
+    "status": _status,
+}
+
+
+def _serve(conn: Connection):
+    with conn:
+        while True:
+            try:
+                op, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            if op not in OPS:
+                conn.send(("error", f"Unknown operation {op!r}"))
+                continue
+            try:
+                reply = ("ok", OPS[op](**kwargs))
+                if op in _served:
+                    _served[op] += 1
+            except Exception as e:
+                traceback.print_exc()
+                reply = ("error", f"{type(e).__name__}: {e}")
+            try:
+                conn.send(reply)
+            except (EOFError, OSError):
+                return
+
+
+def _check_address(address, family):
+    if family == "AF_INET" and address[0] not in ("127.0.0.1", "localhost", "::1") and not authkey():
+        raise SystemExit("INFERENCE_AUTHKEY is required to listen on a non-loopback address")
+
+
+def main():
+    address, family = parse_address(config.INFERENCE_SERVER_ADDRESS)
+    _check_address(address, family)
+    listener = Listener(address, family=family, authkey=authkey())
+    signal.signal(signal.SIGTERM, lambda *_: listener.close())
+    if config.MODEL_WARMUP:
+        model_registry.get_whisper_model()
+        model_registry.get_summarizer()
+    print(f"✅ Inference server listening on {config.INFERENCE_SERVER_ADDRESS}")
+
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            break  # listener closed
+        except Exception:
+            # Failed handshake (wrong authkey) or a client that went away
+            traceback.print_exc()
+            continue
+        threading.Thread(target=_serve, args=(conn,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    main()
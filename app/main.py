@@ -1,15 +1,58 @@
 from dotenv import load_dotenv
 load_dotenv()
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import config
 from app.api.routes import router
+from app.services.model_registry import warmup
+
+
+UPLOAD_PATHS = ("/upload", "/jobs/upload")
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_SLACK_BYTES = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Rejects uploads over MAX_UPLOAD_BYTES with 413: on Content-Length before the
+    body is read, otherwise by counting body bytes as they arrive, so a chunked
+    upload stops at the limit instead of being spooled by the multipart parser first.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in UPLOAD_PATHS:
+            return await self.app(scope, receive, send)
+        limit = config.MAX_UPLOAD_BYTES + MULTIPART_SLACK_BYTES
+        detail = f"Upload exceeds the {config.MAX_UPLOAD_BYTES} byte limit"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            return await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+
+        received = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised into the body parser; FastAPI passes HTTPExceptions through as responses
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, counting_receive, send)
 
 
 app = FastAPI(title="YouTube Transcriber")
+app.add_middleware(UploadLimitMiddleware)
+# Added last so it is the outermost layer and its headers reach the upload limit's 413s too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
@@ -18,6 +61,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+def warmup_models():
+    # Models load lazily on first request unless MODEL_WARMUP is set
+    if config.MODEL_WARMUP:
+        warmup()
+
 # Mounting static directory for CSS/JS/assets (if added in future)
 app.mount("/static", StaticFiles(directory="app/frontend/static"), name="static")
 
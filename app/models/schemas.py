@@ -1,10 +1,23 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Dict
+from typing import Any, Dict, List, Literal, Optional
+
+# "fast"/"balanced" summarize only the top-ranked transcript sentences; None uses SUMMARY_MODE
+SummaryMode = Literal["fast", "balanced", "full"]
+# Model tier ceiling with MODEL_POLICY=adaptive: smallest, configured, largest models
+QualityTier = Literal["low", "standard", "high"]
 
 class ProcessRequest(BaseModel):
     url: HttpUrl = Field(..., example="https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+    summary_mode: Optional[SummaryMode] = Field(None, example="balanced")
+    # Only process this section of the video (seconds from the start); both are optional
+    start_s: Optional[float] = Field(None, ge=0, example=60)
+    end_s: Optional[float] = Field(None, gt=0, example=300)
+    # With MODEL_POLICY=adaptive: the largest models that finish within this many seconds
+    max_latency_s: Optional[float] = Field(None, gt=0, example=120)
+    quality: Optional[QualityTier] = Field(None, example="standard")
 
 class ProcessResponse(BaseModel):
+    video_id: Optional[str] = Field(None, example="yt:dQw4w9WgXcQ")
     transcript: str = Field(..., example="Never gonna give you up...")
     summary: str = Field(..., example="A man sings about loyalty and never giving up.")
     social_posts: Dict[str, str] = Field(
@@ -14,4 +27,119 @@ class ProcessResponse(BaseModel):
             "instagram": "Throwback vibes with this all-time classic 🎶 #Loyalty #80s",
             "youtube": "One of the most iconic anthems of the '80s. Enjoy!"
         }
-    )
\ No newline at end of file
+    )
+    # The models that ran and, with MODEL_POLICY=adaptive, why they were picked
+    models: Optional[Dict[str, Any]] = Field(
+        None,
+        example={
+            "policy": "adaptive", "whisper": "small", "summarizer": "sshleifer/distilbart-cnn-12-6",
+            "quality": "high", "target_s": 112.4, "predicted_s": 96.8, "within_target": True,
+            "queue_depth": 1, "capacity": 2, "audio_seconds": 213.0,
+        }
+    )
+    # Only with ?timings=true: one entry per measured step (see JobStatus.timings)
+    timings: Optional[List[Dict[str, Any]]] = None
+
+
+class JobSubmitted(BaseModel):
+    job_id: str = Field(..., example="3f2b9c0e8d7a4e1b9a6c5d4e3f2a1b0c")
+    status: str = Field(..., example="queued")
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str = Field(..., example="process")
+    status: str = Field(..., example="running")
+    stages: Dict[str, Dict[str, Any]] = Field(
+        ...,
+        example={
+            "download": {"status": "done", "duration_s": 4.2},
+            "transcribe": {"status": "running"},
+            "summarize": {"status": "pending"},
+            "generate": {"status": "pending"},
+        }
+    )
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    timings: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        example=[
+            {"stage": "download", "wall_s": 3.9, "cpu_s": 0.4, "peak_rss_mb": 412.0, "audio_seconds": 213},
+            {"stage": "decode", "wall_s": 0.8, "cpu_s": 0.1, "peak_rss_mb": 431.5, "audio_seconds": 213.0},
+            {"stage": "transcribe", "wall_s": 21.3, "cpu_s": 20.7, "peak_rss_mb": 1204.2,
+             "model": "base", "audio_seconds": 213.0},
+            {"stage": "summarize", "cache_hit": True},
+        ]
+    )
+
+
+class BatchRequest(BaseModel):
+    urls: List[HttpUrl] = Field(default_factory=list, example=["https://www.youtube.com/watch?v=dQw4w9WgXcQ"])
+    playlist_url: Optional[HttpUrl] = Field(
+        None, example="https://www.youtube.com/playlist?list=PLFgquLnL59alCl_2TQvOiD5Vgm1hCaGSI"
+    )
+    summary_mode: Optional[SummaryMode] = Field(None, example="fast")
+
+
+class BatchSubmitted(BaseModel):
+    batch_id: str
+    items: int = Field(..., example=12)
+
+
+class BatchStatus(BaseModel):
+    batch_id: str
+    status: str = Field(..., example="running")
+    items: List[Dict[str, Any]]
+    throughput: Dict[str, Any] = Field(
+        ...,
+        example={
+            "items_total": 12, "items_done": 5, "items_failed": 0,
+            "elapsed_s": 412.3, "items_per_min": 0.73,
+            "stage_busy_s": {"download": 61.0, "transcribe": 388.2, "summarize": 95.4, "generate": 40.1},
+        }
+    )
+
+
+class Segment(BaseModel):
+    start: float = Field(..., example=43.2)
+    end: float = Field(..., example=46.9)
+    text: str = Field(..., example="Never gonna give you up")
+
+
+class VideoRecord(BaseModel):
+    video_id: str = Field(..., example="yt:dQw4w9WgXcQ")
+    url: Optional[str] = None
+    title: Optional[str] = None
+    transcript: str
+    segments: List[Segment]
+    summary: Optional[str] = None
+    social_posts: Optional[Dict[str, str]] = None
+    whisper_model: Optional[str] = Field(None, example="base")
+    summarizer_model: Optional[str] = Field(None, example="facebook/bart-large-cnn")
+    created_at: float
+    updated_at: float
+
+
+class SearchHit(BaseModel):
+    video_id: str = Field(..., example="yt:dQw4w9WgXcQ")
+    url: Optional[str] = None
+    title: Optional[str] = None
+    start: float = Field(..., example=43.2)
+    end: float = Field(..., example=46.9)
+    text: str = Field(..., example="Never gonna give you up")
+    snippet: str = Field(..., example="Never gonna [give] you [up]")
+
+
+class SearchResults(BaseModel):
+    query: str
+    results: List[SearchHit]
+
+
+class RegeneratedPost(BaseModel):
+    video_id: str = Field(..., example="yt:dQw4w9WgXcQ")
+    platform: str = Field(..., example="twitter")
+    text: str = Field(..., example="Some promises are forever 🎶 #NeverGonnaGiveYouUp")
+    social_posts: Dict[str, str]
@@ -0,0 +1,298 @@
+import json
+import os
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from app import config
+
+
+class ArtifactStore:
+    """
+    Local file store for pipeline artifacts (audio, transcripts, summaries, posts).
+
+    Artifacts are addressed by a relative reference such as
+    "transcripts/yt_dQw4w9WgXcQ.json", which is small enough to pass around
+    (e.g. through Airflow XCom) instead of the payload itself. Writes go to a
+    temp file that is renamed into place, so readers never see partial files.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def path(self, ref: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, ref))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Artifact reference escapes the store: {ref}")
+        return path
+
+    @staticmethod
+    def safe_key(key: str) -> str:
+        # Keys like "yt:abc" become "yt_abc" so they are safe file names
+        return "".join(c if c.isalnum() or c in "-_." else "_" for c in key)
+
+    def ref(self, namespace: str, key: str, ext: str) -> str:
+        return f"{namespace}/{self.safe_key(key)}.{ext}"
+
+    def directory(self, namespace: str) -> str:
+        path = os.path.dirname(self.path(namespace + "/_"))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def find(self, namespace: str, key: str, exts: Optional[Sequence[str]] = None) -> Optional[str]:
+        """
+        Reference of an existing artifact for exactly key, with any extension or
+        one of exts, or None. Keys may contain dots ("yt:x#t=1.5"), so the name
+        must be the key plus a single extension, not merely start with the key.
+        """
+        stem = self.safe_key(key)
+        for name in sorted(os.listdir(self.directory(namespace))):
+            name_stem, dot, ext = name.rpartition(".")
+            if not dot or name_stem != stem:
+                continue
+            # Skip in-progress downloads (yt-dlp .part/.ytdl) and our own temp files
+            if ext in ("part", "ytdl") or (exts is not None and ext not in exts):
+                continue
+            return f"{namespace}/{name}"
+        return None
+
+    def exists(self, ref: str) -> bool:
+        return os.path.exists(self.path(ref))
+
+    def put_bytes(self, ref: str, data: bytes) -> str:
+        path = self.path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return ref
+
+    def put_file(self, ref: str, source_path: str) -> str:
+        """Moves an existing file into the store."""
+        path = self.path(ref)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+        return ref
+
+    def put_text(self, namespace: str, key: str, text: str) -> str:
+        return self.put_bytes(self.ref(namespace, key, "txt"), text.encode("utf-8"))
+
+    def put_json(self, namespace: str, key: str, value: Any) -> str:
+        return self.put_bytes(self.ref(namespace, key, "json"),
+                              json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def get_text(self, ref: str) -> str:
+        with open(self.path(ref), encoding="utf-8") as f:
+            return f.read()
+
+    def get_json(self, ref: str) -> Any:
+        with open(self.path(ref), encoding="utf-8") as f:
+            return json.load(f)
+
+
+# Containers that already hold compressed audio are stored as downloaded
+COMPRESSED_EXTS = ("webm", "m4a", "opus", "ogg", "mp3", "aac", "flac")
+# Everything else (WAV) is re-encoded to 16 kHz mono, all Whisper uses
+_CODECS = {
+    "flac": ("flac", ["-c:a", "flac"]),
+    "opus": ("opus", ["-c:a", "libopus", "-b:a", "32k", "-application", "voip"]),
+}
+AUDIO_EXTS = COMPRESSED_EXTS + tuple(ext for ext, _ in _CODECS.values())
+# Audio used this recently is evicted for size only when older audio can't free enough;
+# a job may be about to read it
+_IN_USE_S = 600
+
+
+class AudioStore(ArtifactStore):
+    """
+    Managed audio under the "audio" namespace of the artifact store, one file per
+    video ID ("audio/yt_dQw4w9WgXcQ.webm"), so titles never collide and a video
+    is downloaded once.
+
+    Files are kept compressed: downloads as delivered, WAVs re-encoded to codec
+    (FLAC or Opus). An SQLite index next to them records the source URL, format,
+    size and access times; entries older than max_age_s are dropped, and the
+    least recently used go first once the total exceeds max_bytes. Files are
+    moved in with a rename, so concurrent jobs never read half-written audio.
+    """
+
+    namespace = "audio"
+
+    def __init__(self, root: str, max_bytes: int, max_age_s: int, codec: str = "flac"):
+        super().__init__(root)
+        if codec not in _CODECS:
+            raise ValueError(f"Unsupported audio codec {codec!r}, expected one of {', '.join(_CODECS)}")
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory(self.namespace), "index.db"),
+                                   timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS audio (
+                   video_id TEXT PRIMARY KEY,
+                   ref TEXT NOT NULL,
+                   format TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   url TEXT,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS audio_accessed ON audio (accessed_at)")
+        self._db.commit()
+
+    def staging_dir(self) -> str:
+        """Where downloads land before put(); same filesystem, so moving them in is a rename."""
+        return self.directory(self.namespace + "/.staging")
+
+    def get(self, video_id: str) -> Optional[str]:
+        """Path of the stored audio for video_id, or None. Counts as a use for LRU."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT ref, created_at FROM audio WHERE video_id = ?",
+                                   (video_id,)).fetchone()
+            if row is None:
+                # Files stored before the index existed (e.g. by the backfill DAG) are adopted
+                ref = self.find(self.namespace, video_id, AUDIO_EXTS)
+                if ref is None:
+                    return None
+                self._index(video_id, ref, None, now)
+                row = (ref, now)
+            ref, created_at = row
+            if now - created_at > self.max_age_s or not self.exists(ref):
+                self._delete(video_id, ref)
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE audio SET accessed_at = ? WHERE video_id = ?", (now, video_id))
+            self._db.commit()
+        return self.path(ref)
+
+    def put(self, video_id: str, source_path: str, url: Optional[str] = None) -> str:
+        """
+        Moves (or for uncompressed audio, encodes and removes) source_path into
+        the store as the audio of video_id and returns its path.
+        """
+        ext = os.path.splitext(source_path)[1].lstrip(".").lower()
+        staged = os.path.join(self.staging_dir(), f".tmp-{uuid.uuid4().hex}")
+        if ext in COMPRESSED_EXTS:
+            os.replace(source_path, staged)
+        else:
+            ext, codec_args = _CODECS[self.codec]
+            try:
+                _encode(source_path, staged, codec_args, ext)
+            except Exception:
+                if os.path.exists(staged):
+                    os.remove(staged)
+                raise
+            os.remove(source_path)
+
+        ref = self.ref(self.namespace, video_id, ext)
+        now = time.time()
+        with self._lock:
+            os.replace(staged, self.path(ref))
+            previous = self._db.execute("SELECT ref FROM audio WHERE video_id = ?", (video_id,)).fetchone()
+            if previous and previous[0] != ref and self.exists(previous[0]):
+                os.remove(self.path(previous[0]))  # a different format of the same audio
+            self._index(video_id, ref, url, now)
+            self._evict(now, keep=video_id)
+            self._db.commit()
+        return self.path(ref)
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT video_id, ref, format, size, url, created_at, accessed_at FROM audio "
+                "ORDER BY accessed_at DESC"
+            ).fetchall()
+        keys = ("video_id", "ref", "format", "size", "url", "created_at", "accessed_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+
+    def _index(self, video_id: str, ref: str, url: Optional[str], now: float):
+        self._db.execute(
+            "INSERT OR REPLACE INTO audio (video_id, ref, format, size, url, created_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (video_id, ref, ref.rsplit(".", 1)[-1], os.path.getsize(self.path(ref)), url, now, now),
+        )
+
+    def _delete(self, video_id: str, ref: str):
+        self._db.execute("DELETE FROM audio WHERE video_id = ?", (video_id,))
+        try:
+            os.remove(self.path(ref))
+        except OSError:
+            pass
+
+    def _evict(self, now: float, keep: Optional[str] = None):
+        """
+        Drops expired audio, then least recently used audio until the total fits
+        max_bytes: audio not used in the last _IN_USE_S first, then recent audio.
+        keep (the audio just stored, which its job is about to read) is never dropped.
+        """
+        for video_id, ref in self._db.execute(
+            "SELECT video_id, ref FROM audio WHERE created_at < ?", (now - self.max_age_s,)
+        ).fetchall():
+            self._delete(video_id, ref)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM audio").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT video_id, ref, size FROM audio WHERE video_id IS NOT ? "
+            "ORDER BY accessed_at >= ?, accessed_at",
+            (keep, now - _IN_USE_S)
+        ).fetchall()
+        for video_id, ref, size in rows:
+            self._delete(video_id, ref)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def _encode(source_path: str, target_path: str, codec_args: List[str], fmt: str):
+    from app.services.downloader import SAMPLE_RATE, _ffmpeg_exe
+
+    cmd = [_ffmpeg_exe(), "-nostdin", "-loglevel", "error", "-y", "-i", source_path,
+           "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), *codec_args, "-f", "ogg" if fmt == "opus" else fmt,
+           target_path]
+    proc = subprocess.run(cmd, capture_output=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Failed to encode audio: {proc.stderr.decode(errors='ignore').strip()}")
+
+
+_store: Optional[ArtifactStore] = None
+_audio_store: Optional[AudioStore] = None
+_audio_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore(config.ARTIFACT_DIR)
+    return _store
+
+
+def get_audio_store() -> Optional[AudioStore]:
+    """Process-wide audio store, or None when AUDIO_STORE_ENABLED is off."""
+    global _audio_store
+    if not config.AUDIO_STORE_ENABLED:
+        return None
+    with _audio_store_lock:
+        if _audio_store is None:
+            _audio_store = AudioStore(config.ARTIFACT_DIR, config.AUDIO_STORE_MAX_BYTES,
+                                      config.AUDIO_STORE_MAX_AGE_S, config.AUDIO_STORE_CODEC)
+        return _audio_store
@@ -0,0 +1,212 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from yt_dlp import YoutubeDL
+
+from app import config
+from app.services import metrics, pipeline
+from app.services.jobs import Job, QueueFullError, get_job_manager
+
+# One pool per stage, shared by all batches, so each stage's concurrency limit is
+# global: downloads are network-bound, Whisper/BART are CPU-bound, Ollama is remote.
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+# Downloaded-but-not-yet-transcribed items, so downloads can't race ahead and fill the disk
+_buffered = threading.BoundedSemaphore(config.BATCH_MAX_BUFFERED)
+
+_batches: Dict[str, "BatchRun"] = {}
+_batches_lock = threading.Lock()
+_pending = 0  # unfinished items across all batches, at most BATCH_MAX_PENDING
+
+
+def _pool(stage: str) -> ThreadPoolExecutor:
+    with _pools_lock:
+        if stage not in _pools:
+            _pools[stage] = ThreadPoolExecutor(max_workers=config.BATCH_CONCURRENCY[stage],
+                                               thread_name_prefix=f"batch-{stage}")
+        return _pools[stage]
+
+
+def expand_urls(urls: List[str], playlist_url: Optional[str] = None, limit: int = 500) -> List[str]:
+    """
+    Returns the video URLs to process: the given URLs plus every entry of the
+    playlist/channel (flat extraction, nothing is downloaded). Duplicates are dropped.
+    """
+    expanded = list(urls)
+    if playlist_url:
+        expanded += _playlist_entries(playlist_url, limit)
+
+    seen, unique = set(), []
+    for url in expanded:
+        if url not in seen:
+            seen.add(url)
+            unique.append(url)
+    return unique[:limit]
+
+
+def _playlist_entries(url: str, limit: int, depth: int = 0) -> List[str]:
+    opts = {"extract_flat": "in_playlist", "quiet": True, "skip_download": True,
+            "playlistend": limit}
+    try:
+        with YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise RuntimeError(f"Failed to expand playlist: {str(e)}")
+
+    entries = info.get("entries")
+    if entries is None:
+        return [info.get("webpage_url") or url]
+
+    urls = []
+    for entry in entries:
+        if not entry or len(urls) >= limit:
+            continue
+        entry_url = entry.get("url") or entry.get("webpage_url")
+        # Channels expand to their tabs (videos, shorts, ...), which are playlists themselves
+        if entry.get("_type") == "playlist" or entry.get("ie_key") == "YoutubeTab":
+            if entry_url and depth < 1:
+                urls += _playlist_entries(entry_url, limit - len(urls), depth + 1)
+            continue
+        if entry_url and not entry_url.startswith("http") and entry.get("id"):
+            entry_url = f"https://www.youtube.com/watch?v={entry['id']}"
+        if entry_url:
+            urls.append(entry_url)
+    return urls
+
+
+class BatchRun:
+    def __init__(self, urls: List[str]):
+        self.id = uuid.uuid4().hex
+        self.items = [(url, Job("batch-item")) for url in urls]
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._remaining = len(urls)
+        self._lock = threading.Lock()
+
+    def _item_finished(self, job: Job, error: Optional[str] = None):
+        global _pending
+        with _batches_lock:
+            _pending -= 1
+        job.finish(error)
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining == 0:
+                self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def to_dict(self) -> Dict:
+        items = []
+        stage_busy = {stage: 0.0 for stage in pipeline.STAGES}
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for url, job in self.items:
+            info = job.to_dict()
+            counts[info["status"]] = counts.get(info["status"], 0) + 1
+            for stage, stage_info in info["stages"].items():
+                stage_busy[stage] = stage_busy.get(stage, 0.0) + stage_info.get("duration_s", 0.0)
+            items.append({
+                "url": url,
+                "status": info["status"],
+                "stages": info["stages"],
+                "result": info["result"],
+                "error": info["error"],
+            })
+
+        elapsed = (self.finished_at or time.time()) - self.created_at
+        return {
+            "batch_id": self.id,
+            "status": "done" if self.done else "running",
+            "items": items,
+            "throughput": {
+                "items_total": len(self.items),
+                **{f"items_{status}": n for status, n in counts.items()},
+                "elapsed_s": round(elapsed, 2),
+                "items_per_min": round(counts["done"] / elapsed * 60, 2) if elapsed > 0 else 0.0,
+                # Sum of per-item stage durations; compare to elapsed_s to see the overlap
+                "stage_busy_s": {stage: round(busy, 2) for stage, busy in stage_busy.items()},
+            },
+        }
+
+
+def _run_item(run: BatchRun, url: str, job: Job, summary_mode: Optional[str] = None):
+    """
+    Chains the item's stages through the per-stage pools. Each stage hands its
+    output to the next stage's pool and returns, so while item N is transcribed
+    item N+1 can download and item N-1 can be summarized.
+    """
+    def fail(e: Exception):
+        traceback.print_exc()
+        run._item_finished(job, str(e))
+
+    def download():
+        job.status = "running"
+        job.started_at = time.time()
+        _buffered.acquire()
+        try:
+            with metrics.collect(job.timings):
+                audio_path, source = pipeline.download_stage(url, job.on_stage)
+        except Exception as e:
+            _buffered.release()
+            return fail(e)
+        _pool("transcribe").submit(transcribe, audio_path, source)
+
+    # The CPU-bound stages take a job slot, so they count toward the job manager's capacity
+    def transcribe(audio_path, source):
+        try:
+            with get_job_manager().slot(), metrics.collect(job.timings):
+                transcript = pipeline.transcribe_stage(audio_path, source, job.on_stage)
+        except Exception as e:
+            return fail(e)
+        finally:
+            _buffered.release()
+        _pool("summarize").submit(summarize, source, transcript)
+
+    def summarize(source, transcript):
+        try:
+            with get_job_manager().slot(), metrics.collect(job.timings):
+                summary = pipeline.summarize_stage(transcript["text"], job.on_stage, summary_mode)
+        except Exception as e:
+            return fail(e)
+        _pool("generate").submit(generate, source, transcript, summary)
+
+    def generate(source, transcript, summary):
+        try:
+            with metrics.collect(job.timings):
+                posts = pipeline.generate_stage(summary, job.on_stage)
+        except Exception as e:
+            return fail(e)
+        pipeline.save_result(source, transcript, summary, posts, url=url)
+        run._item_finished(job)
+
+    _pool("download").submit(download)
+
+
+def start_batch(urls: List[str], summary_mode: Optional[str] = None) -> BatchRun:
+    """
+    Starts processing urls in the background. Raises QueueFullError if they
+    would take the unfinished items of all batches past BATCH_MAX_PENDING.
+    """
+    global _pending
+    run = BatchRun(urls)
+    with _batches_lock:
+        if _pending + len(urls) > config.BATCH_MAX_PENDING:
+            raise QueueFullError(f"{_pending} batch items are still pending, try again later")
+        _pending += len(urls)
+        cutoff = time.time() - config.JOB_RETENTION_S
+        for batch_id in [b for b, r in _batches.items() if r.done and r.finished_at < cutoff]:
+            del _batches[batch_id]
+        _batches[run.id] = run
+    for url, job in run.items:
+        _run_item(run, url, job, summary_mode)
+    return run
+
+
+def get_batch(batch_id: str) -> Optional[BatchRun]:
+    with _batches_lock:
+        return _batches.get(batch_id)
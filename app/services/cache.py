@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from app import config
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sha256_file(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def make_key(stage: str, *parts: Any) -> str:
+    """Builds a cache key from a stage name and the inputs that determine its output."""
+    return stage + ":" + ":".join(str(p) for p in parts)
+
+
+class ResultCache:
+    """
+    Persistent key/value store for pipeline stage outputs, backed by SQLite.
+
+    Values are JSON-serialisable stage outputs. An entry may also own a file
+    on disk (e.g. downloaded audio); its size counts toward the budget and the
+    file is deleted when the entry is evicted. Entries older than max_age_s are
+    dropped, and least recently used entries go first once the total size
+    exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, max_age_s: int):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "results.db"),
+                                   timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   path TEXT,
+                   size INTEGER NOT NULL,
+                   created_at REAL NOT NULL,
+                   accessed_at REAL NOT NULL
+               )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, path, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, path, created_at = row
+            if now - created_at > self.max_age_s or (path and not os.path.exists(path)):
+                self._delete(key, path)
+                self._db.commit()
+                return None
+            self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, path: Optional[str] = None):
+        data = json.dumps(value)
+        size = len(data)
+        if path and os.path.exists(path):
+            size += os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, path, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, data, path, size, now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _delete(self, key: str, path: Optional[str]):
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _evict(self, now: float):
+        for key, path in self._db.execute(
+            "SELECT key, path FROM entries WHERE created_at < ?", (now - self.max_age_s,)
+        ).fetchall():
+            self._delete(key, path)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._db.execute(
+            "SELECT key, path, size FROM entries ORDER BY accessed_at"
+        ).fetchall():
+            self._delete(key, path)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[ResultCache]:
+    """Process-wide result cache, or None when caching is disabled."""
+    global _cache
+    if not config.CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(config.CACHE_DIR, config.CACHE_MAX_BYTES, config.CACHE_MAX_AGE_S)
+        return _cache
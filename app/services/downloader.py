@@ -1,31 +1,171 @@
 import os
+import re
+import subprocess
+import tempfile
+from typing import Optional
+
+import numpy as np
 from yt_dlp import YoutubeDL
-from moviepy.editor import AudioFileClip
+from yt_dlp.utils import download_range_func
+
+from app import config
+from app.services import metrics
+
+SAMPLE_RATE = 16000  # what Whisper expects: 16 kHz mono float32
+
+
+def _ffmpeg_exe() -> str:
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
 
-def download_youtube_audio(url: str, download_dir: str = "downloads") -> str:
+def audio_format() -> str:
+    """
+    yt-dlp format selector. Whisper resamples everything to 16 kHz mono, so any
+    audio-only stream of at least AUDIO_MIN_ABR_KBPS is as good as the best one;
+    combined with the ascending bitrate sort in _ydl_opts this picks the smallest
+    such stream (e.g. ~50 kbps Opus instead of ~130 kbps). AUDIO_MIN_ABR_KBPS=0
+    downloads the best audio as before.
+    """
+    if config.AUDIO_MIN_ABR_KBPS <= 0:
+        return "bestaudio/best"
+    # "abr>=?" also accepts streams whose bitrate yt-dlp doesn't know
+    return f"bestaudio[abr>=?{config.AUDIO_MIN_ABR_KBPS}]/bestaudio/best"
+
+
+def _ydl_opts(download_dir: str, name: Optional[str],
+              start_s: Optional[float], end_s: Optional[float]) -> dict:
+    clipped = start_s is not None or end_s is not None
+    stem = name or ('%(title)s [%(section_start)s-%(section_end)s]' if clipped else '%(title)s')
+    opts = {
+        'format': audio_format(),
+        'outtmpl': os.path.join(download_dir, stem + '.%(ext)s'),
+        'quiet': True,
+    }
+    if config.AUDIO_MIN_ABR_KBPS > 0:
+        opts['format_sort'] = ['+abr', '+size']
+    if clipped:
+        # Only the requested section is downloaded (by ffmpeg, which seeks in the stream)
+        opts['download_ranges'] = download_range_func(None, [(start_s or 0, end_s or float('inf'))])
+        opts['ffmpeg_location'] = _ffmpeg_exe()
+    return opts
+
+
+def fetch_youtube_audio(url: str, download_dir: str = "downloads", name: Optional[str] = None,
+                        start_s: Optional[float] = None, end_s: Optional[float] = None) -> str:
+    """
+    Downloads the smallest adequate audio stream (see audio_format) for a YouTube URL
+    and returns the path of the downloaded container (webm/m4a/...), without any
+    re-encoding. With start_s and/or end_s only that section of the video is fetched.
+    The file is named after the video title unless a name (without extension) is given.
+    """
     if not os.path.exists(download_dir):
         os.makedirs(download_dir)
 
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': os.path.join(download_dir, '%(title)s.%(ext)s'),
-        'quiet': True
-    }
+    with metrics.stage_timer("download") as timing:
+        try:
+            with YoutubeDL(_ydl_opts(download_dir, name, start_s, end_s)) as ydl:
+                info = ydl.extract_info(url, download=True)
+                downloads = info.get("requested_downloads") or [{}]
+                filename = downloads[0].get("filepath") or ydl.prepare_filename(info)
+        except Exception as e:
+            raise RuntimeError(f"Failed to download video: {str(e)}")
+        duration = info.get("duration")
+        if duration is not None and (start_s is not None or end_s is not None):
+            duration = max(0, min(end_s or duration, duration) - (start_s or 0))
+        timing.audio_seconds = duration
+
+    return filename
 
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE, use_mmap: bool = False) -> np.ndarray:
+    """
+    Decodes any ffmpeg-readable file straight to a mono float32 array at sample_rate.
+
+    The PCM is streamed from ffmpeg's stdout, so nothing is written to disk. With
+    use_mmap=True the samples are spilled to an unlinked temp file and returned as a
+    read-only np.memmap instead, which keeps resident memory low for very long audio.
+    """
+    with metrics.stage_timer("decode") as timing:
+        audio = _decode_audio(path, sample_rate, use_mmap)
+        timing.audio_seconds = len(audio) / sample_rate
+    return audio
+
+
+_DURATION = re.compile(r"Duration: (\d+):(\d\d):(\d\d(?:\.\d+)?)")
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Duration in seconds from the file's header, without decoding; None if it has none."""
+    proc = subprocess.run([_ffmpeg_exe(), "-nostdin", "-hide_banner", "-i", path], capture_output=True)
+    found = _DURATION.search(proc.stderr.decode(errors="ignore"))
+    if not found:
+        return None
+    hours, minutes, seconds = found.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def _decode_audio(path: str, sample_rate: int, use_mmap: bool) -> np.ndarray:
+    cmd = [
+        _ffmpeg_exe(), "-nostdin", "-loglevel", "error", "-threads", "0",
+        "-i", path,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "-",
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    if not use_mmap:
+        pcm, err = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"Failed to decode audio: {err.decode(errors='ignore').strip()}")
+        return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+    with tempfile.NamedTemporaryFile(suffix=".f32", delete=False) as buf:
+        buf_path = buf.name
+        try:
+            while True:
+                block = proc.stdout.read(1 << 20)
+                if not block:
+                    break
+                # 1 MiB is always an even number of bytes, so no sample is split
+                buf.write((np.frombuffer(block, np.int16).astype(np.float32) / 32768.0).tobytes())
+            err = proc.stderr.read()
+            proc.wait()
+        except Exception:
+            proc.kill()
+            os.remove(buf_path)
+            raise
     try:
-        with YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            filename = ydl.prepare_filename(info)
-    except Exception as e:
-        raise RuntimeError(f"Failed to download video: {str(e)}")
+        if proc.returncode != 0:
+            raise RuntimeError(f"Failed to decode audio: {err.decode(errors='ignore').strip()}")
+        if os.path.getsize(buf_path) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(buf_path, dtype=np.float32, mode="r")
+    finally:
+        # The mapping keeps the data alive; the directory entry is not needed
+        os.remove(buf_path)
+
+
+def download_youtube_audio(url: str, download_dir: str = "downloads", name: Optional[str] = None,
+                           start_s: Optional[float] = None, end_s: Optional[float] = None) -> str:
+    """
+    Downloads a YouTube video's audio (or the start_s-end_s section of it) and converts it to a WAV file.
+    This is the original disk-based path, kept as a fallback (AUDIO_DECODE_MODE=wav).
+    """
+    from moviepy.editor import AudioFileClip
 
+    filename = fetch_youtube_audio(url, download_dir, name, start_s=start_s, end_s=end_s)
     audio_path = filename.rsplit('.', 1)[0] + '.wav'
 
     try:
-        with AudioFileClip(filename) as clip:
+        with metrics.stage_timer("convert_wav") as timing, AudioFileClip(filename) as clip:
+            timing.audio_seconds = clip.duration
             clip.write_audiofile(audio_path)
         os.remove(filename)
     except Exception as e:
         raise RuntimeError(f"Failed to convert to audio: {str(e)}")
 
-    return audio_path
\ No newline at end of file
+    return audio_path
@@ -0,0 +1,243 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from app import config
+from app.utils.helpers import clip_start
+
+# Spectral-peak ("constellation") fingerprints: the audio is reduced to 8 kHz,
+# the strongest peak of each frequency band is kept where it is also a local
+# maximum in time, and nearby peak pairs are hashed as (f1, f2, dt). The hashes
+# survive re-encoding and volume changes, and since each one carries its time,
+# matches against a stored video line up at one offset, which also locates a
+# clip inside a longer video.
+FP_RATE = 8000
+N_FFT = 1024
+HOP = 512  # 64 ms frames
+FRAME_S = HOP / FP_RATE
+# FFT bin edges of the bands (bin = 7.8 Hz); below ~40 Hz is mostly hum
+BANDS = (5, 20, 40, 80, 160, 320, 513)
+FAN_OUT = 5  # later peaks each anchor is paired with
+MAX_DT = 31  # frames, ~2 s
+PEAK_FLOOR = 0.5  # magnitude; keeps silence from producing peaks
+_BLOCK_FRAMES = 4096
+
+# Matching
+MIN_ALIGNED = 30  # hashes agreeing on one offset
+MAX_QUERY_HASHES = 5000  # evenly spaced sample of the query's hashes
+_SQL_BATCH = 500
+
+
+def _band_peaks(audio: np.ndarray, sample_rate: int):
+    """(frame, bin) of the band maxima that are also local maxima in time."""
+    factor = max(1, sample_rate // FP_RATE)
+    window = np.hanning(N_FFT).astype(np.float32)
+    frames_total = max(0, (len(audio) // factor - N_FFT) // HOP + 1)
+    band_max, band_bin = [], []
+    for first in range(0, frames_total, _BLOCK_FRAMES):
+        count = min(_BLOCK_FRAMES, frames_total - first)
+        start = first * HOP * factor
+        stop = start + ((count - 1) * HOP + N_FFT) * factor
+        block = np.asarray(audio[start:stop], dtype=np.float32)
+        if factor > 1:
+            block = block[:len(block) // factor * factor].reshape(-1, factor).mean(axis=1)
+        frames = np.lib.stride_tricks.sliding_window_view(block, N_FFT)[::HOP][:count]
+        spectrum = np.abs(np.fft.rfft(frames * window, axis=1))
+        for lo, hi in zip(BANDS, BANDS[1:]):
+            band = spectrum[:, lo:hi]
+            index = band.argmax(axis=1)
+            band_bin.append((lo + index, first))
+            band_max.append((band[np.arange(count), index], first))
+    if not band_max:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+
+    n_bands = len(BANDS) - 1
+    # Regroup the per-block results into (frames, bands) arrays
+    values = np.stack([np.concatenate([v for v, _ in band_max[b::n_bands]]) for b in range(n_bands)], axis=1)
+    bins = np.stack([np.concatenate([v for v, _ in band_bin[b::n_bands]]) for b in range(n_bands)], axis=1)
+    padded = np.pad(values, ((1, 1), (0, 0)))
+    is_peak = (values > PEAK_FLOOR) & (values > padded[:-2]) & (values >= padded[2:])
+    frame_idx, band_idx = np.nonzero(is_peak)
+    return frame_idx.astype(np.int64), bins[frame_idx, band_idx].astype(np.int64)
+
+
+def fingerprint(audio: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Hashes of a mono float32 signal as an (n, 2) int64 array of (hash, frame).
+    """
+    frames, bins = _band_peaks(audio, sample_rate)
+    pairs = []
+    for k in range(1, FAN_OUT + 1):
+        dt = frames[k:] - frames[:-k]
+        ok = (dt > 0) & (dt <= MAX_DT)
+        hashes = (bins[:-k][ok] << 14) | (bins[k:][ok] << 5) | dt[ok]
+        pairs.append(np.stack([hashes, frames[:-k][ok]], axis=1))
+    if not pairs:
+        return np.zeros((0, 2), np.int64)
+    return np.concatenate(pairs)
+
+
+class FingerprintIndex:
+    """
+    SQLite index of the fingerprints of every transcribed video (keyed like the
+    transcript store), used to find audio that was transcribed before under
+    another URL or as an upload. Beyond max_sources videos (0: no limit) the
+    oldest are dropped.
+    """
+
+    def __init__(self, path: str, max_sources: int = 0):
+        self.max_sources = max_sources
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS sources (
+                   id INTEGER PRIMARY KEY,
+                   video_id TEXT UNIQUE NOT NULL,
+                   duration_s REAL NOT NULL,
+                   created_at REAL NOT NULL
+               )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS hashes (
+                   hash INTEGER NOT NULL,
+                   source_id INTEGER NOT NULL,
+                   frame INTEGER NOT NULL,
+                   PRIMARY KEY (hash, source_id, frame)
+               ) WITHOUT ROWID"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS hashes_source ON hashes (source_id)")
+        self._db.commit()
+
+    def add(self, video_id: str, prints: np.ndarray, duration_s: float):
+        """Indexes the fingerprints of video_id, replacing earlier ones."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM sources WHERE video_id = ?", (video_id,)).fetchone()
+            if row:
+                self._db.execute("DELETE FROM hashes WHERE source_id = ?", (row[0],))
+                self._db.execute("DELETE FROM sources WHERE id = ?", (row[0],))
+            source_id = self._db.execute(
+                "INSERT INTO sources (video_id, duration_s, created_at) VALUES (?, ?, ?)",
+                (video_id, duration_s, time.time()),
+            ).lastrowid
+            self._db.executemany(
+                "INSERT OR IGNORE INTO hashes (hash, source_id, frame) VALUES (?, ?, ?)",
+                ((int(h), source_id, int(t)) for h, t in prints),
+            )
+            self._evict()
+            self._db.commit()
+
+    def sources(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+
+    def _evict(self):
+        if not self.max_sources:
+            return
+        for (source_id,) in self._db.execute(
+            "SELECT id FROM sources ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?", (self.max_sources,)
+        ).fetchall():
+            self._db.execute("DELETE FROM hashes WHERE source_id = ?", (source_id,))
+            self._db.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+
+    def match(self, prints: np.ndarray, duration_s: float) -> Optional[Dict]:
+        """
+        Best match of the query fingerprints: {"video_id", "kind", "offset_s",
+        "score"} where kind is "exact" (same audio, e.g. a re-upload) or
+        "subrange" (the query is a section of the stored video, starting
+        offset_s into it), or None. score is the share of query hashes that
+        line up at the matched offset.
+        """
+        if len(prints) < MIN_ALIGNED:
+            return None
+        if len(prints) > MAX_QUERY_HASHES:
+            prints = prints[np.linspace(0, len(prints) - 1, MAX_QUERY_HASHES).astype(np.int64)]
+        query_frames: Dict[int, list] = {}
+        for h, t in prints:
+            query_frames.setdefault(int(h), []).append(int(t))
+
+        votes: Dict[tuple, int] = {}
+        hashes = list(query_frames)
+        with self._lock:
+            for i in range(0, len(hashes), _SQL_BATCH):
+                batch = hashes[i:i + _SQL_BATCH]
+                rows = self._db.execute(
+                    f"SELECT hash, source_id, frame FROM hashes WHERE hash IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for h, source_id, frame in rows:
+                    for t in query_frames[h]:
+                        key = (source_id, frame - t)
+                        votes[key] = votes.get(key, 0) + 1
+            if not votes:
+                return None
+            # Frame boundaries of a cut clip rarely line up exactly; count neighbouring offsets too
+            (source_id, offset), _ = max(votes.items(), key=lambda kv: kv[1])
+            aligned = sum(votes.get((source_id, offset + d), 0) for d in (-1, 0, 1))
+            video_id, source_duration = self._db.execute(
+                "SELECT video_id, duration_s FROM sources WHERE id = ?", (source_id,)
+            ).fetchone()
+
+        score = aligned / len(prints)
+        if aligned < MIN_ALIGNED or score < config.FINGERPRINT_MIN_SCORE:
+            return None
+        offset_s = offset * FRAME_S
+        tolerance = max(2.0, 0.02 * source_duration)
+        if abs(offset_s) <= 1.0 and abs(duration_s - source_duration) <= tolerance:
+            kind = "exact"
+        elif offset_s >= -1.0 and offset_s + duration_s <= source_duration + tolerance:
+            kind = "subrange"
+        else:
+            return None  # overlaps only partly; the rest would still need transcribing
+        return {"video_id": video_id, "kind": kind, "offset_s": round(max(0.0, offset_s), 2),
+                "score": round(score, 3)}
+
+
+def reuse_transcript(match: Dict, duration_s: float, model_id: str) -> Optional[Dict]:
+    """
+    Transcript for audio matching a stored video: the stored one for an exact
+    match, or the segments within the matched range, moved to start at 0.
+    None if the stored transcript is gone or from another Whisper model than
+    model_id (pipeline.whisper_model_id, so int8 and full precision differ).
+    """
+    from app.services.transcript_store import get_transcript_store
+
+    store = get_transcript_store()
+    record = store.get(match["video_id"]) if store is not None else None
+    # A transcript from another Whisper model would not be what this run asked for
+    if record is None or not record["segments"] or record["whisper_model"] != model_id:
+        return None
+    # Stored clip segments are on their full video's timeline
+    start = match["offset_s"] + clip_start(match["video_id"])
+    end = start + duration_s
+    segments = []
+    for seg in record["segments"]:
+        if start <= (seg["start"] + seg["end"]) / 2 < end:
+            segments.append({"start": round(max(0.0, seg["start"] - start), 2),
+                             "end": round(max(0.0, seg["end"] - start), 2),
+                             "text": " " + seg["text"]})
+    if not segments:
+        return None
+    text = record["transcript"] if match["kind"] == "exact" else "".join(s["text"] for s in segments)
+    return {"text": text, "segments": segments, "reused_from": match}
+
+
+_index: Optional[FingerprintIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_fingerprint_index() -> Optional[FingerprintIndex]:
+    """Process-wide index, or None unless FINGERPRINT_ENABLED (needs the transcript store)."""
+    global _index
+    if not (config.FINGERPRINT_ENABLED and config.STORE_ENABLED):
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex(config.FINGERPRINT_DB, config.FINGERPRINT_MAX_SOURCES)
+        return _index
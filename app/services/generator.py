@@ -1,70 +1,106 @@
 import requests
 import re
-from typing import Dict, Optional
-import time
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
 import json
 
-# change it to ollama when using docker else use localhost
-OLLAMA_URL = "http://ollama:11434"
-OLLAMA_MODEL = "phi:latest"
-MAX_RETRIES = 3
+from app import config
+from app.services import metrics
+from app.services.ollama_client import CircuitOpenError, get_ollama_client, record_usage
+
+# Set OLLAMA_URL=http://localhost:11434 when not running in docker
+OLLAMA_URL = config.OLLAMA_URL
+OLLAMA_MODEL = config.OLLAMA_MODEL
+MAX_RETRIES = 3  # attempts when Ollama answers with an empty response
+GENERATION_OPTIONS = {
+    "temperature": 0.7,
+    "top_p": 0.9,
+    "max_tokens": 500
+}
+
+PROMPT_TEMPLATE = """You are a creative social media assistant. Based on this summary, create engaging social media content.
+
+Summary: {summary}
+
+Please respond EXACTLY in this format:
+
+Twitter: [Write a catchy tweet under 280 characters. Use at most one hashtag, and fill the rest with engaging text.]
+
+Instagram: [Write an engaging caption with 3-4 emojis and end with 2-3 hashtags.]
+
+Shorts Title: [Write a compelling YouTube Shorts title ideally close to 40 characters, but never more than 50 characters.]
+
+Remember to follow the exact format above."""
+
+
+# Per-platform mode (GENERATION_MODE=per-platform): one small prompt per platform,
+# sent to Ollama concurrently, so caption latency is that of the slowest platform
+PLATFORMS = {
+    "twitter": ("tweet", "Write a catchy tweet under 280 characters. Use at most one hashtag, "
+                         "and fill the rest with engaging text."),
+    "instagram": ("Instagram caption", "Write an engaging caption with 3-4 emojis and end with 2-3 hashtags."),
+    "shorts_title": ("YouTube Shorts title", "Write a compelling YouTube Shorts title ideally close to "
+                                             "40 characters, but never more than 50 characters."),
+}
+
+PLATFORM_PROMPT_TEMPLATE = """You are a creative social media assistant. Based on this summary, write a {label}.
+
+Summary: {summary}
+
+{instruction}
+
+{answer_format}"""
+
+PLAIN_ANSWER = "Respond with only the {label} itself, no label, quotes or explanation."
+JSON_ANSWER = 'Respond with a JSON object of the form {{"text": "<the {label}>"}} and nothing else.'
+
+_LABEL_PREFIX = re.compile(r"^\s*(?:twitter|tweet|instagram(?: caption)?|caption|(?:youtube )?shorts title|title)\s*:\s*",
+                           re.IGNORECASE)
+
+
+def build_prompt(summary: str) -> str:
+    return PROMPT_TEMPLATE.format(summary=summary)
+
+
+def build_platform_prompt(summary: str, platform: str, json_mode: bool = False) -> str:
+    label, instruction = PLATFORMS[platform]
+    answer_format = (JSON_ANSWER if json_mode else PLAIN_ANSWER).format(label=label)
+    return PLATFORM_PROMPT_TEMPLATE.format(label=label, summary=summary, instruction=instruction,
+                                           answer_format=answer_format)
+
+
+def per_platform() -> bool:
+    return config.GENERATION_MODE == "per-platform"
+
+
+def prompt_version() -> str:
+    """Text of the prompts in use, for cache keys."""
+    if not per_platform():
+        return PROMPT_TEMPLATE
+    return PLATFORM_PROMPT_TEMPLATE + json.dumps(PLATFORMS, sort_keys=True) + \
+        (JSON_ANSWER if config.GENERATION_JSON else PLAIN_ANSWER)
+
+
+def cache_params() -> Dict:
+    """Everything besides the summary, prompts and model that changes the generated posts."""
+    if not per_platform():
+        return GENERATION_OPTIONS
+    return {**GENERATION_OPTIONS, "mode": "per-platform", "json": config.GENERATION_JSON}
 
 
 def check_ollama_connection():
-    """Check if Ollama is accessible and has the required model"""
-    try:
-        # Test basic connectivity
-        response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=10)
-        response.raise_for_status()
-        
-        models = response.json().get("models", [])
-        model_names = [model.get("name", "") for model in models]
-        
-        print(f"🔍 Available models: {model_names}")
-        
-        if not any(OLLAMA_MODEL in name for name in model_names):
-            print(f"❌ Model '{OLLAMA_MODEL}' not found in available models")
-            return False
-            
-        print(f"✅ Ollama connection successful, {OLLAMA_MODEL} model available")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Ollama connection failed: {e}")
-        return False
+    """Check if Ollama is accessible and has the required model (cached, see OllamaClient)"""
+    return get_ollama_client().is_available()
 
 
 def test_ollama_generate():
-    """Testing a simple generation to verify if Ollama is working"""
+    """Testing a simple generation to verify if Ollama is working (diagnostics only)"""
     try:
-        test_prompt = "Say hello in one word."
-        response = requests.post(
-            f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": OLLAMA_MODEL,
-                "prompt": test_prompt,
-                "stream": False
-            },
-            timeout=120
-        )
-        print("Payload sent:", {
-            "model": OLLAMA_MODEL,
-            "prompt": test_prompt,
-            "stream": False
-        })
-        print("Response text:", response.text)
-        response.raise_for_status()
-        
-        result = response.json()
+        result = get_ollama_client().generate("Say hello in one word.")
         print(f"🧪 Test generation response: {result}")
-        
-        if "response" in result and result["response"].strip():
-            print("✅ Ollama generation test successful")
-            return True
-        else:
-            print("❌ Ollama generation test failed - empty response")
-            return False
-            
+        return bool(result.get("response", "").strip())
     except Exception as e:
         print(f"❌ Ollama generation test failed: {e}")
         return False
@@ -74,159 +110,282 @@ def generate_social_posts(summary: str) -> Dict[str, str]:
     """
     Generates social media posts using Ollama and Mistral based on a summary.
     Returns a dictionary with 'twitter', 'instagram', and 'shorts_title' keys.
+    With GENERATION_MODE=per-platform each platform gets its own prompt, all sent concurrently.
     """
-    
-    # First, check if Ollama is accessible
-    if not check_ollama_connection():
+    client = get_ollama_client()
+
+    # Cached model check; no network round-trip on most requests
+    if not client.is_available():
         print("❌ Ollama not accessible, returning fallback")
         return get_fallback_posts()
-    
-    # Test basic generation
-    if not test_ollama_generate():
-        print("❌ Ollama generation test failed, returning fallback")
-        return get_fallback_posts()
-    
-    prompt = f"""You are a creative social media assistant. Based on this summary, create engaging social media content.
 
-Summary: {summary}
-
-Please respond EXACTLY in this format:
+    if per_platform():
+        posts = {}
+        for platform, text in iter_platform_posts(summary):
+            posts[platform] = text
+        return mark_missing_posts(posts)
 
-Twitter: [Write a catchy tweet under 280 characters. Use at most one hashtag, and fill the rest with engaging text.]
+    prompt = build_prompt(summary)
 
-Instagram: [Write an engaging caption with 3-4 emojis and end with 2-3 hashtags.]
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            # Transport errors are retried with backoff inside the client
+            response_data = client.generate(prompt, options=GENERATION_OPTIONS)
+        except CircuitOpenError as e:
+            print(f"❌ {e}, returning fallback")
+            return get_fallback_posts()
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            print(f"❌ Ollama request failed: {e}")
+            return get_fallback_posts()
 
-Shorts Title: [Write a compelling YouTube Shorts title ideally close to 40 characters, but never more than 50 characters.]
+        raw_output = response_data.get("response", "")
 
-Remember to follow the exact format above."""
+        if not raw_output or raw_output.strip() == "":
+            print(f"⚠️ Empty response on attempt {attempt}/{MAX_RETRIES}")
+            continue
 
-    for attempt in range(1, MAX_RETRIES + 1):
-        print(f"🔄 Attempt {attempt}/{MAX_RETRIES} to generate posts...")
-
-        try:
-            # Using the generate API
-            payload = {
-                "model": OLLAMA_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 500
-                }
-            }
-            
-            print(f"📤 Sending request to: {OLLAMA_URL}/api/generate")
-            print(f"📤 Payload: {json.dumps(payload, indent=2)}")
-            
-            response = requests.post(
-                f"{OLLAMA_URL}/api/generate",
-                json=payload,
-                timeout=120,  # Increased timeout for testing
-            )
-            
-            print(f"📥 Response status: {response.status_code}")
-            print(f"📥 Response headers: {dict(response.headers)}")
-            
-            response.raise_for_status()
-            response_data = response.json()
-            
-            print(f"📥 Full response: {json.dumps(response_data, indent=2)}")
-            
-            raw_output = response_data.get("response", "")
-            
-            if not raw_output or raw_output.strip() == "":
-                print(f"⚠️ Empty response on attempt {attempt}")
-                continue
-
-            print("📝 Ollama raw output:\n", raw_output)
-            parsed = parse_ollama_response(raw_output)
-            
-            print(f"📋 Parsed response: {json.dumps(parsed, indent=2)}")
-
-            # Validating parsed content
-            valid_content = True
-            for key in ["twitter", "instagram", "shorts_title"]:
-                if not parsed.get(key) or parsed[key].strip() == "":
-                    print(f"⚠️ Missing or empty content for: {key}")
-                    parsed[key] = get_fallback_content(key)
-                    valid_content = False
-
-            if valid_content:
-                print("✅ Successfully generated all social media posts")
-                return parsed
-            else:
-                print("⚠️ Some content was missing, using fallbacks for those fields")
-                return parsed
-
-        except requests.Timeout as e:
-            print(f"⏰ Timeout on attempt {attempt}: {e}")
-            time.sleep(5)
-        except requests.RequestException as e:
-            print(f"❌ Request error on attempt {attempt}: {e}")
-            if hasattr(e.response, 'text'):
-                print(f"Error response: {e.response.text}")
-            time.sleep(2)
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON decode error on attempt {attempt}: {e}")
-            time.sleep(2)
-        except Exception as e:
-            print(f"❌ Unexpected error on attempt {attempt}: {e}")
-            time.sleep(2)
+        return mark_missing_posts(parse_ollama_response(raw_output))
 
     print("❌ Failed to generate posts after all attempts")
     return get_fallback_posts()
 
 
-def parse_ollama_response(text: str) -> Dict[str, str]:
+def _clean_platform_text(raw: str, json_mode: bool) -> str:
+    if json_mode:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return ""
+        text = value.get("text", "") if isinstance(value, dict) else ""
+        return text.strip() if isinstance(text, str) else ""
+    text = _LABEL_PREFIX.sub("", raw.strip(), count=1).strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        text = text[1:-1].strip()
+    return text
+
+
+def generate_platform_post(summary: str, platform: str, json_mode: Optional[bool] = None) -> Optional[str]:
     """
-    Parse the structured response from Ollama and extract platform-specific content.
+    Generates the post for one platform with its own small prompt, in Ollama's
+    JSON format mode if json_mode (default GENERATION_JSON). Returns None when
+    nothing usable came back, so the caller decides on a fallback.
     """
-    posts = {"twitter": "", "instagram": "", "shorts_title": ""}
-    key_map = {
-        "twitter": "twitter",
-        "instagram": "instagram", 
-        "shorts title": "shorts_title",
-        "shorts_title": "shorts_title",  # Handling both formats
+    json_mode = config.GENERATION_JSON if json_mode is None else json_mode
+    client = get_ollama_client()
+    prompt = build_platform_prompt(summary, platform, json_mode)
+    extra = {"format": "json"} if json_mode else {}
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            response_data = client.generate(prompt, options=GENERATION_OPTIONS, **extra)
+        except CircuitOpenError as e:
+            print(f"❌ {e}")
+            return None
+        except (requests.RequestException, json.JSONDecodeError) as e:
+            print(f"❌ Ollama request for {platform} failed: {e}")
+            return None
+        text = _clean_platform_text(response_data.get("response", ""), json_mode)
+        if text:
+            return text
+        print(f"⚠️ Empty {platform} response on attempt {attempt}/{MAX_RETRIES}")
+    return None
+
+
+_platform_pool: Optional[ThreadPoolExecutor] = None
+_platform_pool_lock = threading.Lock()
+
+
+def _get_platform_pool() -> ThreadPoolExecutor:
+    # Shared by all jobs, so concurrent generations never exceed Ollama's connection pool
+    global _platform_pool
+    with _platform_pool_lock:
+        if _platform_pool is None:
+            _platform_pool = ThreadPoolExecutor(max_workers=config.OLLAMA_POOL_SIZE,
+                                                thread_name_prefix="ollama-platform")
+        return _platform_pool
+
+
+def iter_platform_posts(summary: str) -> Iterator[Tuple[str, Optional[str]]]:
+    """Generates every platform's post concurrently; yields (platform, text or None) as each finishes."""
+    pool = _get_platform_pool()
+    # Copy the context so the calls' timings land in the job's collector
+    futures = {
+        pool.submit(contextvars.copy_context().run, generate_platform_post, summary, platform): platform
+        for platform in PLATFORMS
     }
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+KEY_MAP = {
+    "twitter": "twitter",
+    "instagram": "instagram",
+    "shorts title": "shorts_title",
+    "shorts_title": "shorts_title",  # Handling both formats
+}
+
+
+class OllamaResponseParser:
+    """
+    Incremental version of parse_ollama_response: feed() it the response text as
+    it streams in and read snapshot() at any point for the posts parsed so far.
+    """
+
+    def __init__(self):
+        self.posts = {"twitter": "", "instagram": "", "shorts_title": ""}
+        self._current_key = None
+        self._current_content = []
+        self._pending = ""  # text after the last newline
 
-    # Split into lines and process
-    lines = text.strip().split('\n')
-    current_key = None
-    current_content = []
+    def feed(self, text: str):
+        self._pending += text
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._process_line(line)
 
-    for line in lines:
+    def _process_line(self, line: str):
         line = line.strip()
         if not line:
-            continue
+            return
 
         # Checking if the line starts a new section
-        found_key = None
-        for label, internal_key in key_map.items():
-            if line.lower().startswith(label.lower() + ":"):
-                found_key = internal_key
+        for label, internal_key in KEY_MAP.items():
+            if line.lower().startswith(label + ":"):
                 # Saving previous content if there is any
-                if current_key and current_content:
-                    posts[current_key] = ' '.join(current_content).strip()
-                
-                # Starting new section
-                current_key = found_key
-                # Extracting content after the colon
-                content_after_colon = line.split(":", 1)[1].strip() if ":" in line else ""
-                current_content = [content_after_colon] if content_after_colon else []
-                break
-        
-        if not found_key and current_key:
+                self._flush()
+                # Starting new section, keeping the content after the colon
+                self._current_key = internal_key
+                content_after_colon = line.split(":", 1)[1].strip()
+                self._current_content = [content_after_colon] if content_after_colon else []
+                return
+
+        if self._current_key:
             # This line belongs to the current section
-            current_content.append(line)
+            self._current_content.append(line)
+
+    def _flush(self):
+        if self._current_key and self._current_content:
+            self.posts[self._current_key] = ' '.join(self._current_content).strip()
+
+    def snapshot(self) -> Dict[str, str]:
+        """Posts parsed so far, including the line that is still being streamed."""
+        preview = OllamaResponseParser()
+        preview.posts = dict(self.posts)
+        preview._current_key = self._current_key
+        preview._current_content = list(self._current_content)
+        pending = self._pending.strip()
+        # Hold back a partial line that may still turn into a label ("Insta...")
+        if pending and not any((label + ":").startswith(pending.lower()) for label in KEY_MAP):
+            preview._process_line(pending)
+        preview._flush()
+        return preview.posts
 
-    # Including the last section
-    if current_key and current_content:
-        posts[current_key] = ' '.join(current_content).strip()
+    def close(self) -> Dict[str, str]:
+        if self._pending:
+            self._process_line(self._pending)
+            self._pending = ""
+        # Including the last section
+        self._flush()
+        return self.posts
 
+
+def mark_missing_posts(parsed: Dict[str, Optional[str]]) -> Dict[str, str]:
+    """
+    Every platform's post, with "" for those that came back empty (to be
+    regenerated, never filled with generic text), or the fallback posts when
+    nothing came back at all.
+    """
+    posts = {key: (parsed.get(key) or "").strip() for key in PLATFORMS}
+    if not any(posts.values()):
+        return get_fallback_posts()
+    missing = missing_posts(posts)
+    if missing:
+        print(f"⚠️ Missing or empty content for: {', '.join(missing)}; regenerate them separately")
     return posts
 
 
+def missing_posts(posts: Dict[str, str]) -> List[str]:
+    """Platforms whose post failed: all of them for the fallback posts, else the empty ones."""
+    if posts == get_fallback_posts():
+        return list(PLATFORMS)
+    return [key for key in PLATFORMS if not posts.get(key)]
+
+
+def stream_social_posts(summary: str) -> Iterator[Tuple[str, object]]:
+    """
+    Streaming variant of generate_social_posts using Ollama's stream mode.
+    Yields ("token", text) as the model produces output, ("partial", posts) whenever
+    the parsed posts change, and finally ("posts", posts) with the complete result.
+    """
+    client = get_ollama_client()
+    if not client.is_available():
+        print("❌ Ollama not accessible, returning fallback")
+        yield "posts", get_fallback_posts()
+        return
+
+    if per_platform():
+        # No token stream here; each platform's post is sent as soon as it is ready
+        posts = {platform: "" for platform in PLATFORMS}
+        for platform, text in iter_platform_posts(summary):
+            if text:
+                posts[platform] = text
+                yield "partial", dict(posts)
+        yield "posts", mark_missing_posts(posts)
+        return
+
+    payload = {
+        "model": client.model,
+        "prompt": build_prompt(summary),
+        "stream": True,
+        "options": GENERATION_OPTIONS,
+    }
+    parser = OllamaResponseParser()
+    last_snapshot = parser.snapshot()
+    received = False
+    try:
+        with metrics.stage_timer("ollama_generate", client.model) as timing, \
+                client.post("/api/generate", payload, stream=True) as response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                token = chunk.get("response", "")
+                if token:
+                    received = True
+                    yield "token", token
+                    parser.feed(token)
+                    snapshot = parser.snapshot()
+                    if snapshot != last_snapshot:
+                        last_snapshot = snapshot
+                        yield "partial", snapshot
+                if chunk.get("done"):
+                    # The final chunk carries the token counts and durations
+                    record_usage(timing, chunk)
+                    break
+    except CircuitOpenError as e:
+        print(f"❌ {e}, returning fallback")
+        yield "posts", get_fallback_posts()
+        return
+    except (requests.RequestException, json.JSONDecodeError) as e:
+        print(f"❌ Ollama stream failed: {e}")
+        yield "posts", get_fallback_posts()
+        return
+
+    if not received:
+        yield "posts", get_fallback_posts()
+        return
+    yield "posts", mark_missing_posts(parser.close())
+
+
+def parse_ollama_response(text: str) -> Dict[str, str]:
+    """
+    Parse the structured response from Ollama and extract platform-specific content.
+    """
+    with metrics.stage_timer("parse"):
+        parser = OllamaResponseParser()
+        parser.feed(text.strip())
+        return parser.close()
+
+
 def get_fallback_posts() -> Dict[str, str]:
     """Fallback values if nothing is generated"""
     return {
@@ -235,11 +394,3 @@ def get_fallback_posts() -> Dict[str, str]:
         "shorts_title": "Could not generate a Shorts title.",
     }
 
-
-def get_fallback_content(key: str) -> str:
-    defaults = {
-        "twitter": "Check out this amazing content! 🎬✨",
-        "instagram": "Experience something amazing today! 🌟🎥 #inspo #trending #shorts",
-        "shorts_title": "Watch This Before It Goes Viral!",
-    }
-    return defaults.get(key, f"Could not generate content for {key}.")
\ No newline at end of file
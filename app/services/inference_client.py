@@ -0,0 +1,96 @@
+import threading
+from multiprocessing.connection import Client, Connection
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from app import config
+
+Address = Union[str, Tuple[str, int]]
+
+
+class InferenceServerError(RuntimeError):
+    pass
+
+
+def parse_address(value: str) -> Tuple[Address, str]:
+    """"host:port" or "unix:/path/to.sock" -> (address, family) for multiprocessing.connection."""
+    if value.startswith("unix:"):
+        return value[len("unix:"):], "AF_UNIX"
+    host, _, port = value.rpartition(":")
+    return (host or "127.0.0.1", int(port)), "AF_INET"
+
+
+def authkey() -> Optional[bytes]:
+    return config.INFERENCE_AUTHKEY.encode() if config.INFERENCE_AUTHKEY else None
+
+
+class InferenceClient:
+    """
+    Client of the shared inference server (app/inference_server.py). Requests and
+    replies are pickled over a local socket; idle connections are pooled so
+    concurrent jobs in one process each get their own.
+    """
+
+    def __init__(self, address: str, key: Optional[bytes] = None, timeout_s: float = 3600):
+        self.address, self.family = parse_address(address)
+        self.authkey = key
+        self.timeout_s = timeout_s
+        self._idle: List[Connection] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return Client(self.address, family=self.family, authkey=self.authkey)
+
+    def call(self, op: str, **kwargs):
+        for attempt in (1, 2):
+            try:
+                conn = self._connect()
+            except OSError as e:
+                raise InferenceServerError(f"Inference server unavailable at {self.address}: {e}")
+            try:
+                conn.send((op, kwargs))
+                if not conn.poll(self.timeout_s):
+                    conn.close()
+                    raise InferenceServerError(f"Inference server did not answer {op!r} "
+                                               f"within {self.timeout_s:.0f}s")
+                status, payload = conn.recv()
+            except (EOFError, OSError) as e:
+                conn.close()
+                # A pooled connection may predate a server restart; retry once on a fresh one
+                if attempt == 1:
+                    continue
+                raise InferenceServerError(f"Lost connection to the inference server: {e}")
+            with self._lock:
+                self._idle.append(conn)
+            if status == "error":
+                raise InferenceServerError(payload)
+            return payload
+
+    def transcribe(self, audio: np.ndarray, model_name: Optional[str] = None) -> Dict:
+        """{"text", "segments"} as transcriber.transcribe_local returns it."""
+        return self.call("transcribe", audio=np.ascontiguousarray(audio, dtype=np.float32),
+                         model_name=model_name)
+
+    def summarize(self, chunks: List[str], model_name: Optional[str] = None,
+                  batch_size: Optional[int] = None) -> List[str]:
+        """One summary per chunk, as summarizer.run_summarizer returns them."""
+        return self.call("summarize", chunks=chunks, model_name=model_name, batch_size=batch_size)
+
+    def status(self) -> Dict:
+        return self.call("status")
+
+
+_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_inference_client() -> InferenceClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = InferenceClient(config.INFERENCE_SERVER_ADDRESS, authkey(), config.INFERENCE_TIMEOUT_S)
+        return _client
@@ -0,0 +1,240 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from app import config
+from app.services import metrics
+from app.services.pipeline import STAGES
+from app.util import remove_file
+
+
+class QueueFullError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.stages = {name: {"status": "pending"} for name in STAGES}
+        self.result: Dict = {}
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._events: List[Dict] = []
+        # Per-stage measurements (wall/CPU time, peak RSS, sizes) from metrics.collect()
+        self.timings: List[Dict] = []
+        self.emit("job", {"job_id": self.id, "status": self.status})
+
+    def emit(self, event: str, data=None):
+        """Appends an event for iter_events() listeners (stage progress, results, tokens)."""
+        with self._changed:
+            self._events.append({"event": event, "data": data})
+            self._changed.notify_all()
+
+    def iter_events(self, keepalive_s: float = 15) -> Iterator[Optional[Dict]]:
+        """
+        Yields every event from the start of the job until it finishes.
+        Yields None when nothing happened for keepalive_s, so streams can send a heartbeat.
+        """
+        index = 0
+        while True:
+            with self._changed:
+                if index >= len(self._events) and not self.done:
+                    self._changed.wait(keepalive_s)
+                batch = self._events[index:]
+                index += len(batch)
+                finished = self.done and index >= len(self._events)
+            if not batch and not finished:
+                yield None
+            for event in batch:
+                yield event
+            if finished:
+                return
+
+    def on_stage(self, stage: str, status: str, output=None):
+        """Pipeline callback: records stage progress and partial results."""
+        with self._lock:
+            self.emit("stage", {"stage": stage, "status": status})
+            info = self.stages.setdefault(stage, {})
+            info["status"] = status
+            now = time.time()
+            if status == "running":
+                info["started_at"] = now
+            elif status in ("done", "cached", "failed"):
+                info["finished_at"] = now
+                if "started_at" in info:
+                    info["duration_s"] = round(now - info["started_at"], 3)
+            if status in ("done", "cached") and output is not None:
+                key = {
+                    "transcribe": "transcript",
+                    "summarize": "summary",
+                    "generate": "social_posts",
+                }.get(stage)
+                if key:
+                    self.result[key] = output
+                    self.emit(key, output)
+
+    def finish(self, error: Optional[str] = None):
+        with self._lock:
+            self.finished_at = time.time()
+            self.error = error
+            self.status = "failed" if error else "done"
+            if error:
+                self.emit("error", {"detail": error})
+            else:
+                self.emit("done", dict(self.result))
+            self._done.set()
+            self._changed.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "stages": {name: dict(info) for name, info in self.stages.items()},
+                "result": dict(self.result) or None,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "timings": list(self.timings),
+            }
+
+
+class JobManager:
+    """
+    Runs pipeline jobs on a bounded thread pool.
+    At most max_workers jobs run at once and at most max_queue wait for a slot;
+    anything beyond that is rejected with QueueFullError so callers can push back.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, retention_s: int = 3600):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention_s = retention_s
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._jobs: Dict[str, Job] = {}
+        self._external = 0  # slots held through slot()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args, stream: bool = False,
+               cleanup_paths: Sequence[str] = (), **kwargs) -> Job:
+        """
+        Queues fn(*args, on_stage=job.on_stage, **kwargs) and returns the Job.
+        fn's return value becomes the job result. With stream=True fn also gets
+        on_event=job.emit for fine-grained events such as LLM tokens.
+        cleanup_paths are files the job owns (e.g. an upload); they are deleted
+        once it has finished.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError("Job queue is full, try again later")
+
+        job = Job(kind)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+
+        if stream:
+            kwargs["on_event"] = job.emit
+
+        def run():
+            job.status = "running"
+            job.started_at = time.time()
+            job.emit("job", {"job_id": job.id, "status": job.status})
+            error = None
+            try:
+                with metrics.collect(job.timings):
+                    result = fn(*args, on_stage=job.on_stage, **kwargs)
+                with job._lock:
+                    job.result.update(result or {})
+            except Exception as e:
+                traceback.print_exc()
+                error = str(e)
+            finally:
+                self._slots.release()
+                for path in cleanup_paths:
+                    remove_file(path)
+                job.finish(error)
+
+        try:
+            self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+        return job
+
+    @contextmanager
+    def slot(self):
+        """
+        Holds one job slot while work that runs outside the pool (a batch item's
+        Whisper or summarizer stage) competes for the same CPU, so it counts
+        toward capacity and queue_depth. Waits for a free slot.
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._external += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._external -= 1
+            self._slots.release()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet finished (running + waiting), plus slots held through slot()."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.done) + self._external
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_s
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+metrics.Gauge("jobs_in_flight", "Jobs submitted but not yet finished (running + waiting)",
+              callback=lambda: get_job_manager().queue_depth())
+
+
+def get_job_manager():
+    """
+    Process-wide job manager, created on first use from config. With
+    QUEUE_BACKEND=redis jobs are handed to worker processes (see app.worker)
+    instead of running in this process.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            if config.QUEUE_BACKEND == "redis":
+                from app.services.redis_queue import RedisJobManager
+                _manager = RedisJobManager()
+            else:
+                _manager = JobManager(config.JOB_WORKERS, config.JOB_QUEUE_SIZE, config.JOB_RETENTION_S)
+        return _manager
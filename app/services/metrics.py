@@ -0,0 +1,288 @@
+import contextvars
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Minimal in-process metrics with Prometheus text exposition, so /metrics works
+# without extra dependencies. Stage code wraps its work in stage_timer(); the
+# same records optionally feed a per-request timing breakdown via collect().
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], le: Optional[str] = None) -> str:
+    pairs = list(zip(names, values))
+    if le is not None:
+        pairs.append(("le", le))
+    if not pairs:
+        return ""
+    return "{" + ",".join('%s="%s"' % (name, _escape(value)) for name, value in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], float]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_max(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = max(self._values.get(key, value), value)
+
+    def _samples(self):
+        if self._callback is not None:
+            try:
+                self.set(self._callback())
+            except Exception:
+                pass
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets=DURATION_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def _samples(self):
+        lines = []
+        with self._lock:
+            for key, data in self._values.items():
+                for bound, count in zip(self.buckets, data):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, str(bound))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, '+Inf')} {data[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {data[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {data[-1]}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+STAGE_DURATION = Histogram("pipeline_stage_duration_seconds", "Wall time per stage call", ("stage", "model"))
+STAGE_CPU = Counter("pipeline_stage_cpu_seconds_total", "CPU time of the calling thread per stage", ("stage", "model"))
+STAGE_CALLS = Counter("pipeline_stage_calls_total", "Stage calls by outcome", ("stage", "status"))
+STAGE_AUDIO = Counter("pipeline_stage_input_audio_seconds_total", "Seconds of audio processed", ("stage",))
+STAGE_TOKENS = Counter("pipeline_stage_input_tokens_total", "Input tokens processed", ("stage", "model"))
+STAGE_OUTPUT_TOKENS = Counter("pipeline_stage_output_tokens_total", "Output tokens generated", ("stage", "model"))
+STAGE_PEAK_RSS = Gauge("pipeline_stage_peak_rss_bytes", "Process peak RSS observed at the end of a stage", ("stage",))
+CACHE_REQUESTS = Counter("pipeline_cache_requests_total", "Result cache lookups", ("stage", "result"))
+COALESCED = Counter("pipeline_coalesced_total", "Stage runs that joined an identical in-flight run", ("stage",))
+FINGERPRINT_LOOKUPS = Counter("fingerprint_lookups_total", "Fingerprint index lookups by result", ("result",))
+WHISPER_RTF = Histogram("whisper_realtime_factor", "Transcription wall time / audio duration",
+                        ("model",), buckets=RTF_BUCKETS)
+SUMMARIZER_TPS = Histogram("summarizer_tokens_per_second", "Summarizer input tokens per second",
+                           ("model",), buckets=RATE_BUCKETS)
+OLLAMA_TPS = Histogram("ollama_tokens_per_second", "Ollama generated tokens per second",
+                       ("model",), buckets=RATE_BUCKETS)
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+PROCESS_PEAK_RSS = Gauge("process_peak_rss_bytes", "Peak resident set size of this process",
+                         callback=peak_rss_bytes)
+
+_collector: contextvars.ContextVar = contextvars.ContextVar("metrics_collector", default=None)
+# Called with (record, status) after every stage_timer, e.g. to learn model throughput
+_observers: List[Callable] = []
+
+
+class StageRecord:
+    """
+    Measurements for one stage call. Callers fill in input sizes (audio_seconds,
+    tokens, output_tokens) or an explicit tokens_per_s while the stage runs.
+    """
+
+    def __init__(self, stage: str, model: str = ""):
+        self.stage = stage
+        self.model = model
+        self.audio_seconds: Optional[float] = None
+        self.tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+        self.tokens_per_s: Optional[float] = None
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_rss_bytes = 0
+
+    def to_dict(self) -> Dict:
+        data = {
+            "stage": self.stage,
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "peak_rss_mb": round(self.peak_rss_bytes / 1024 ** 2, 1),
+        }
+        for name in ("model", "audio_seconds", "tokens", "output_tokens", "tokens_per_s"):
+            value = getattr(self, name)
+            if value:
+                data[name] = round(value, 3) if isinstance(value, float) else value
+        return data
+
+
+@contextmanager
+def stage_timer(stage: str, model: str = ""):
+    """Times a stage: wall time, CPU time of this thread, peak RSS, input sizes, throughput."""
+    record = StageRecord(stage, model)
+    start_wall = time.perf_counter()
+    start_cpu = time.thread_time()
+    status = "ok"
+    try:
+        yield record
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        record.wall_s = time.perf_counter() - start_wall
+        record.cpu_s = time.thread_time() - start_cpu
+        record.peak_rss_bytes = peak_rss_bytes()
+        _observe(record, status)
+
+
+def _observe(record: StageRecord, status: str):
+    stage, model = record.stage, record.model
+    STAGE_CALLS.inc(stage=stage, status=status)
+    STAGE_DURATION.observe(record.wall_s, stage=stage, model=model)
+    STAGE_CPU.inc(record.cpu_s, stage=stage, model=model)
+    STAGE_PEAK_RSS.set_max(record.peak_rss_bytes, stage=stage)
+    if record.audio_seconds:
+        STAGE_AUDIO.inc(record.audio_seconds, stage=stage)
+    if record.tokens:
+        STAGE_TOKENS.inc(record.tokens, stage=stage, model=model)
+    if record.output_tokens:
+        STAGE_OUTPUT_TOKENS.inc(record.output_tokens, stage=stage, model=model)
+
+    if status == "ok" and record.wall_s > 0:
+        if stage == "transcribe" and record.audio_seconds:
+            WHISPER_RTF.observe(record.wall_s / record.audio_seconds, model=model)
+        if stage == "summarize" and record.tokens:
+            record.tokens_per_s = record.tokens_per_s or record.tokens / record.wall_s
+            SUMMARIZER_TPS.observe(record.tokens_per_s, model=model)
+        if stage == "ollama_generate" and record.output_tokens:
+            record.tokens_per_s = record.tokens_per_s or record.output_tokens / record.wall_s
+            OLLAMA_TPS.observe(record.tokens_per_s, model=model)
+
+    for observer in _observers:
+        try:
+            observer(record, status)
+        except Exception:
+            pass
+
+    collected = _collector.get()
+    if collected is not None:
+        collected.append(record.to_dict())
+
+
+def add_observer(fn: Callable):
+    """Registers fn(record, status) to be called for every finished stage_timer."""
+    _observers.append(fn)
+
+
+def record_cache(stage: str, hit: bool):
+    CACHE_REQUESTS.inc(stage=stage, result="hit" if hit else "miss")
+    collected = _collector.get()
+    if collected is not None and hit:
+        collected.append({"stage": stage, "cache_hit": True})
+
+
+def record_fingerprint(result: str):
+    """result: "exact", "subrange" or "miss"."""
+    FINGERPRINT_LOOKUPS.inc(result=result)
+    collected = _collector.get()
+    if collected is not None and result != "miss":
+        collected.append({"stage": "transcribe", "fingerprint": result})
+
+
+def record_coalesced(stage: str):
+    COALESCED.inc(stage=stage)
+    collected = _collector.get()
+    if collected is not None:
+        collected.append({"stage": stage, "coalesced": True})
+
+
+@contextmanager
+def collect(records: Optional[List[Dict]] = None):
+    """
+    Appends the stage records produced in this thread (context) to records, or to
+    a new list, which is yielded. Used for per-request timing breakdowns.
+    """
+    records = [] if records is None else records
+    token = _collector.set(records)
+    try:
+        yield records
+    finally:
+        _collector.reset(token)
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
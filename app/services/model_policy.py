@@ -0,0 +1,185 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from app import config
+from app.services import metrics
+
+QUALITY_TIERS = ("low", "standard", "high")
+
+# Cold-start costs for a few-core CPU, replaced by measurements as runs complete:
+# Whisper wall seconds per audio second, summarizer wall seconds per 1k input tokens
+PRIORS = {
+    "whisper": {"tiny": 0.05, "base": 0.1, "small": 0.3, "medium": 0.8, "large": 1.6},
+    "summarizer": {"sshleifer/distilbart-cnn-6-6": 1.0, "sshleifer/distilbart-cnn-12-6": 1.6,
+                   "facebook/bart-large-cnn": 2.4},
+}
+_UNKNOWN_PRIOR = {"whisper": 1.0, "summarizer": 3.0}
+_ALPHA = 0.3  # weight of the newest run in the moving average
+# Shorter runs are dominated by fixed overhead and would skew the per-unit cost
+_MIN_SAMPLE = {"whisper": 10.0, "summarizer": 200}
+
+TOKENS_PER_AUDIO_S = 3.5  # ~150 spoken words a minute
+TOKENS_PER_WORD = 1.35
+
+COST = metrics.Gauge("model_policy_cost", "Learned cost per unit of input (s per audio s, s per 1k tokens)",
+                     ("kind", "model"))
+
+
+class Throughput:
+    """Moving average of each model's cost per unit of input, from its recent runs on this host."""
+
+    def __init__(self, alpha: float = _ALPHA):
+        self.alpha = alpha
+        self._cost: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind: str, model: str, cost: float):
+        key = (kind, model)
+        with self._lock:
+            previous = self._cost.get(key)
+            self._cost[key] = cost if previous is None else self.alpha * cost + (1 - self.alpha) * previous
+            COST.set(self._cost[key], kind=kind, model=model)
+
+    def cost(self, kind: str, model: str) -> float:
+        with self._lock:
+            learned = self._cost.get((kind, model))
+        if learned is not None:
+            return learned
+        return PRIORS[kind].get(model, _UNKNOWN_PRIOR[kind])
+
+
+_throughput = Throughput()
+
+
+def _learn(record: metrics.StageRecord, status: str):
+    if status != "ok" or record.wall_s <= 0 or not record.model:
+        return
+    if record.stage == "transcribe" and (record.audio_seconds or 0) >= _MIN_SAMPLE["whisper"]:
+        _throughput.observe("whisper", record.model, record.wall_s / record.audio_seconds)
+    elif record.stage == "summarize" and (record.tokens or 0) >= _MIN_SAMPLE["summarizer"]:
+        _throughput.observe("summarizer", record.model, record.wall_s / record.tokens * 1000)
+
+
+metrics.add_observer(_learn)
+
+
+def adaptive() -> bool:
+    return config.MODEL_POLICY == "adaptive"
+
+
+def fixed_models() -> Dict:
+    return {"policy": "fixed", "whisper": config.WHISPER_MODEL, "summarizer": config.SUMMARIZER_MODEL}
+
+
+def _tiers(kind: str) -> List[str]:
+    return config.WHISPER_TIERS if kind == "whisper" else config.SUMMARIZER_TIERS
+
+
+def _ceiling(kind: str, quality: str) -> int:
+    """Index of the largest tier a quality level may use."""
+    tiers = _tiers(kind)
+    if quality == "low":
+        return 0
+    if quality == "high":
+        return len(tiers) - 1
+    default = config.WHISPER_MODEL if kind == "whisper" else config.SUMMARIZER_MODEL
+    return tiers.index(default) if default in tiers else (len(tiers) - 1) // 2
+
+
+def load() -> Tuple[int, int]:
+    """(jobs running or waiting, jobs the deployment runs at once)."""
+    from app.services.jobs import get_job_manager
+
+    if config.MODEL_POLICY_CAPACITY:
+        capacity = config.MODEL_POLICY_CAPACITY
+    else:
+        capacity = config.WORKER_CONCURRENCY if config.QUEUE_BACKEND == "redis" else config.JOB_WORKERS
+    try:
+        depth = get_job_manager().queue_depth()
+    except Exception:
+        depth = 0  # e.g. Redis unreachable; plan as if idle
+    return depth, max(1, capacity)
+
+
+def _slowdown(depth: int, capacity: int) -> float:
+    # Every job waiting beyond capacity waits on the running ones, so their time counts extra
+    return 1 + max(0, depth - capacity) / capacity
+
+
+def _summary_tokens(tokens: float, summary_mode: Optional[str]) -> float:
+    from app.services.summarizer import mode_budget
+
+    budget = mode_budget(summary_mode or config.SUMMARY_MODE)
+    return min(tokens, budget) if budget is not None else tokens
+
+
+def plan(duration_s: Optional[float], budget_s: Optional[float] = None, quality: Optional[str] = None,
+         summary_mode: Optional[str] = None) -> Dict:
+    """
+    Picks the Whisper and summarizer tiers for duration_s of audio. Both are the
+    largest (under quality's ceiling) whose predicted time, scaled by the queue's
+    backlog, fits budget_s. Returns what was chosen and why, for the response;
+    when nothing fits, the smallest tiers run and within_target is False.
+
+    Without a budget the target is what the ceiling tiers take on an idle system,
+    so an idle system runs them and a backlog steps down to smaller tiers. A
+    request with a budget and no quality may use up to the largest tiers.
+    """
+    if not adaptive() or not duration_s:
+        return fixed_models()
+    if quality is None:
+        quality = "high" if budget_s is not None else "standard"
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality {quality!r}, expected one of {', '.join(QUALITY_TIERS)}")
+    whisper_tiers, summarizer_tiers = _tiers("whisper"), _tiers("summarizer")
+    whisper_max, summarizer_max = _ceiling("whisper", quality), _ceiling("summarizer", quality)
+    tokens = _summary_tokens(duration_s * TOKENS_PER_AUDIO_S, summary_mode)
+
+    def predict(w: int, s: int) -> float:
+        return (duration_s * _throughput.cost("whisper", whisper_tiers[w])
+                + tokens / 1000 * _throughput.cost("summarizer", summarizer_tiers[s]))
+
+    depth, capacity = load()
+    slowdown = _slowdown(depth, capacity)
+    target = budget_s if budget_s is not None else predict(whisper_max, summarizer_max)
+    candidates = [(w, s) for w in range(whisper_max + 1) for s in range(summarizer_max + 1)]
+    fitting = [c for c in candidates if predict(*c) * slowdown <= target]
+    if fitting:
+        # Best quality on a 0..1 scale per model; ties go to the larger Whisper, whose errors carry into the summary
+        w, s = max(fitting, key=lambda c: (c[0] / max(1, len(whisper_tiers) - 1)
+                                           + c[1] / max(1, len(summarizer_tiers) - 1), c[0]))
+    else:
+        w, s = 0, 0
+    return {
+        "policy": "adaptive",
+        "whisper": whisper_tiers[w],
+        "summarizer": summarizer_tiers[s],
+        "quality": quality,
+        "target_s": round(target, 2),
+        "predicted_s": round(predict(w, s) * slowdown, 2),
+        "within_target": bool(fitting),
+        "queue_depth": depth,
+        "capacity": capacity,
+        "audio_seconds": round(duration_s, 2),
+    }
+
+
+def replan_summarizer(models: Dict, transcript: str, budget_s: Optional[float] = None,
+                      summary_mode: Optional[str] = None) -> Dict:
+    """
+    Re-picks the summarizer once the transcript exists: its real length replaces
+    the estimate, and budget_s is what is left of the request's budget. Without
+    a budget the planned tier stands.
+    """
+    if models.get("policy") != "adaptive" or budget_s is None:
+        return models
+    tiers = _tiers("summarizer")
+    tokens = _summary_tokens(len(transcript.split()) * TOKENS_PER_WORD, summary_mode)
+    slowdown = _slowdown(*load())
+    ceiling = _ceiling("summarizer", models["quality"])
+    for s in range(ceiling, -1, -1):
+        predicted = tokens / 1000 * _throughput.cost("summarizer", tiers[s]) * slowdown
+        if predicted <= budget_s or s == 0:
+            return {**models, "summarizer": tiers[s], "summarizer_predicted_s": round(predicted, 2),
+                    "within_target": models["within_target"] and predicted <= budget_s}
+    return models
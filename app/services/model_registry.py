@@ -0,0 +1,215 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app import config
+
+# Models are loaded on first use rather than at import time, so importing the API,
+# the DAG files or the job code doesn't drag in torch. Each model is loaded once per
+# process and shared; inference_lock() serialises calls on a shared instance.
+# With MODEL_MEMORY_BUDGET_MB set, models are kept resident in LRU order and the
+# least recently used idle ones are unloaded when a load would exceed the budget.
+
+_models: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+_sizes: Dict[Tuple[str, str], int] = {}  # bytes, remembered across unloads
+_load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_inference_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _locks_for(key: Tuple[str, str]):
+    with _registry_lock:
+        if key not in _load_locks:
+            _load_locks[key] = threading.Lock()
+            _inference_locks[key] = threading.Lock()
+        return _load_locks[key], _inference_locks[key]
+
+
+def _model_bytes(model) -> int:
+    module = getattr(model, "model", model)  # transformers pipelines wrap the module
+    try:
+        tensors = list(module.parameters()) + list(module.buffers())
+    except AttributeError:
+        return 0
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _evict_for(key: Tuple[str, str], needed: int):
+    """Unloads least recently used idle models until needed more bytes fit the budget."""
+    budget = config.MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+    if not budget:
+        return
+    evicted = False
+    with _registry_lock:
+        resident = sum(_sizes.get(k, 0) for k in _models if k != key)
+        for other in list(_models):
+            if resident + needed <= budget:
+                break
+            if other == key or _inference_locks[other].locked():
+                continue  # in use; callers hold their own reference anyway
+            del _models[other]
+            resident -= _sizes.get(other, 0)
+            evicted = True
+            print(f"♻️ Unloaded {other[0]} model '{other[1]}' to stay within the memory budget")
+    if not evicted:
+        return
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+def _get(kind: str, name: str, loader):
+    key = (kind, name)
+    with _registry_lock:
+        model = _models.get(key)
+        if model is not None:
+            _models.move_to_end(key)
+            return model
+    load_lock, _ = _locks_for(key)
+    with load_lock:
+        model = _models.get(key)
+        if model is None:
+            # Size from an earlier load, if any, so room is made before loading again
+            _evict_for(key, _sizes.get(key, 0))
+            start = time.perf_counter()
+            model = loader(name)
+            _sizes[key] = _model_bytes(model)
+            with _registry_lock:
+                _models[key] = model
+            print(f"📦 Loaded {kind} model '{name}' in {time.perf_counter() - start:.1f}s "
+                  f"({_sizes[key] / 1024 ** 2:.0f} MiB)")
+            _evict_for(key, _sizes[key])
+    return model
+
+
+_torch_configured = False
+
+
+def cpu_fast() -> bool:
+    return config.INFERENCE_MODE == "cpu-fast"
+
+
+def configure_torch(threads: Optional[int] = None):
+    """
+    Applies the torch thread settings once per process, before the first model
+    loads. threads overrides TORCH_THREADS (e.g. a pool worker's share of cores).
+    In cpu-fast mode the defaults split the cores between the JOB_WORKERS jobs
+    that can run inference at once, instead of every call using all of them.
+    """
+    global _torch_configured
+    with _registry_lock:
+        if _torch_configured:
+            return
+        _torch_configured = True
+    import torch
+
+    intra = threads or config.TORCH_THREADS
+    interop = config.TORCH_INTEROP_THREADS
+    if cpu_fast():
+        intra = intra or max(1, (os.cpu_count() or 1) // max(1, config.JOB_WORKERS))
+        interop = interop or 1
+    if intra:
+        torch.set_num_threads(intra)
+    if interop:
+        try:
+            torch.set_num_interop_threads(interop)
+        except RuntimeError:
+            # Only possible before any inter-op work has started in this process
+            print("⚠️ Could not set torch inter-op threads; parallel work already started")
+
+
+def _quantize(model, linear_types: Tuple[type, ...] = ()):
+    """
+    int8 dynamic quantization of the Linear layers (weights int8, activations
+    quantized on the fly). quantize_dynamic matches exact module types, so
+    Linear subclasses in linear_types are turned into plain Linear layers first;
+    they must not change what forward computes in float32.
+    """
+    import torch
+    for module in model.modules():
+        if isinstance(module, linear_types):
+            module.__class__ = torch.nn.Linear
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if not any(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in quantized.modules()):
+        raise RuntimeError(f"int8 quantization replaced no Linear layers of {type(model).__name__}")
+    return quantized
+
+
+def _load_whisper(name: str):
+    import whisper
+    configure_torch()
+    if cpu_fast():
+        # Quantized kernels are CPU only. whisper.model.Linear only casts the
+        # weights to the input's dtype, a no-op for a float32 CPU model.
+        return _quantize(whisper.load_model(name, device="cpu"), (whisper.model.Linear,))
+    return whisper.load_model(name, device=config.WHISPER_DEVICE)
+
+
+def _load_summarizer(name: str):
+    from transformers import pipeline
+    configure_torch()
+    if cpu_fast():
+        summarizer = pipeline("summarization", model=name, device="cpu")
+        summarizer.model = _quantize(summarizer.model)
+        return summarizer
+    return pipeline("summarization", model=name, device=config.SUMMARIZER_DEVICE)
+
+
+def get_whisper_model(name: Optional[str] = None):
+    return _get("whisper", name or config.WHISPER_MODEL, _load_whisper)
+
+
+def get_summarizer(name: Optional[str] = None):
+    return _get("summarizer", name or config.SUMMARIZER_MODEL, _load_summarizer)
+
+
+def remote_inference() -> bool:
+    return config.INFERENCE_BACKEND == "server"
+
+
+def _load_tokenizer(name: str):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(name)
+
+
+def get_tokenizer(name: Optional[str] = None):
+    """
+    The summarizer's tokenizer (for chunking). With the inference server only the
+    tokenizer is loaded here, not the model.
+    """
+    name = name or config.SUMMARIZER_MODEL
+    if remote_inference():
+        return _get("tokenizer", name, _load_tokenizer)
+    return get_summarizer(name).tokenizer
+
+
+def inference_lock(kind: str, name: str) -> threading.Lock:
+    """Lock to hold while running inference on the shared (kind, name) model."""
+    return _locks_for((kind, name))[1]
+
+
+def loaded_models():
+    return sorted(f"{kind}:{name}" for kind, name in _models)
+
+
+def residency() -> List[Dict]:
+    """Resident models, least recently used first, with their size."""
+    with _registry_lock:
+        return [{"kind": kind, "name": name, "mb": round(_sizes.get((kind, name), 0) / 1024 ** 2, 1)}
+                for kind, name in _models]
+
+
+def warmup():
+    """Loads the configured models up front, e.g. from the app startup hook."""
+    if remote_inference():
+        get_tokenizer()
+        return
+    get_whisper_model()
+    get_summarizer()
@@ -0,0 +1,245 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app import config
+from app.services import metrics
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Ollama while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures and rejects calls for
+    reset_timeout_s. After that a single trial call is let through (half-open);
+    success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout_s or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class _BreakerStream:
+    """
+    A streamed response that reports to the circuit breaker when the caller is
+    done with it rather than when the headers arrive: an exception while the
+    body is read (a cut connection, a malformed chunk) counts as a failure,
+    anything else as a success. Use it as a context manager.
+    """
+
+    def __init__(self, response: requests.Response, breaker: CircuitBreaker):
+        self._response = response
+        self._breaker = breaker
+        self._recorded = False
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(failed=exc_type is not None and issubclass(exc_type, Exception))
+
+    def close(self, failed: bool = False):
+        if not self._recorded:
+            self._recorded = True
+            if failed:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+        self._response.close()
+
+
+class OllamaClient:
+    """
+    Thin Ollama HTTP client shared across requests: one keep-alive connection
+    pool, a model-availability check cached for health_ttl_s, a circuit breaker
+    and retries with jittered exponential backoff.
+    """
+
+    def __init__(self, base_url: str, model: str,
+                 pool_size: int = 10,
+                 timeout_s: float = 120,
+                 health_ttl_s: float = 60,
+                 max_retries: int = 3,
+                 backoff_base_s: float = 0.5,
+                 backoff_max_s: float = 8,
+                 failure_threshold: int = 3,
+                 reset_timeout_s: float = 30):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout_s = timeout_s
+        self.health_ttl_s = health_ttl_s
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_s)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._health: Optional[bool] = None
+        self._health_checked_at = 0.0
+        self._health_lock = threading.Lock()
+
+    def is_available(self, force: bool = False) -> bool:
+        """True if Ollama answers and has self.model; cached for health_ttl_s (10s if False)."""
+        with self._health_lock:
+            # Re-check a negative result sooner so recovery is noticed quickly
+            ttl = self.health_ttl_s if self._health else min(self.health_ttl_s, 10)
+            fresh = time.monotonic() - self._health_checked_at < ttl
+            if self._health is not None and fresh and not force:
+                return self._health
+            self._health = self._check_model()
+            self._health_checked_at = time.monotonic()
+            return self._health
+
+    def _check_model(self) -> bool:
+        if not self.breaker.allow():
+            return False
+        try:
+            response = self.session.get(f"{self.base_url}/api/tags", timeout=10)
+            response.raise_for_status()
+            names = [m.get("name", "") for m in response.json().get("models", [])]
+        except Exception as e:
+            print(f"❌ Ollama connection failed: {e}")
+            self.breaker.record_failure()
+            return False
+        self.breaker.record_success()
+        if not any(self.model in name for name in names):
+            print(f"❌ Model '{self.model}' not found in available models: {names}")
+            return False
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from concurrent callers apart
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+
+    def post(self, path: str, payload: Dict, stream: bool = False) -> requests.Response:
+        """
+        POSTs to Ollama with retries on request errors (connection, timeout, broken
+        response, ...) and 5xx; at least one attempt is made even with max_retries=0.
+        Raises CircuitOpenError without touching the network while the circuit is open.
+        With stream=True the response must be used as a context manager; the
+        breaker learns the outcome when the block exits (see _BreakerStream).
+        """
+        last_error: Optional[Exception] = None
+        attempts = max(1, self.max_retries)
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Ollama circuit is open ({last_error or 'recent failures'})")
+            try:
+                response = self.session.post(f"{self.base_url}{path}", json=payload,
+                                             timeout=self.timeout_s, stream=stream)
+                if response.status_code >= 500:
+                    raise requests.HTTPError(f"{response.status_code} from Ollama: {response.text[:200]}",
+                                             response=response)
+                response.raise_for_status()
+                if stream:
+                    # The headers alone don't show the model works; judge once the body is read
+                    return _BreakerStream(response, self.breaker)
+                self.breaker.record_success()
+                return response
+            except requests.RequestException as e:
+                last_error = e
+                if isinstance(e, requests.HTTPError) and e.response is not None \
+                        and e.response.status_code < 500:
+                    # Ollama is up but rejected the request; retrying won't help
+                    self.breaker.record_success()
+                    break
+                self.breaker.record_failure()
+                if attempt == attempts - 1:
+                    break
+                delay = self._backoff(attempt)
+                print(f"⚠️ Ollama request failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            except Exception:
+                # Anything else still ends a half-open trial, or the breaker would never close
+                self.breaker.record_failure()
+                raise
+        raise last_error
+
+    def generate(self, prompt: str, options: Optional[Dict] = None, **extra) -> Dict:
+        """Non-streaming /api/generate call; returns the decoded JSON body."""
+        payload = {"model": self.model, "prompt": prompt, "stream": False, **extra}
+        if options:
+            payload["options"] = options
+        with metrics.stage_timer("ollama_generate", self.model) as timing:
+            body = self.post("/api/generate", payload).json()
+            record_usage(timing, body)
+        return body
+
+
+def record_usage(timing: metrics.StageRecord, body: Dict):
+    """Copies Ollama's token counts from a (final) /api/generate response into timing."""
+    timing.tokens = body.get("prompt_eval_count")
+    timing.output_tokens = body.get("eval_count")
+    # eval_duration (ns) excludes model load and prompt processing
+    if body.get("eval_count") and body.get("eval_duration"):
+        timing.tokens_per_s = body["eval_count"] / (body["eval_duration"] / 1e9)
+
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_ollama_client() -> OllamaClient:
+    """Process-wide client so the connection pool and health state are shared."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient(
+                config.OLLAMA_URL, config.OLLAMA_MODEL,
+                pool_size=config.OLLAMA_POOL_SIZE,
+                timeout_s=config.OLLAMA_TIMEOUT_S,
+                health_ttl_s=config.OLLAMA_HEALTH_TTL_S,
+                max_retries=config.OLLAMA_MAX_RETRIES,
+                failure_threshold=config.OLLAMA_FAILURE_THRESHOLD,
+                reset_timeout_s=config.OLLAMA_RESET_TIMEOUT_S,
+            )
+        return _client
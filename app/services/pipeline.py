@@ -0,0 +1,309 @@
+import json
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+
+from app import config
+from app.services import downloader, transcriber, summarizer, generator, metrics, fingerprint, model_policy
+from app.services.artifacts import get_audio_store
+from app.services.cache import get_cache, make_key, sha256_file, sha256_text
+from app.services.model_registry import cpu_fast
+from app.services.singleflight import SingleFlight
+from app.services.transcript_store import get_transcript_store
+from app.utils.helpers import clip_id, extract_video_id
+
+STAGES = ("download", "transcribe", "summarize", "generate")
+
+# on_stage(stage, status, output) is called with status "running", "done",
+# "cached", "skipped" or "failed" so callers can track progress.
+StageCallback = Callable[[str, str, Optional[object]], None]
+# on_event(event, data) receives streaming events: "token" and "partial" posts
+EventCallback = Callable[[str, object], None]
+
+# Concurrent runs of a stage with the same cache key share one computation
+_in_flight = SingleFlight()
+
+
+def _noop(stage, status, output=None):
+    pass
+
+
+def _params_hash(params: Dict) -> str:
+    return sha256_text(json.dumps(params, sort_keys=True))[:16]
+
+
+def whisper_model_id(model_name: Optional[str] = None) -> str:
+    # Quantized models give (slightly) different output, so they get their own cache entries
+    return (model_name or config.WHISPER_MODEL) + (":int8" if cpu_fast() else "")
+
+
+def _transcribe_file(path: str, source: str, model_name: Optional[str] = None) -> Dict:
+    index = fingerprint.get_fingerprint_index()
+    if index is None:
+        if config.AUDIO_DECODE_MODE == "wav":
+            return transcriber.transcribe_segments(path, model_name)
+        return transcriber.transcribe_segments(downloader.decode_audio(path, use_mmap=config.AUDIO_DECODE_MMAP),
+                                               model_name)
+
+    # Audio already transcribed under another ID (a re-upload, another URL of the
+    # same video, a section of a stored video) reuses that transcript
+    audio = downloader.decode_audio(path, use_mmap=config.AUDIO_DECODE_MMAP)
+    duration_s = len(audio) / downloader.SAMPLE_RATE
+    with metrics.stage_timer("fingerprint") as timing:
+        timing.audio_seconds = duration_s
+        prints = fingerprint.fingerprint(audio)
+        match = index.match(prints, duration_s)
+        reused = fingerprint.reuse_transcript(match, duration_s, whisper_model_id(model_name)) if match else None
+    metrics.record_fingerprint(match["kind"] if reused else "miss")
+    if reused is not None:
+        return reused
+    transcript = transcriber.transcribe_segments(audio, model_name)
+    index.add(source, prints, duration_s)
+    return transcript
+
+
+def run_stage(name: str, key: str, fn: Callable, *args,
+              on_stage: Optional[StageCallback] = None,
+              path_of: Optional[Callable] = None,
+              cacheable: Optional[Callable] = None,
+              lookup: Optional[Callable] = None):
+    """
+    Runs one stage through the result cache: returns the cached output for key if
+    there is one, otherwise computes fn(*args) and stores it.
+    If the same key is already being computed (e.g. many requests for one viral
+    video, or the same upload), this call waits for that computation and shares
+    its output instead of starting another one, unless COALESCE_ENABLED is off.
+    path_of(output) names a file owned by the cache entry; cacheable(output) can
+    veto storing a result. A stage with its own store passes lookup(), which
+    replaces the result cache: it returns the stored output or None, and fn is
+    expected to store what it computes.
+    """
+    on_stage = on_stage or _noop
+    cache = get_cache() if lookup is None else None
+    if cache is not None:
+        lookup = lambda: cache.get(key)  # noqa: E731
+    on_stage(name, "running", None)
+    if lookup is not None:
+        cached = lookup()
+        metrics.record_cache(name, cached is not None)
+        if cached is not None:
+            on_stage(name, "cached", cached)
+            return cached
+
+    def compute():
+        output = fn(*args)
+        if cache is not None and (cacheable is None or cacheable(output)):
+            cache.set(key, output, path=path_of(output) if path_of else None)
+        return output
+
+    try:
+        output, shared = _in_flight.do(key, compute) if config.COALESCE_ENABLED else (compute(), False)
+    except Exception:
+        on_stage(name, "failed", None)
+        raise
+    if shared:
+        metrics.record_coalesced(name)
+    on_stage(name, "done", output)
+    return output
+
+
+def download_stage(url: str, on_stage: Optional[StageCallback] = None,
+                   start_s: Optional[float] = None, end_s: Optional[float] = None) -> Tuple[str, str]:
+    """
+    Downloads a video's audio, or only its start_s-end_s section; returns
+    (audio_path, source) where source keys later stages (see clip_id).
+    """
+    source = clip_id(extract_video_id(url), start_s, end_s)
+    # In memory mode only the compressed container is kept on disk and it is
+    # decoded in-process when (and only if) transcription actually runs.
+    download = (downloader.download_youtube_audio if config.AUDIO_DECODE_MODE == "wav"
+                else downloader.fetch_youtube_audio)
+    store = get_audio_store()
+    if store is not None:
+        # The audio store keeps one compressed file per video and is this stage's cache
+        def fetch(url):
+            path = download(url, download_dir=store.staging_dir(), name=uuid.uuid4().hex,
+                            start_s=start_s, end_s=end_s)
+            return store.put(source, path, url=url)
+
+        audio_path = run_stage("download", make_key("download", source), fetch, url,
+                               on_stage=on_stage, lookup=lambda: store.get(source))
+        return audio_path, source
+
+    audio_path = run_stage("download",
+                           make_key("download", source, config.AUDIO_DECODE_MODE, downloader.audio_format()),
+                           lambda url: download(url, start_s=start_s, end_s=end_s), url,
+                           on_stage=on_stage, path_of=lambda path: path)
+    return audio_path, source
+
+
+def file_source(audio_path: str) -> str:
+    return "sha256:" + sha256_file(audio_path)
+
+
+def transcribe_stage(audio_path: str, source: str, on_stage: Optional[StageCallback] = None,
+                     model_name: Optional[str] = None) -> Dict:
+    """Returns {"text", "segments"}; on_stage callbacks receive just the text."""
+    on_stage = on_stage or _noop
+
+    def report(stage, status, output=None):
+        on_stage(stage, status, output["text"] if isinstance(output, dict) else output)
+
+    return run_stage(
+        "transcribe",
+        make_key("transcribe", source, whisper_model_id(model_name), "segments"),
+        _transcribe_file, audio_path, source, model_name,
+        on_stage=report,
+    )
+
+
+def summarize_stage(transcript: str, on_stage: Optional[StageCallback] = None,
+                    summary_mode: Optional[str] = None, model_name: Optional[str] = None) -> str:
+    summary_mode = summary_mode or config.SUMMARY_MODE
+    model_name = model_name or config.SUMMARIZER_MODEL
+    return run_stage(
+        "summarize",
+        make_key("summarize", sha256_text(transcript), model_name,
+                 _params_hash(summarizer.cache_params(summary_mode))),
+        lambda text: summarizer.summarize_text(text, model_name=model_name, mode=summary_mode), transcript,
+        on_stage=on_stage,
+    )
+
+
+def generate_key(summary: str) -> str:
+    return make_key("generate", sha256_text(summary), sha256_text(generator.prompt_version())[:16],
+                    generator.OLLAMA_MODEL, _params_hash(generator.cache_params()))
+
+
+def generate_stage(summary: str,
+                   on_stage: Optional[StageCallback] = None,
+                   on_event: Optional[EventCallback] = None) -> Dict:
+    """
+    Generates the social posts. When on_event is given, posts are generated in
+    Ollama's streaming mode and tokens are forwarded as they arrive.
+    """
+    def generate(summary):
+        if on_event is None:
+            return generator.generate_social_posts(summary)
+        posts = None
+        for event, data in generator.stream_social_posts(summary):
+            if event == "posts":
+                posts = data
+            else:
+                on_event(event, data)
+        return posts
+
+    return run_stage(
+        "generate",
+        generate_key(summary),
+        generate, summary,
+        on_stage=on_stage,
+        # Fallback or missing posts mean Ollama failed; don't pin them in the cache
+        cacheable=lambda posts: not generator.missing_posts(posts),
+    )
+
+
+def replace_posts(source: str, summary: str, social_posts: Dict) -> bool:
+    """
+    Saves edited posts (e.g. one regenerated platform) for source, and in the
+    generate stage's cache entry for summary so that reprocessing the video
+    returns them instead of the posts they replaced. Posts with a platform
+    still missing are not cached. False if the video is not stored.
+    """
+    store = get_transcript_store()
+    if store is None or not store.update_posts(source, social_posts):
+        return False
+    cache = get_cache()
+    if cache is not None and not generator.missing_posts(social_posts):
+        cache.set(generate_key(summary), social_posts)
+    return True
+
+
+def shift_segments(transcript: Dict, offset_s: float) -> Dict:
+    """Transcript of a clip with segment times moved onto the full video's timeline."""
+    if not offset_s:
+        return transcript
+    segments = [{**seg, "start": seg["start"] + offset_s, "end": seg["end"] + offset_s}
+                for seg in transcript.get("segments", [])]
+    return {**transcript, "segments": segments}
+
+
+def save_result(source: str, transcript: Dict, summary: str, social_posts: Dict,
+                url: Optional[str] = None, title: Optional[str] = None, models: Optional[Dict] = None):
+    """
+    Persists a finished result in the transcript store; failures are logged, not raised.
+    models ({"whisper", "summarizer"}) records which models ran, if not the configured ones.
+    Fallback posts are not stored; a platform whose post failed is stored as "".
+    """
+    store = get_transcript_store()
+    if store is None:
+        return
+    if social_posts == generator.get_fallback_posts():
+        social_posts = None
+    try:
+        # Recorded like the transcribe cache key, so fingerprint reuse tells int8 transcripts apart
+        store.save(source, transcript, summary, social_posts, url=url, title=title,
+                   whisper_model=whisper_model_id((models or {}).get("whisper")),
+                   summarizer_model=(models or {}).get("summarizer"))
+    except Exception:
+        traceback.print_exc()
+
+
+def run_pipeline(url: Optional[str] = None,
+                 audio_path: Optional[str] = None,
+                 on_stage: Optional[StageCallback] = None,
+                 on_event: Optional[EventCallback] = None,
+                 title: Optional[str] = None,
+                 summary_mode: Optional[str] = None,
+                 start_s: Optional[float] = None,
+                 end_s: Optional[float] = None,
+                 max_latency_s: Optional[float] = None,
+                 quality: Optional[str] = None) -> Dict:
+    """
+    Runs download -> transcribe -> summarize -> generate for a YouTube URL,
+    or the last three stages for an already available audio file.
+
+    Every stage output is cached under a key derived from its inputs, so a
+    repeated (or partially repeated) request skips the stages it can. The
+    result is also saved to the transcript store under the video ID.
+    summary_mode ("fast", "balanced", "full") trades summary detail for speed
+    on long transcripts; see summarizer.summarize_text. start_s/end_s (seconds)
+    limit a URL's processing to that section of the video.
+    With MODEL_POLICY=adaptive the Whisper and summarizer tiers are picked per
+    request to meet max_latency_s (seconds, including the download) or the
+    quality tier ("low", "standard", "high"); see model_policy.plan.
+    """
+    if not url and not audio_path:
+        raise ValueError("Either url or audio_path is required")
+    on_stage = on_stage or _noop
+    started = time.perf_counter()
+
+    def remaining():
+        return max(0.0, max_latency_s - (time.perf_counter() - started)) if max_latency_s is not None else None
+
+    offset_s = 0
+    if audio_path is None:
+        audio_path, source = download_stage(url, on_stage, start_s, end_s)
+        offset_s = start_s or 0
+    else:
+        source = file_source(audio_path)
+        on_stage("download", "skipped", None)
+
+    models = model_policy.fixed_models()
+    if model_policy.adaptive():
+        models = model_policy.plan(downloader.probe_duration(audio_path), remaining(), quality, summary_mode)
+    transcript = transcribe_stage(audio_path, source, on_stage, models["whisper"])
+    models = model_policy.replan_summarizer(models, transcript["text"], remaining(), summary_mode)
+    summary = summarize_stage(transcript["text"], on_stage, summary_mode, models["summarizer"])
+    social_posts = generate_stage(summary, on_stage, on_event)
+    save_result(source, shift_segments(transcript, offset_s), summary, social_posts, url=url, title=title,
+                models=models)
+
+    return {
+        "video_id": source,
+        "transcript": transcript["text"],
+        "summary": summary,
+        "social_posts": social_posts,
+        "models": models,
+    }
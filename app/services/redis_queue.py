@@ -0,0 +1,302 @@
+import importlib
+import json
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import redis
+
+from app import config
+from app.services.jobs import Job, QueueFullError
+
+# Claims the oldest pending job: pops it and leases it until ARGV[1] in one step,
+# so a job can never be popped without a lease (and lost if the worker dies).
+_CLAIM = """
+local id = redis.call('RPOP', KEYS[1])
+if not id then return false end
+redis.call('ZADD', KEYS[2], ARGV[1], id)
+redis.call('HINCRBY', ARGV[2] .. id, 'attempts', 1)
+return id
+"""
+
+# Returns jobs whose lease expired (their worker died or hung) to the queue,
+# or moves them to the dead-letter list once they used up their attempts; like a
+# finished job, a dead one's hash and events then expire after ARGV[5] seconds.
+# Replies with a flat list of id, "retry"|"dead" pairs.
+_REAP = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+local out = {}
+for _, id in ipairs(expired) do
+  redis.call('ZREM', KEYS[2], id)
+  local attempts = tonumber(redis.call('HGET', ARGV[3] .. id, 'attempts') or '0')
+  if attempts >= tonumber(ARGV[2]) then
+    redis.call('LPUSH', KEYS[3], id)
+    redis.call('EXPIRE', ARGV[3] .. id, ARGV[5])
+    redis.call('EXPIRE', ARGV[4] .. id, ARGV[5])
+    table.insert(out, id)
+    table.insert(out, 'dead')
+  else
+    redis.call('LPUSH', KEYS[1], id)
+    table.insert(out, id)
+    table.insert(out, 'retry')
+  end
+end
+return out
+"""
+
+
+def task_name(fn: Callable) -> str:
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+def resolve_task(name: str) -> Callable:
+    """Looks up a task by task_name(); only functions of this package can be run."""
+    module_name, _, qualname = name.partition(":")
+    if not (module_name == "app" or module_name.startswith("app.")):
+        raise ValueError(f"Refusing to run task outside the app package: {name}")
+    target = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        target = getattr(target, attr)
+    return target
+
+
+class RedisJobQueue:
+    """
+    Reliable job queue on Redis, shared by the API (producer) and any number of
+    worker processes (consumers).
+
+    A claimed job is leased for visibility_timeout_s; the worker renews the lease
+    while it runs. If the worker dies the lease expires and reap() puts the job
+    back, so it runs again elsewhere. Failed jobs are retried until max_attempts,
+    then moved to the dead-letter list. Job state and its event log live in Redis
+    so the API can answer status and SSE requests for jobs running on other hosts.
+
+    Keys (prefix P): P:pending (list), P:leases (zset id -> lease deadline),
+    P:dead (list), P:job:<id> (hash), P:events:<id> (list of JSON events).
+    """
+
+    def __init__(self, client: "redis.Redis", prefix: str, visibility_timeout_s: int,
+                 max_attempts: int, max_pending: int, retention_s: int):
+        self.client = client
+        self.prefix = prefix
+        self.visibility_timeout_s = visibility_timeout_s
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+        self.retention_s = retention_s
+        self.pending_key = f"{prefix}:pending"
+        self.leases_key = f"{prefix}:leases"
+        self.dead_key = f"{prefix}:dead"
+        self._claim = client.register_script(_CLAIM)
+        self._reap = client.register_script(_REAP)
+
+    def job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def events_key(self, job_id: str) -> str:
+        return f"{self.prefix}:events:{job_id}"
+
+    # Producer side
+
+    def enqueue(self, kind: str, fn: Callable, args: Sequence, kwargs: Dict,
+                stream: bool = False, cleanup_paths: Sequence[str] = ()) -> str:
+        if self.client.llen(self.pending_key) >= self.max_pending:
+            raise QueueFullError("Job queue is full, try again later")
+        job = Job(kind)  # only for a fresh id and the initial state
+        state = job.to_dict()
+        pipe = self.client.pipeline()
+        pipe.hset(self.job_key(job.id), mapping={
+            "kind": kind,
+            "task": task_name(fn),
+            "args": json.dumps(list(args)),
+            "kwargs": json.dumps(kwargs),
+            "stream": int(stream),
+            "cleanup_paths": json.dumps(list(cleanup_paths)),
+            "attempts": 0,
+            "state": json.dumps(state),
+        })
+        pipe.rpush(self.events_key(job.id), json.dumps({"event": "job", "data": {"job_id": job.id,
+                                                                                 "status": "queued"}}))
+        pipe.lpush(self.pending_key, job.id)
+        pipe.execute()
+        return job.id
+
+    def state(self, job_id: str) -> Optional[Dict]:
+        raw = self.client.hget(self.job_key(job_id), "state")
+        return json.loads(raw) if raw else None
+
+    def events(self, job_id: str, start: int) -> List[Dict]:
+        return [json.loads(e) for e in self.client.lrange(self.events_key(job_id), start, -1)]
+
+    def depth(self) -> int:
+        """Jobs waiting plus jobs currently leased by a worker."""
+        pipe = self.client.pipeline()
+        pipe.llen(self.pending_key)
+        pipe.zcard(self.leases_key)
+        return sum(pipe.execute())
+
+    # Consumer side
+
+    def claim(self) -> Optional[str]:
+        job_id = self._claim(keys=[self.pending_key, self.leases_key],
+                             args=[time.time() + self.visibility_timeout_s, f"{self.prefix}:job:"])
+        return job_id.decode() if isinstance(job_id, bytes) else job_id
+
+    def load(self, job_id: str) -> Dict:
+        raw = {k.decode(): v.decode() for k, v in self.client.hgetall(self.job_key(job_id)).items()}
+        return {
+            "kind": raw["kind"],
+            "task": raw["task"],
+            "args": json.loads(raw["args"]),
+            "kwargs": json.loads(raw["kwargs"]),
+            "stream": raw["stream"] == "1",
+            "cleanup_paths": json.loads(raw["cleanup_paths"]),
+            "attempts": int(raw["attempts"]),
+        }
+
+    def extend(self, job_id: str) -> bool:
+        """Renews the lease; False if it was lost (expired and reaped)."""
+        return bool(self.client.zadd(self.leases_key, {job_id: time.time() + self.visibility_timeout_s},
+                                     xx=True, ch=True))
+
+    def push_event(self, job_id: str, event: str, data=None):
+        self.client.rpush(self.events_key(job_id), json.dumps({"event": event, "data": data}))
+
+    def save_state(self, job_id: str, state: Dict):
+        self.client.hset(self.job_key(job_id), "state", json.dumps(state))
+
+    def complete(self, job_id: str):
+        pipe = self.client.pipeline()
+        pipe.zrem(self.leases_key, job_id)
+        # If the lease had expired and the job was put back meanwhile, don't run it again
+        pipe.lrem(self.pending_key, 0, job_id)
+        pipe.expire(self.job_key(job_id), self.retention_s)
+        pipe.expire(self.events_key(job_id), self.retention_s)
+        pipe.execute()
+
+    def fail(self, job_id: str) -> bool:
+        """Releases a failed job: requeues it and returns True, or dead-letters it (False)."""
+        attempts = int(self.client.hget(self.job_key(job_id), "attempts") or 0)
+        retry = attempts < self.max_attempts
+        pipe = self.client.pipeline()
+        pipe.zrem(self.leases_key, job_id)
+        pipe.lrem(self.pending_key, 0, job_id)
+        if retry:
+            pipe.lpush(self.pending_key, job_id)
+        else:
+            pipe.lpush(self.dead_key, job_id)
+            pipe.expire(self.job_key(job_id), self.retention_s)
+            pipe.expire(self.events_key(job_id), self.retention_s)
+        pipe.execute()
+        return retry
+
+    def reap(self) -> List[Tuple[str, str]]:
+        """Requeues or dead-letters jobs with expired leases; returns (id, "retry"|"dead") pairs."""
+        reply = self._reap(keys=[self.pending_key, self.leases_key, self.dead_key],
+                           args=[time.time(), self.max_attempts, f"{self.prefix}:job:",
+                                 f"{self.prefix}:events:", self.retention_s])
+        reply = [r.decode() if isinstance(r, bytes) else r for r in reply]
+        return list(zip(reply[::2], reply[1::2]))
+
+    def dead_letters(self, limit: int = 100) -> List[str]:
+        return [i.decode() for i in self.client.lrange(self.dead_key, 0, limit - 1)]
+
+
+class RedisJob:
+    """
+    API-side view of a job in the Redis queue with the interface of Job
+    (status, result, error, timings, wait, iter_events, to_dict), by polling.
+    """
+
+    poll_s = 0.25
+
+    def __init__(self, queue: RedisJobQueue, job_id: str):
+        self.queue = queue
+        self.id = job_id
+
+    def to_dict(self) -> Dict:
+        return self.queue.state(self.id) or {}
+
+    @property
+    def status(self) -> str:
+        return self.to_dict().get("status", "queued")
+
+    @property
+    def result(self) -> Dict:
+        return self.to_dict().get("result") or {}
+
+    @property
+    def error(self) -> Optional[str]:
+        return self.to_dict().get("error")
+
+    @property
+    def timings(self) -> List[Dict]:
+        return self.to_dict().get("timings") or []
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_s)
+        return True
+
+    def iter_events(self, keepalive_s: float = 15) -> Iterator[Optional[Dict]]:
+        index = 0
+        idle_since = time.monotonic()
+        while True:
+            done = self.done
+            batch = self.queue.events(self.id, index)
+            index += len(batch)
+            for event in batch:
+                yield event
+            if batch:
+                idle_since = time.monotonic()
+            elif done:
+                return
+            elif time.monotonic() - idle_since >= keepalive_s:
+                idle_since = time.monotonic()
+                yield None
+            else:
+                time.sleep(self.poll_s)
+
+
+class RedisJobManager:
+    """Drop-in for JobManager that enqueues into Redis instead of running jobs itself."""
+
+    def __init__(self, queue: Optional[RedisJobQueue] = None):
+        self.queue = queue or get_queue()
+
+    def submit(self, kind: str, fn: Callable, *args, stream: bool = False,
+               cleanup_paths: Sequence[str] = (), **kwargs) -> RedisJob:
+        try:
+            job_id = self.queue.enqueue(kind, fn, args, kwargs, stream=stream, cleanup_paths=cleanup_paths)
+        except redis.RedisError as e:
+            raise QueueFullError(f"Job queue unavailable: {e}")
+        return RedisJob(self.queue, job_id)
+
+    def get(self, job_id: str) -> Optional[RedisJob]:
+        if not self.queue.client.exists(self.queue.job_key(job_id)):
+            return None
+        return RedisJob(self.queue, job_id)
+
+    def queue_depth(self) -> int:
+        return self.queue.depth()
+
+    def slot(self):
+        # Jobs run on the workers, so work in this process takes nothing from their capacity
+        return nullcontext()
+
+
+def get_queue() -> RedisJobQueue:
+    return RedisJobQueue(
+        redis.Redis.from_url(config.REDIS_URL),
+        config.QUEUE_PREFIX,
+        visibility_timeout_s=config.QUEUE_VISIBILITY_TIMEOUT_S,
+        max_attempts=config.QUEUE_MAX_ATTEMPTS,
+        max_pending=config.QUEUE_MAX_PENDING,
+        retention_s=config.JOB_RETENTION_S,
+    )
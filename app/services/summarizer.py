@@ -1,19 +1,206 @@
-from transformers import pipeline
+import re
+from typing import Dict, List, Optional
 
-# Load once
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+import numpy as np
 
-def summarize_text(text: str, max_chunk: int = 1000) -> str:
+from app import config
+from app.services import metrics
+from app.services.model_registry import cpu_fast, get_summarizer, get_tokenizer, inference_lock, remote_inference
+
+SUMMARIZER_PARAMS = {"max_length": 130, "min_length": 30, "do_sample": False}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"[a-z0-9']+")
+
+SUMMARY_MODES = ("fast", "balanced", "full")
+# Sentences longer than this (unpunctuated transcripts) are ranked in windows of this many words
+_MAX_UNIT_WORDS = 60
+_TEXTRANK_DAMPING = 0.85
+
+
+def split_sentences(text: str) -> List[str]:
+    text = " ".join(text.split())
+    return [s for s in _SENTENCE_END.split(text) if s]
+
+
+def chunk_by_tokens(sentences: List[str], tokenizer, max_tokens: int) -> List[str]:
     """
-    Summarizes long transcripts in chunks.
-    Returns the combined summary.
+    Packs whole sentences into chunks of at most max_tokens tokenizer tokens.
+    A single sentence longer than the budget is split on token boundaries.
     """
-    text = text.strip().replace("\n", " ")
-    chunks = [text[i:i + max_chunk] for i in range(0, len(text), max_chunk)]
-    
-    summaries = []
-    for chunk in chunks:
-        summary = summarizer(chunk, max_length=130, min_length=30, do_sample=False)[0]['summary_text']
-        summaries.append(summary)
+    if not sentences:
+        return []
+    lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    chunks, current, current_tokens = [], [], 0
+    for sentence, n_tokens in zip(sentences, lengths):
+        if n_tokens > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            ids = tokenizer(sentence, add_special_tokens=False)["input_ids"]
+            for i in range(0, len(ids), max_tokens):
+                chunks.append(tokenizer.decode(ids[i:i + max_tokens]).strip())
+            continue
+        if current and current_tokens + n_tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += n_tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _ranking_units(sentences: List[str]) -> List[str]:
+    units = []
+    for sentence in sentences:
+        words = sentence.split()
+        for i in range(0, len(words), _MAX_UNIT_WORDS):
+            units.append(" ".join(words[i:i + _MAX_UNIT_WORDS]))
+    return units
+
+
+def rank_sentences(sentences: List[str], iterations: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """
+    TextRank scores over TF-IDF vectors: PageRank on the graph of sentences
+    weighted by their cosine similarity. Central sentences, the ones that share
+    the most vocabulary with the rest of the talk, score highest.
+    """
+    n = len(sentences)
+    if n < 2:
+        return np.ones(n)
+    vocab: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            rows.append(i)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    tf = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+    np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+    df = np.count_nonzero(tf, axis=0)
+    tfidf = tf * (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    tfidf /= np.where(norms > 0, norms, 1)
+
+    similarity = tfidf @ tfidf.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Sentences sharing no words with any other one link to every sentence equally
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight > 0, out_weight, 1), 1.0 / n)
+
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - _TEXTRANK_DAMPING) / n + _TEXTRANK_DAMPING * (transition.T @ scores)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def extract_top_sentences(text: str, tokenizer, budget_tokens: int) -> str:
+    """
+    Keeps the highest-ranked sentences of text that fit in budget_tokens
+    tokenizer tokens, in their original order. Text within budget is returned as is.
+    """
+    units = _ranking_units(split_sentences(text))
+    if not units:
+        return ""
+    lengths = [len(ids) for ids in tokenizer(units, add_special_tokens=False)["input_ids"]]
+    if sum(lengths) <= budget_tokens:
+        return " ".join(units)
+
+    keep, used = [], 0
+    for i in np.argsort(-rank_sentences(units), kind="stable"):
+        if used + lengths[i] <= budget_tokens:
+            keep.append(i)
+            used += lengths[i]
+    return " ".join(units[i] for i in sorted(keep))
+
+
+def mode_budget(mode: str) -> Optional[int]:
+    """Token budget of the extractive pre-pass for a summary mode; None runs BART on everything."""
+    if mode not in SUMMARY_MODES:
+        raise ValueError(f"Unknown summary mode {mode!r}, expected one of {', '.join(SUMMARY_MODES)}")
+    return {"fast": config.SUMMARY_FAST_TOKENS, "balanced": config.SUMMARY_BALANCED_TOKENS}.get(mode)
+
+
+def cache_params(mode: Optional[str] = None) -> Dict:
+    """Everything besides the text and model that changes summarize_text's output."""
+    params = {
+        **SUMMARIZER_PARAMS,
+        "chunk_tokens": config.SUMMARY_CHUNK_TOKENS,
+        "reduce": config.SUMMARY_REDUCE,
+        "target_tokens": config.SUMMARY_TARGET_TOKENS,
+        "max_rounds": config.SUMMARY_MAX_ROUNDS,
+    }
+    if cpu_fast():
+        params["int8"] = True
+    budget = mode_budget(mode or config.SUMMARY_MODE)
+    if budget is not None:
+        params["extract_tokens"] = budget
+    return params
+
+
+def run_summarizer(chunks: List[str], model_name: Optional[str] = None,
+                   batch_size: Optional[int] = None) -> List[str]:
+    """One summary per chunk from this process's own model (what the inference server runs)."""
+    model_name = model_name or config.SUMMARIZER_MODEL
+    summarizer = get_summarizer(model_name)
+    with inference_lock("summarizer", model_name):
+        outputs = summarizer(chunks, batch_size=batch_size or config.SUMMARY_BATCH_SIZE,
+                             truncation=True, **SUMMARIZER_PARAMS)
+    return [out['summary_text'] for out in outputs]
+
+
+def summarize_text(text: str,
+                   max_chunk: Optional[int] = None,
+                   model_name: Optional[str] = None,
+                   batch_size: Optional[int] = None,
+                   reduce: Optional[bool] = None,
+                   mode: Optional[str] = None) -> str:
+    """
+    Summarizes long transcripts in sentence-aligned chunks of at most max_chunk tokens,
+    running the chunks through the model in batches.
+    With reduce=True the joined chunk summaries are summarized again until the
+    result fits SUMMARY_TARGET_TOKENS (map-reduce). Returns the combined summary.
+    mode "fast" or "balanced" first cuts the transcript down to its top-ranked
+    sentences (SUMMARY_FAST_TOKENS / SUMMARY_BALANCED_TOKENS); "full" summarizes all of it.
+    """
+    budget = mode_budget(mode or config.SUMMARY_MODE)
+    max_chunk = max_chunk or config.SUMMARY_CHUNK_TOKENS
+    batch_size = batch_size or config.SUMMARY_BATCH_SIZE
+    reduce = config.SUMMARY_REDUCE if reduce is None else reduce
+    model_name = model_name or config.SUMMARIZER_MODEL
+    tokenizer = get_tokenizer(model_name)
+    if remote_inference():
+        from app.services.inference_client import get_inference_client
+        run = get_inference_client().summarize
+    else:
+        run = run_summarizer
+
+    if budget is not None:
+        with metrics.stage_timer("extract"):
+            text = extract_top_sentences(text, tokenizer, budget)
+
+    with metrics.stage_timer("summarize", model_name) as timing:
+        timing.tokens = 0
+
+        def summarize_chunks(chunks: List[str]) -> str:
+            if not chunks:
+                return ""
+            timing.tokens += sum(len(ids) for ids in tokenizer(chunks, add_special_tokens=False)["input_ids"])
+            return " ".join(run(chunks, model_name, batch_size))
+
+        summary = summarize_chunks(chunk_by_tokens(split_sentences(text), tokenizer, max_chunk))
+
+        rounds = 0
+        while reduce and rounds < config.SUMMARY_MAX_ROUNDS:
+            if len(tokenizer(summary, add_special_tokens=False)["input_ids"]) <= config.SUMMARY_TARGET_TOKENS:
+                break
+            summary = summarize_chunks(chunk_by_tokens(split_sentences(summary), tokenizer, max_chunk))
+            rounds += 1
 
-    return " ".join(summaries)
\ No newline at end of file
+    return summary
@@ -1,12 +1,229 @@
-import whisper
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
 
-model = whisper.load_model("base")  # You can choose: tiny, base, small, medium, large
+import numpy as np
 
-def transcribe_audio(audio_path: str) -> str:
+from app import config
+from app.services import metrics
+from app.services.model_registry import configure_torch, get_whisper_model, inference_lock, remote_inference
+
+SAMPLE_RATE = 16000
+
+# One pool per Whisper model, least recently used first; each worker preloads only that model
+_pools: "OrderedDict[str, ProcessPoolExecutor]" = OrderedDict()
+_pool_users: Dict[str, int] = {}
+_pool_lock = threading.Lock()
+
+
+def transcribe_audio(audio: Union[str, np.ndarray], model_name: Optional[str] = None) -> str:
     """
-    Transcribes the given audio file using Whisper.
+    Transcribes the given audio file, or a 16 kHz mono float32 array, using Whisper.
     Returns the full transcript as a string.
     """
-    result = model.transcribe(audio_path)
-    transcript = result["text"]
-    return transcript
\ No newline at end of file
+    return transcribe_segments(audio, model_name)["text"]
+
+
+def _run_model(audio, model_name: Optional[str]) -> Dict:
+    model_name = model_name or config.WHISPER_MODEL
+    model = get_whisper_model(model_name)
+    # Whisper installs per-call hooks on the model, so one call at a time per instance
+    with inference_lock("whisper", model_name):
+        return model.transcribe(audio)
+
+
+def transcribe_segments(audio: Union[str, np.ndarray], model_name: Optional[str] = None) -> Dict:
+    """
+    Transcribes audio and returns {"text": ..., "segments": [{"start", "end", "text"}, ...]}.
+    Audio longer than LONG_AUDIO_MIN_S is split at quiet points and the chunks are
+    transcribed in parallel across a process pool (see transcribe_long_audio).
+    """
+    with metrics.stage_timer("transcribe", model_name or config.WHISPER_MODEL) as timing:
+        result = _transcribe_segments(audio, model_name)
+        if isinstance(audio, str):
+            # Whisper decoded the file itself; the last segment end is close enough
+            timing.audio_seconds = result["segments"][-1]["end"] if result["segments"] else None
+        else:
+            timing.audio_seconds = len(audio) / SAMPLE_RATE
+    return result
+
+
+def _transcribe_segments(audio: Union[str, np.ndarray], model_name: Optional[str]) -> Dict:
+    if remote_inference():
+        from app.services.downloader import decode_audio
+        from app.services.inference_client import get_inference_client
+        # The server may not see this process's files, so it gets the samples
+        if isinstance(audio, str):
+            audio = decode_audio(audio)
+        return get_inference_client().transcribe(audio, model_name)
+    return transcribe_local(audio, model_name)
+
+
+def transcribe_local(audio: Union[str, np.ndarray], model_name: Optional[str] = None) -> Dict:
+    """transcribe_segments on this process's own model (what the inference server runs)."""
+    if config.TRANSCRIBE_WORKERS > 1:
+        if isinstance(audio, str):
+            import whisper
+            audio = whisper.load_audio(audio)
+        if len(audio) >= config.LONG_AUDIO_MIN_S * SAMPLE_RATE:
+            return transcribe_long_audio(audio, model_name)
+
+    result = _run_model(audio, model_name)
+    return {
+        "text": result["text"],
+        "segments": [_segment(seg) for seg in result["segments"]],
+    }
+
+
+def _segment(seg: Dict, offset: float = 0.0) -> Dict:
+    return {
+        "start": round(seg["start"] + offset, 2),
+        "end": round(seg["end"] + offset, 2),
+        "text": seg["text"],
+    }
+
+
+def split_on_silence(audio: np.ndarray,
+                     chunk_s: float,
+                     overlap_s: float,
+                     search_s: float,
+                     frame_s: float = 0.03) -> List[Tuple[int, int, int]]:
+    """
+    Plans overlapping chunks of roughly chunk_s seconds.
+
+    Each cut point is placed at the lowest-energy frame within search_s seconds
+    before the nominal boundary, so cuts land in pauses rather than mid-word.
+    Returns (start, end, cut) sample indices; a chunk spans overlap_s / 2 on
+    either side of its cuts, and `cut` is the boundary with the next chunk
+    (len(audio) for the last one).
+    """
+    total = len(audio)
+    chunk = int(chunk_s * SAMPLE_RATE)
+    half_overlap = int(overlap_s * SAMPLE_RATE / 2)
+    search = int(search_s * SAMPLE_RATE)
+    frame = max(1, int(frame_s * SAMPLE_RATE))
+
+    cuts = []
+    position = 0
+    while total - position > chunk + search:
+        target = position + chunk
+        lo = max(position + frame, target - search)
+        window = np.asarray(audio[lo:target], dtype=np.float32)
+        n_frames = len(window) // frame
+        if n_frames:
+            energy = np.square(window[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+            cut = lo + int(np.argmin(energy)) * frame + frame // 2
+        else:
+            cut = target
+        cuts.append(cut)
+        position = cut
+    cuts.append(total)
+
+    plan = []
+    start = 0
+    for cut in cuts:
+        plan.append((max(0, start - half_overlap), min(total, cut + half_overlap), cut))
+        start = cut
+    return plan
+
+
+def _init_worker(threads: int, model_name: str):
+    configure_torch(threads)
+    get_whisper_model(model_name)
+
+
+def _transcribe_chunk(audio: np.ndarray, offset_s: float, model_name: Optional[str]) -> List[Dict]:
+    # Runs inside a pool process, each of which holds its own copy of the model
+    result = _run_model(audio, model_name)
+    return [_segment(seg, offset_s) for seg in result["segments"]]
+
+
+def _trim_pools():
+    """Shuts down the least recently used idle pools beyond TRANSCRIBE_MAX_POOLS; needs _pool_lock."""
+    for name in list(_pools):
+        if len(_pools) <= max(1, config.TRANSCRIBE_MAX_POOLS):
+            return
+        if not _pool_users.get(name):
+            # Idle, so there is nothing to cancel; its workers and their model exit
+            _pools.pop(name).shutdown(wait=False)
+
+
+@contextmanager
+def _use_pool(model_name: str):
+    """The pool for model_name, created if needed and kept while the block runs."""
+    with _pool_lock:
+        pool = _pools.get(model_name)
+        if pool is None:
+            workers = config.TRANSCRIBE_WORKERS
+            threads = max(1, (os.cpu_count() or workers) // workers)
+            # spawn, not fork: forking a process that already holds torch threads can deadlock
+            pool = _pools[model_name] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads, model_name),
+            )
+        _pools.move_to_end(model_name)
+        _pool_users[model_name] = _pool_users.get(model_name, 0) + 1
+        _trim_pools()
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _pool_users[model_name] -= 1
+            _trim_pools()
+
+
+def _reset_pool(model_name: str, pool: ProcessPoolExecutor):
+    with _pool_lock:
+        # Another caller may already have replaced the broken pool
+        if _pools.get(model_name) is pool:
+            del _pools[model_name]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def transcribe_long_audio(audio: np.ndarray, model_name: Optional[str] = None) -> Dict:
+    """
+    Splits audio into overlapping chunks at silence boundaries, transcribes them
+    concurrently and stitches the segments back together on the original timeline.
+    Segments from the overlap regions are de-duplicated by keeping each one only
+    in the chunk whose side of the cut its midpoint falls on.
+    """
+    plan = split_on_silence(audio, config.TRANSCRIBE_CHUNK_S,
+                            config.TRANSCRIBE_OVERLAP_S, config.TRANSCRIBE_SEARCH_S)
+    print(f"🎙️ Transcribing {len(audio) / SAMPLE_RATE:.0f}s of audio in {len(plan)} chunks "
+          f"on {config.TRANSCRIBE_WORKERS} workers")
+
+    model_name = model_name or config.WHISPER_MODEL
+    with _use_pool(model_name) as pool:
+        try:
+            futures = [
+                pool.submit(_transcribe_chunk, np.ascontiguousarray(audio[start:end]),
+                            start / SAMPLE_RATE, model_name)
+                for start, end, _ in plan
+            ]
+            results = [f.result() for f in futures]
+        except BrokenProcessPool:
+            # A worker died (usually OOM); drop the pool so the next call starts fresh
+            _reset_pool(model_name, pool)
+            raise RuntimeError("Transcription worker crashed")
+
+    segments = []
+    lower = 0.0
+    for (start, end, cut), chunk_segments in zip(plan, results):
+        upper = cut / SAMPLE_RATE
+        for seg in chunk_segments:
+            midpoint = (seg["start"] + seg["end"]) / 2
+            if lower <= midpoint < upper:
+                segments.append(seg)
+        lower = upper
+
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "segments": segments,
+    }
@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import (
+    Column, Float, ForeignKey, Index, Integer, MetaData, String, Table, Text, create_engine, event, text,
+)
+from sqlalchemy.engine import Engine
+
+from app import config
+
+metadata = MetaData()
+
+videos = Table(
+    "videos", metadata,
+    Column("video_id", String(128), primary_key=True),  # extract_video_id() / "sha256:..." for uploads
+    Column("url", Text),
+    Column("title", Text),
+    Column("transcript", Text, nullable=False),
+    Column("summary", Text),
+    Column("social_posts", Text),  # JSON
+    Column("whisper_model", String(64)),
+    Column("summarizer_model", String(128)),
+    Column("created_at", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+)
+
+segments = Table(
+    "segments", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("video_id", String(128), ForeignKey("videos.video_id", ondelete="CASCADE"), nullable=False),
+    Column("idx", Integer, nullable=False),
+    Column("start", Float, nullable=False),
+    Column("end", Float, nullable=False),
+    Column("text", Text, nullable=False),
+    Index("segments_video_idx", "video_id", "idx"),
+)
+
+# Full-text index over segment text, so a hit points at a timestamp in a video.
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+_SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(text, content='segments', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS segments_fts_insert AFTER INSERT ON segments BEGIN "
+    "INSERT INTO segments_fts(rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS segments_fts_delete AFTER DELETE ON segments BEGIN "
+    "INSERT INTO segments_fts(segments_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+]
+# Postgres (12+): a generated tsvector column with a GIN index.
+_POSTGRES_FTS = [
+    "ALTER TABLE segments ADD COLUMN IF NOT EXISTS tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED",
+    "CREATE INDEX IF NOT EXISTS segments_tsv_idx ON segments USING GIN (tsv)",
+]
+
+
+def _fts5_query(query: str) -> str:
+    # Every word must match; quoting keeps FTS5 operators in user input literal
+    return " ".join('"%s"' % word.replace('"', '""') for word in query.split())
+
+
+class TranscriptStore:
+    """
+    Database of processed videos: transcript with Whisper segments, summary and
+    posts, keyed by video ID, plus a full-text index over the segments.
+    Works on SQLite (FTS5) for local runs and Postgres (tsvector) in production;
+    other databases fall back to a LIKE scan.
+    """
+
+    def __init__(self, url: str):
+        kwargs = {"pool_pre_ping": True}
+        if url.startswith("sqlite"):
+            kwargs["connect_args"] = {"check_same_thread": False}
+        self.engine: Engine = create_engine(url, **kwargs)
+        self.dialect = self.engine.dialect.name
+        if self.dialect == "sqlite":
+            event.listen(self.engine, "connect", _sqlite_pragmas)
+        metadata.create_all(self.engine)
+        ddl = {"sqlite": _SQLITE_FTS, "postgresql": _POSTGRES_FTS}.get(self.dialect, [])
+        with self.engine.begin() as conn:
+            for statement in ddl:
+                conn.execute(text(statement))
+
+    def save(self, video_id: str, transcript: Dict, summary: Optional[str] = None,
+             social_posts: Optional[Dict] = None, url: Optional[str] = None, title: Optional[str] = None,
+             whisper_model: Optional[str] = None, summarizer_model: Optional[str] = None):
+        """Inserts or replaces everything stored for video_id; models default to the configured ones."""
+        now = time.time()
+        row = {
+            "url": url,
+            "title": title,
+            "transcript": transcript["text"],
+            "summary": summary,
+            "social_posts": json.dumps(social_posts) if social_posts is not None else None,
+            "whisper_model": whisper_model or config.WHISPER_MODEL,
+            "summarizer_model": summarizer_model or config.SUMMARIZER_MODEL,
+            "updated_at": now,
+        }
+        with self.engine.begin() as conn:
+            conn.execute(segments.delete().where(segments.c.video_id == video_id))
+            updated = conn.execute(videos.update().where(videos.c.video_id == video_id).values(**row))
+            if updated.rowcount == 0:
+                conn.execute(videos.insert().values(video_id=video_id, created_at=now, **row))
+            if transcript.get("segments"):
+                conn.execute(segments.insert(), [
+                    {"video_id": video_id, "idx": i, "start": seg["start"], "end": seg["end"],
+                     "text": seg["text"].strip()}
+                    for i, seg in enumerate(transcript["segments"])
+                ])
+
+    def update_posts(self, video_id: str, social_posts: Dict) -> bool:
+        """Replaces the stored posts of video_id; False if the video is not stored."""
+        with self.engine.begin() as conn:
+            updated = conn.execute(videos.update().where(videos.c.video_id == video_id).values(
+                social_posts=json.dumps(social_posts), updated_at=time.time()))
+        return updated.rowcount > 0
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        with self.engine.connect() as conn:
+            video = conn.execute(videos.select().where(videos.c.video_id == video_id)).mappings().first()
+            if video is None:
+                return None
+            rows = conn.execute(
+                segments.select().where(segments.c.video_id == video_id).order_by(segments.c.idx)
+            ).mappings().all()
+        record = dict(video)
+        record["social_posts"] = json.loads(video["social_posts"]) if video["social_posts"] else None
+        record["segments"] = [{"start": r["start"], "end": r["end"], "text": r["text"]} for r in rows]
+        return record
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Segments matching every word of query, best matches first."""
+        if not query.split():
+            return []
+        if self.dialect == "sqlite":
+            sql = text(
+                "SELECT s.video_id, v.url, v.title, s.start, s.\"end\", s.text, "
+                "snippet(segments_fts, 0, '[', ']', '…', 16) AS snippet "
+                "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid "
+                "JOIN videos v ON v.video_id = s.video_id "
+                "WHERE segments_fts MATCH :q ORDER BY segments_fts.rank LIMIT :limit"
+            )
+            params = {"q": _fts5_query(query), "limit": limit}
+        elif self.dialect == "postgresql":
+            sql = text(
+                "SELECT s.video_id, v.url, v.title, s.start, s.\"end\", s.text, "
+                "ts_headline('english', s.text, q, 'StartSel=[,StopSel=]') AS snippet "
+                "FROM segments s JOIN videos v ON v.video_id = s.video_id, "
+                "websearch_to_tsquery('english', :q) q "
+                "WHERE s.tsv @@ q ORDER BY ts_rank(s.tsv, q) DESC LIMIT :limit"
+            )
+            params = {"q": query, "limit": limit}
+        else:
+            condition = " AND ".join(f"lower(s.text) LIKE :w{i}" for i in range(len(query.split())))
+            sql = text(
+                "SELECT s.video_id, v.url, v.title, s.start, s.\"end\", s.text, s.text AS snippet "
+                f"FROM segments s JOIN videos v ON v.video_id = s.video_id WHERE {condition} LIMIT :limit"
+            )
+            params = {f"w{i}": f"%{w.lower()}%" for i, w in enumerate(query.split())}
+            params["limit"] = limit
+        with self.engine.connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params).mappings()]
+
+
+def _sqlite_pragmas(dbapi_conn, _):
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+_store: Optional[TranscriptStore] = None
+_store_lock = threading.Lock()
+
+
+def get_transcript_store() -> Optional[TranscriptStore]:
+    """Process-wide store, or None when STORE_ENABLED is off."""
+    global _store
+    if not config.STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = TranscriptStore(config.DATABASE_URL)
+        return _store
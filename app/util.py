@@ -1,11 +1,51 @@
-def save_uploaded_file(upload_file):
-    import os
-    from tempfile import NamedTemporaryFile
+import os
+from tempfile import NamedTemporaryFile
+
+from app import config
+
+
+class UploadTooLargeError(RuntimeError):
+    """Raised when an upload exceeds MAX_UPLOAD_BYTES."""
+
+
+def save_uploaded_file(upload_file, max_bytes=None, chunk_size=None):
+    """
+    Copies an upload to a temp file in fixed-size chunks, so memory use doesn't grow
+    with the upload. Stops and removes the partial file as soon as max_bytes is exceeded.
+    The caller owns the returned file and must delete it.
+    """
+    max_bytes = config.MAX_UPLOAD_BYTES if max_bytes is None else max_bytes
+    chunk_size = chunk_size or config.UPLOAD_CHUNK_BYTES
+    suffix = os.path.splitext(upload_file.filename or "")[1]
+    # UPLOAD_DIR must be shared storage when jobs run on other hosts (QUEUE_BACKEND=redis)
+    upload_dir = config.UPLOAD_DIR or None
+    if upload_dir:
+        os.makedirs(upload_dir, exist_ok=True)
+    temp_path = None
     try:
-        suffix = os.path.splitext(upload_file.filename)[1]
-        with NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            temp_file.write(upload_file.file.read())
+        with NamedTemporaryFile(delete=False, suffix=suffix, dir=upload_dir) as temp_file:
             temp_path = temp_file.name
+            written = 0
+            while True:
+                chunk = upload_file.file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes and written > max_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {max_bytes} byte limit")
+                temp_file.write(chunk)
         return temp_path
+    except UploadTooLargeError:
+        remove_file(temp_path)
+        raise
     except Exception as e:
-        raise RuntimeError(f"Failed to save uploaded file: {e}")
\ No newline at end of file
+        remove_file(temp_path)
+        raise RuntimeError(f"Failed to save uploaded file: {e}")
+
+
+def remove_file(path):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1 +1,60 @@
- 
+import hashlib
+import re
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+_YOUTUBE_ID = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_CLIP_START = re.compile(r"#t=([0-9.]+)")
+
+
+def extract_video_id(url: str) -> str:
+    """
+    Returns a stable ID for a video URL so different spellings of the same
+    YouTube link (watch?v=, youtu.be/, shorts/, embed/, extra query params)
+    map to the same key. Non-YouTube URLs fall back to a hash of the URL.
+    """
+    parsed = urlparse(url.strip())
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www.") or host.startswith("m."):
+        host = host.split(".", 1)[1]
+
+    candidate = None
+    if host == "youtu.be":
+        candidate = parsed.path.lstrip("/").split("/")[0]
+    elif host in ("youtube.com", "music.youtube.com", "youtube-nocookie.com"):
+        if parsed.path == "/watch":
+            candidate = parse_qs(parsed.query).get("v", [None])[0]
+        else:
+            parts = parsed.path.strip("/").split("/")
+            if len(parts) >= 2 and parts[0] in ("shorts", "embed", "live", "v"):
+                candidate = parts[1]
+
+    if candidate and _YOUTUBE_ID.match(candidate):
+        return "yt:" + candidate
+    return "url:" + hashlib.sha256(url.strip().encode("utf-8")).hexdigest()[:32]
+
+
+def normalize_video_id(video_id: str) -> str:
+    """Accepts a bare YouTube ID, a stored ID ("yt:...", "sha256:...") or a video URL."""
+    video_id = video_id.strip()
+    if _YOUTUBE_ID.match(video_id):
+        return "yt:" + video_id
+    if video_id.startswith(("http://", "https://")):
+        return extract_video_id(video_id)
+    return video_id
+
+
+def clip_id(video_id: str, start_s: Optional[float] = None, end_s: Optional[float] = None) -> str:
+    """
+    ID of a section of a video, in media fragment style: "yt:...#t=60,300" (or
+    "#t=60" when open-ended). The whole video keeps its plain ID.
+    """
+    if start_s is None and end_s is None:
+        return video_id
+    return f"{video_id}#t={start_s or 0:g}" + (f",{end_s:g}" if end_s is not None else "")
+
+
+def clip_start(video_id: str) -> float:
+    """Where a clip ID starts on its video's timeline; 0 for a whole video."""
+    found = _CLIP_START.search(video_id)
+    return float(found.group(1)) if found else 0.0
@@ -0,0 +1,172 @@
+"""
+Queue worker for QUEUE_BACKEND=redis: pulls jobs from Redis, runs them with the
+app/services pipeline and writes state, events and results back for the API.
+
+    QUEUE_BACKEND=redis REDIS_URL=redis://host:6379/0 python -m app.worker
+
+Run as many workers, on as many hosts, as needed. Each one loads its own models
+and runs WORKER_CONCURRENCY jobs at a time. SIGTERM/SIGINT stop claiming new
+jobs and exit once the running ones finish.
+"""
+import signal
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app import config
+from app.services import metrics
+from app.services.jobs import Job
+from app.services.model_registry import warmup
+from app.services.redis_queue import RedisJobQueue, get_queue, resolve_task
+from app.util import remove_file
+
+POLL_S = 1.0  # idle wait between claim attempts
+REAP_INTERVAL_S = 10.0
+
+
+class QueuedJob(Job):
+    """A Job whose state and events are mirrored to Redis, where the API reads them."""
+
+    def __init__(self, queue: RedisJobQueue, job_id: str, kind: str):
+        self._queue = None  # Job.__init__ emits before the real id is known
+        super().__init__(kind)
+        self.id = job_id
+        self._queue = queue
+
+    def emit(self, event: str, data=None):
+        super().emit(event, data)
+        if self._queue is not None:
+            self._queue.push_event(self.id, event, data)
+
+    def on_stage(self, stage: str, status: str, output=None):
+        super().on_stage(stage, status, output)
+        self.save()
+
+    def finish(self, error=None):
+        super().finish(error)
+        self.save()
+
+    def save(self):
+        self._queue.save_state(self.id, self.to_dict())
+
+
+def _heartbeat(queue: RedisJobQueue, job_id: str, stop: threading.Event):
+    while not stop.wait(queue.visibility_timeout_s / 3):
+        if not queue.extend(job_id):
+            print(f"⚠️ Lost the lease on job {job_id}; it may run again elsewhere")
+            return
+
+
+def run_job(queue: RedisJobQueue, job_id: str):
+    spec = queue.load(job_id)
+    job = QueuedJob(queue, job_id, spec["kind"])
+    job.status = "running"
+    job.started_at = time.time()
+    job.emit("job", {"job_id": job.id, "status": job.status, "attempt": spec["attempts"]})
+    job.save()
+
+    stop_heartbeat = threading.Event()
+    threading.Thread(target=_heartbeat, args=(queue, job_id, stop_heartbeat), daemon=True).start()
+    try:
+        fn = resolve_task(spec["task"])
+        kwargs = dict(spec["kwargs"])
+        if spec["stream"]:
+            kwargs["on_event"] = job.emit
+        with metrics.collect(job.timings):
+            result = fn(*spec["args"], on_stage=job.on_stage, **kwargs)
+        job.result.update(result or {})
+    except Exception as e:
+        traceback.print_exc()
+        stop_heartbeat.set()
+        # Record the outcome before releasing the job, another worker may claim it right away
+        if spec["attempts"] < queue.max_attempts:
+            job.status = "queued"
+            job.emit("retry", {"attempt": spec["attempts"], "detail": str(e)})
+            job.save()
+            queue.fail(job_id)
+            return
+        job.finish(f"{e} (gave up after {spec['attempts']} attempts)")
+        queue.fail(job_id)
+    else:
+        stop_heartbeat.set()
+        job.finish()
+        queue.complete(job_id)
+    for path in spec["cleanup_paths"]:
+        remove_file(path)
+
+
+def reap(queue: RedisJobQueue):
+    for job_id, outcome in queue.reap():
+        print(f"⚠️ Lease of job {job_id} expired, {'requeued' if outcome == 'retry' else 'dead-lettered'}")
+        if outcome == "dead":
+            state = queue.state(job_id) or {}
+            state.update(status="failed", error="Worker lost; gave up after the maximum attempts",
+                         finished_at=time.time())
+            queue.save_state(job_id, state)
+            queue.push_event(job_id, "error", {"detail": state["error"]})
+            for path in queue.load(job_id)["cleanup_paths"]:
+                remove_file(path)
+
+
+def _work_loop(queue: RedisJobQueue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            job_id = queue.claim()
+        except Exception:
+            traceback.print_exc()
+            stop.wait(POLL_S)
+            continue
+        if job_id is None:
+            stop.wait(POLL_S)
+            continue
+        try:
+            run_job(queue, job_id)
+        except Exception:
+            # Redis errors while reporting; the lease expires and the job is retried
+            traceback.print_exc()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.render().encode()
+        self.send_response(200 if self.path == "/metrics" else 404)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    queue = get_queue()
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    if config.WORKER_METRICS_PORT:
+        server = ThreadingHTTPServer(("0.0.0.0", config.WORKER_METRICS_PORT), _MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    if config.MODEL_WARMUP:
+        warmup()
+
+    workers = [threading.Thread(target=_work_loop, args=(queue, stop), name=f"worker-{i}")
+               for i in range(config.WORKER_CONCURRENCY)]
+    for thread in workers:
+        thread.start()
+    print(f"✅ Worker started: {config.WORKER_CONCURRENCY} slot(s) on {config.REDIS_URL}")
+
+    while not stop.wait(REAP_INTERVAL_S):
+        try:
+            reap(queue)
+        except Exception:
+            traceback.print_exc()
+    print("Stopping: waiting for running jobs to finish")
+    for thread in workers:
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compares the two ways of getting downloaded audio into Whisper:
+
+  wav     MoviePy re-encodes the container to a WAV, Whisper decodes the WAV again
+  memory  ffmpeg decodes the container straight to a 16 kHz float32 array
+  mmap    same as memory, spilled to an unlinked memory-mapped temp file
+
+Usage:
+    python benchmarks/audio_decode.py path/to/downloaded.webm [--repeat 3]
+
+Prints one JSON object per path with wall time and bytes written to disk.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.downloader import decode_audio  # noqa: E402
+
+
+def _wav_path(source: str):
+    import whisper
+    from moviepy.editor import AudioFileClip
+
+    out_dir = tempfile.mkdtemp()
+    wav = os.path.join(out_dir, "audio.wav")
+    try:
+        with AudioFileClip(source) as clip:
+            clip.write_audiofile(wav, logger=None)
+        written = os.path.getsize(wav)
+        audio = whisper.load_audio(wav)
+        return audio, written
+    finally:
+        if os.path.exists(wav):
+            os.remove(wav)
+        os.rmdir(out_dir)
+
+
+def _memory_path(source: str):
+    return decode_audio(source), 0
+
+
+def _mmap_path(source: str):
+    audio = decode_audio(source, use_mmap=True)
+    return audio, audio.nbytes
+
+
+PATHS = {"wav": _wav_path, "memory": _memory_path, "mmap": _mmap_path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="downloaded audio/video container")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--paths", default="wav,memory,mmap")
+    args = parser.parse_args()
+
+    for name in args.paths.split(","):
+        fn = PATHS[name]
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            audio, written = fn(args.source)
+            times.append(time.perf_counter() - start)
+        print(json.dumps({
+            "path": name,
+            "source_bytes": os.path.getsize(args.source),
+            "audio_seconds": round(len(audio) / 16000, 2),
+            "disk_bytes_written": written,
+            "wall_s_median": round(statistics.median(times), 3),
+            "wall_s_min": round(min(times), 3),
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Compares INFERENCE_MODE=default with INFERENCE_MODE=cpu-fast (int8 dynamic
+quantization + torch thread limits): speed of transcription and summarization,
+and the quality cost as WER of the transcripts and ROUGE of the summaries.
+
+Each mode runs in a fresh interpreter, since thread settings and quantized
+models are per process. Quality is measured against the reference files when
+given, and always against the default mode's output (the cpu-fast delta).
+
+Usage:
+    python benchmarks/cpu_fast.py --audio speech.webm [--reference-transcript ref.txt]
+        [--text transcript.txt] [--reference-summary ref_summary.txt] [--repeat 3]
+
+Without --audio a synthetic clip is used, which times the models but makes
+WER meaningless; use a real speech recording for the quality numbers.
+Prints one JSON object per mode and a final comparison object.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("default", "cpu-fast")
+
+
+def _words(text: str):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def wer(reference: str, hypothesis: str) -> float:
+    """Word error rate: word-level edit distance / reference length."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _f1(overlap: int, ref_total: int, hyp_total: int) -> float:
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / hyp_total, overlap / ref_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def _ngrams(words, n):
+    counts = {}
+    for i in range(len(words) - n + 1):
+        gram = tuple(words[i:i + n])
+        counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def _lcs(a, b) -> int:
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b, 1):
+            current.append(previous[j - 1] + 1 if x == y else max(previous[j], current[j - 1]))
+        previous = current
+    return previous[-1]
+
+
+def rouge(reference: str, hypothesis: str) -> dict:
+    """ROUGE-1/2/L F1 (no stemming), enough to compare two summarizer variants."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    scores = {}
+    for n in (1, 2):
+        r, h = _ngrams(ref, n), _ngrams(hyp, n)
+        overlap = sum(min(count, h.get(gram, 0)) for gram, count in r.items())
+        scores[f"rouge{n}"] = round(_f1(overlap, sum(r.values()), sum(h.values())), 4)
+    scores["rougeL"] = round(_f1(_lcs(ref, hyp), len(ref), len(hyp)), 4)
+    return scores
+
+
+CHILD = """
+import json, resource, statistics, sys, time
+sys.path.insert(0, {root!r})
+from app.services import downloader, model_registry, summarizer, transcriber
+
+start = time.perf_counter()
+model_registry.warmup()
+load_s = time.perf_counter() - start
+
+audio = downloader.decode_audio({audio!r})
+with open({text_path!r}, encoding="utf-8") as f:
+    text = f.read()
+
+transcribe_runs, summarize_runs = [], []
+for _ in range({repeat}):
+    t0 = time.perf_counter()
+    transcript = transcriber.transcribe_audio(audio)
+    transcribe_runs.append(time.perf_counter() - t0)
+for _ in range({repeat}):
+    t0 = time.perf_counter()
+    summary = summarizer.summarize_text(text)
+    summarize_runs.append(time.perf_counter() - t0)
+
+import torch
+print(json.dumps({{
+    "load_s": load_s,
+    "transcribe_s": statistics.median(transcribe_runs),
+    "summarize_s": statistics.median(summarize_runs),
+    "audio_s": len(audio) / downloader.SAMPLE_RATE,
+    "threads": torch.get_num_threads(),
+    "interop_threads": torch.get_num_interop_threads(),
+    "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "transcript": transcript,
+    "summary": summary,
+}}))
+"""
+
+
+def run_mode(mode: str, audio: str, text_path: str, repeat: int) -> dict:
+    env = dict(os.environ, INFERENCE_MODE=mode)
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT, audio=audio, text_path=text_path, repeat=repeat)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()[-1]
+    return json.loads(out)
+
+
+def _read(path):
+    if not path:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", help="Speech recording (any ffmpeg-readable file)")
+    parser.add_argument("--seconds", type=float, default=60, help="Length of the synthetic clip without --audio")
+    parser.add_argument("--reference-transcript")
+    parser.add_argument("--text", help="Text to summarize (default: a built-in sample transcript)")
+    parser.add_argument("--reference-summary")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    tmp_dir = tempfile.mkdtemp(prefix="bench-cpu-fast-")
+    audio = args.audio
+    if not audio:
+        from fixtures import synthesize_audio
+        audio = synthesize_audio(os.path.join(tmp_dir, "fixture.wav"), args.seconds)
+    text_path = args.text
+    if not text_path:
+        from summarize import SAMPLE
+        text_path = os.path.join(tmp_dir, "text.txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(SAMPLE * 40)
+
+    results = {}
+    for mode in MODES:
+        start = time.perf_counter()
+        try:
+            result = run_mode(mode, audio, text_path, args.repeat)
+        except subprocess.CalledProcessError as e:
+            print(json.dumps({"mode": mode, "error": e.stderr.strip().splitlines()[-1]}))
+            return
+        results[mode] = result
+        print(json.dumps({
+            "mode": mode,
+            "load_s": round(result["load_s"], 2),
+            "transcribe_s": round(result["transcribe_s"], 2),
+            "realtime_factor": round(result["transcribe_s"] / result["audio_s"], 3),
+            "summarize_s": round(result["summarize_s"], 2),
+            "threads": result["threads"],
+            "interop_threads": result["interop_threads"],
+            "peak_rss_mb": round(result["peak_rss_kb"] / 1024, 1),
+            "total_s": round(time.perf_counter() - start, 1),
+        }))
+
+    base, fast = results["default"], results["cpu-fast"]
+    comparison = {
+        "transcribe_speedup": round(base["transcribe_s"] / fast["transcribe_s"], 2),
+        "summarize_speedup": round(base["summarize_s"] / fast["summarize_s"], 2),
+        "wer_vs_default": round(wer(base["transcript"], fast["transcript"]), 4),
+        "rouge_vs_default": rouge(base["summary"], fast["summary"]),
+    }
+    reference_transcript = _read(args.reference_transcript)
+    if reference_transcript:
+        comparison["wer"] = {mode: round(wer(reference_transcript, r["transcript"]), 4)
+                             for mode, r in results.items()}
+    reference_summary = _read(args.reference_summary)
+    if reference_summary:
+        comparison["rouge"] = {mode: rouge(reference_summary, r["summary"]) for mode, r in results.items()}
+    print(json.dumps({"comparison": comparison}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Local stand-in for the Ollama HTTP API, so generation can be benchmarked offline.
+
+Serves /api/tags and /api/generate (streaming and non-streaming). Every response
+waits --latency-ms (model load + prompt processing) and then produces a canned
+answer in the format PROMPT_TEMPLATE asks for at --tokens-per-s. Per-platform
+prompts (GENERATION_MODE=per-platform) get just that platform's post, as JSON
+when the request sets format=json.
+
+Usage:
+    python benchmarks/fake_ollama.py [--port 11434] [--latency-ms 200] [--tokens-per-s 40]
+
+Then run the API with OLLAMA_URL=http://localhost:11434. The benchmarks in this
+directory start it in-process with serve_in_thread() instead.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+RESPONSE = (
+    "Twitter: Small teams ship reliable software by reviewing every change and rolling out "
+    "gradually. Observability beats clever code. #DevOps\n\n"
+    "Instagram: Reliable software isn't magic ✨ Review 👀 test 🧪 roll out slowly 🚀 and write "
+    "it all down. #SoftwareEngineering #DevOps #Reliability\n\n"
+    "Shorts Title: How Small Teams Ship Reliable Software"
+)
+
+
+_SECTIONS = dict(re.findall(r"^(Twitter|Instagram|Shorts Title): (.+)$", RESPONSE, re.MULTILINE))
+_PLATFORM_LABELS = {"tweet": "Twitter", "Instagram caption": "Instagram", "YouTube Shorts title": "Shorts Title"}
+
+
+def answer(payload: dict) -> str:
+    first_line = payload.get("prompt", "").split("\n", 1)[0]
+    for label, section in _PLATFORM_LABELS.items():
+        if first_line.endswith(f"write a {label}."):
+            text = _SECTIONS[section]
+            return json.dumps({"text": text}) if payload.get("format") == "json" else text
+    return RESPONSE
+
+
+def tokenize(text: str):
+    # Roughly one token per word or punctuation run, keeping the whitespace
+    return re.findall(r"\s*\S+", text)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    model = "phi:latest"
+    latency_s = 0.2
+    tokens_per_s = 40.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": self.model}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return self._send_json(400, {"error": "invalid JSON"})
+        if self.path != "/api/generate":
+            return self._send_json(404, {"error": "not found"})
+
+        text = answer(payload)
+        tokens = tokenize(text)
+        prompt_tokens = len(tokenize(payload.get("prompt", "")))
+        start = time.perf_counter()
+        time.sleep(self.latency_s)
+        stats = {
+            "model": payload.get("model", self.model),
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(tokens),
+            "eval_duration": int(len(tokens) / self.tokens_per_s * 1e9),
+        }
+
+        if not payload.get("stream", True):
+            time.sleep(len(tokens) / self.tokens_per_s)
+            stats["total_duration"] = int((time.perf_counter() - start) * 1e9)
+            return self._send_json(200, {"response": text, "done": True, **stats})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in tokens:
+            time.sleep(1 / self.tokens_per_s)
+            self._write_chunk({"model": stats["model"], "response": token, "done": False})
+        stats["total_duration"] = int((time.perf_counter() - start) * 1e9)
+        self._write_chunk({"response": "", "done": True, **stats})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, body: dict):
+        line = json.dumps(body).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+
+def make_server(port: int = 0, latency_s: float = 0.2, tokens_per_s: float = 40.0,
+                model: str = "phi:latest") -> ThreadingHTTPServer:
+    handler = type("Handler", (FakeOllamaHandler,),
+                   {"latency_s": latency_s, "tokens_per_s": tokens_per_s, "model": model})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(**kwargs) -> Tuple[ThreadingHTTPServer, str]:
+    """Starts a fake Ollama on a free port in a daemon thread; returns (server, base_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-s", type=float, default=40)
+    parser.add_argument("--model", default="phi:latest")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency_ms / 1000, args.tokens_per_s, args.model)
+    print(f"Fake Ollama serving {args.model} on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
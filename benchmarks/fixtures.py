@@ -0,0 +1,86 @@
+"""
+Offline inputs for the benchmarks: a synthetic audio fixture and a stand-in for
+the yt-dlp download functions that serves that fixture instead.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+import wave
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def synthesize_audio(path: str, seconds: float = 60, sample_rate: int = SAMPLE_RATE) -> str:
+    """
+    Writes a 16-bit mono WAV of roughly speech-shaped sound: syllable-rate
+    modulated tones in 2-6 s phrases separated by short pauses, so silence-based
+    chunking has something to cut at. Whisper output on it is meaningless; use a
+    real recording (--audio) when transcript quality matters.
+    """
+    rng = np.random.default_rng(0)
+    audio = np.zeros(int(seconds * sample_rate), dtype=np.float32)
+    pos = 0
+    while pos < len(audio):
+        phrase = int(rng.uniform(2, 6) * sample_rate)
+        t = np.arange(min(phrase, len(audio) - pos)) / sample_rate
+        pitch = rng.uniform(110, 220)
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 5) * t))
+        voice = np.sin(2 * np.pi * pitch * t) + 0.3 * np.sin(2 * np.pi * 2 * pitch * t)
+        audio[pos:pos + len(t)] = 0.3 * envelope * voice + 0.01 * rng.standard_normal(len(t))
+        pos += len(t) + int(rng.uniform(0.3, 0.8) * sample_rate)
+
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+    return path
+
+
+class FixtureDownloads:
+    """
+    Replaces downloader.fetch_youtube_audio and download_youtube_audio with
+    functions that copy audio_path into the download directory, optionally after
+    delay_s to stand in for network time. Use as a context manager.
+    """
+
+    def __init__(self, audio_path: str, delay_s: float = 0.0):
+        self.audio_path = audio_path
+        self.delay_s = delay_s
+        self.work_dir = tempfile.mkdtemp(prefix="bench-downloads-")
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._originals = None
+
+    def fetch(self, url: str, download_dir: str = "downloads", name: Optional[str] = None,
+              start_s: Optional[float] = None, end_s: Optional[float] = None) -> str:
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        with self._lock:
+            self._counter += 1
+            n = self._counter
+        ext = os.path.splitext(self.audio_path)[1]
+        path = os.path.join(self.work_dir, f"{name or 'fixture'}-{n}{ext}")
+        shutil.copyfile(self.audio_path, path)
+        return path
+
+    def __enter__(self):
+        from app.services import downloader
+
+        self._originals = (downloader.fetch_youtube_audio, downloader.download_youtube_audio)
+        downloader.fetch_youtube_audio = self.fetch
+        # The WAV fallback path gets the fixture as is; pass a .wav fixture for AUDIO_DECODE_MODE=wav
+        downloader.download_youtube_audio = (lambda url, download_dir="downloads", **clip:
+                                             self.fetch(url, download_dir, **clip))
+        return self
+
+    def __exit__(self, *exc):
+        from app.services import downloader
+
+        downloader.fetch_youtube_audio, downloader.download_youtube_audio = self._originals
+        shutil.rmtree(self.work_dir, ignore_errors=True)
@@ -0,0 +1,274 @@
+"""
+Offline latency/throughput benchmark for each pipeline stage and for the
+/process and /upload endpoints under concurrency.
+
+Nothing touches the network: Ollama is replaced by benchmarks/fake_ollama.py and
+YouTube downloads by a local audio fixture (benchmarks/fixtures.py). Defaults
+use the tiny Whisper model and a distilled BART; override them through the
+usual environment variables (WHISPER_MODEL, SUMMARIZER_MODEL, ...).
+
+Usage:
+    python benchmarks/pipeline.py [--audio clip.webm | --seconds 60]
+        [--benchmarks stages,process,upload] [--requests 8] [--concurrency 1,4]
+        [--repeat 3] [--ollama-latency-ms 200] [--ollama-tokens-per-s 40]
+        [--output results.json]
+
+Prints one JSON object per benchmark with p50/p95 latency, requests/second and
+peak RSS (sampled while that benchmark ran). --output also writes all results
+plus run metadata to a file, for comparing releases.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # app.main mounts app/frontend relative to the working directory
+
+import fake_ollama  # noqa: E402
+from fixtures import FixtureDownloads, synthesize_audio  # noqa: E402
+
+BENCH_ENV = {
+    "WHISPER_MODEL": "tiny",
+    "SUMMARIZER_MODEL": "sshleifer/distilbart-cnn-6-6",
+    # Every request must do the work: nothing may be served from the result cache
+    # or shared with a concurrent request for the same fixture
+    "CACHE_ENABLED": "false",
+    "COALESCE_ENABLED": "false",
+    "STORE_ENABLED": "false",
+    "AUDIO_STORE_ENABLED": "false",
+    "JOB_QUEUE_SIZE": "256",
+}
+
+
+def percentile(values, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        from app.services.metrics import peak_rss_bytes
+        return peak_rss_bytes()
+
+
+@contextmanager
+def rss_sampler(interval_s: float = 0.05):
+    """Tracks the peak RSS of this process while the block runs (yields a dict)."""
+    peak = {"bytes": _rss_bytes()}
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval_s):
+            peak["bytes"] = max(peak["bytes"], _rss_bytes())
+
+    thread = threading.Thread(target=sample, daemon=True)
+    thread.start()
+    try:
+        yield peak
+    finally:
+        stop.set()
+        thread.join()
+        peak["bytes"] = max(peak["bytes"], _rss_bytes())
+
+
+def summarize_latencies(name: str, latencies, wall_s: float, peak, **extra) -> dict:
+    return {
+        "benchmark": name,
+        **extra,
+        "requests": len(latencies),
+        "p50_s": round(percentile(latencies, 50), 4) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 4) if latencies else None,
+        "mean_s": round(sum(latencies) / len(latencies), 4) if latencies else None,
+        "rps": round(len(latencies) / wall_s, 3) if wall_s > 0 else None,
+        "peak_rss_mb": round(peak["bytes"] / 1024 ** 2, 1),
+    }
+
+
+def run_stage(name: str, fn, repeat: int, **extra) -> dict:
+    fn()  # warm-up: model loads and first-call overhead stay out of the numbers
+    latencies = []
+    with rss_sampler() as peak:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - t0)
+        wall = time.perf_counter() - start
+    return summarize_latencies(f"stage:{name}", latencies, wall, peak, **extra)
+
+
+def stage_benchmarks(audio_path: str, repeat: int):
+    from app import config
+    from app.services import downloader, generator, summarizer, transcriber
+    from summarize import SAMPLE
+
+    audio = downloader.decode_audio(audio_path)
+    seconds = round(len(audio) / downloader.SAMPLE_RATE, 1)
+    transcript = transcriber.transcribe_audio(audio)
+    # Whisper output on the synthetic fixture is near empty; summarize a real-looking text instead
+    text = transcript if len(transcript.split()) >= 200 else SAMPLE * 20
+    summary = summarizer.summarize_text(text)
+
+    def stream():
+        for _ in generator.stream_social_posts(summary):
+            pass
+
+    yield run_stage("decode", lambda: downloader.decode_audio(audio_path), repeat, audio_s=seconds)
+    yield run_stage("transcribe", lambda: transcriber.transcribe_segments(audio), repeat,
+                    audio_s=seconds, model=config.WHISPER_MODEL)
+    yield run_stage("summarize", lambda: summarizer.summarize_text(text), repeat,
+                    words=len(text.split()), model=config.SUMMARIZER_MODEL)
+    yield run_stage("generate", lambda: generator.generate_social_posts(summary), repeat)
+    yield run_stage("generate_stream", stream, repeat)
+    yield run_stage("parse", lambda: generator.parse_ollama_response(fake_ollama.RESPONSE), repeat * 100)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api():
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config("app.main:app", host="127.0.0.1", port=_free_port(),
+                                           log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{server.config.port}"
+
+
+def load_test(name: str, send, n_requests: int, concurrency: int) -> dict:
+    send(0)  # warm-up
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def one(i):
+        t0 = time.perf_counter()
+        status = send(i)
+        elapsed = time.perf_counter() - t0
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+
+    with rss_sampler() as peak:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(1, n_requests + 1)))
+        wall = time.perf_counter() - start
+    return summarize_latencies(name, latencies, wall, peak, concurrency=concurrency,
+                               status_codes={str(k): v for k, v in sorted(statuses.items())})
+
+
+def endpoint_benchmarks(names, audio_path: str, n_requests: int, concurrency_levels):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    server, base_url = start_api()
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=max(concurrency_levels)))
+
+    def process(i):
+        # A distinct URL per request, so no request can reuse another's work
+        url = f"https://www.youtube.com/watch?v=bench{i:06d}"
+        return session.post(f"{base_url}/process", json={"url": url}).status_code
+
+    def upload(i):
+        with open(audio_path, "rb") as f:
+            files = {"file": (f"bench{i}{os.path.splitext(audio_path)[1]}", f)}
+            return session.post(f"{base_url}/upload", files=files).status_code
+
+    try:
+        for name in names:
+            send = {"process": process, "upload": upload}[name]
+            for concurrency in concurrency_levels:
+                yield load_test(f"endpoint:/{name}", send, n_requests, concurrency)
+    finally:
+        server.should_exit = True
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", help="Audio/video file to use instead of a synthetic clip")
+    parser.add_argument("--seconds", type=float, default=60, help="Length of the synthetic clip")
+    parser.add_argument("--benchmarks", default="stages,process,upload")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--requests", type=int, default=8, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", default="1,4")
+    parser.add_argument("--download-delay-ms", type=float, default=0, help="Simulated download time")
+    parser.add_argument("--ollama-latency-ms", type=float, default=200)
+    parser.add_argument("--ollama-tokens-per-s", type=float, default=40)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    # app.config reads the environment on import, so configure it before any app import
+    _, ollama_url = fake_ollama.serve_in_thread(latency_s=args.ollama_latency_ms / 1000,
+                                                tokens_per_s=args.ollama_tokens_per_s,
+                                                model=os.environ.get("OLLAMA_MODEL", "phi:latest"))
+    os.environ["OLLAMA_URL"] = ollama_url
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+
+    from app import config
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench-")
+    audio_path = args.audio or synthesize_audio(os.path.join(tmp_dir, "fixture.wav"), args.seconds)
+    selected = args.benchmarks.split(",")
+    concurrency_levels = [int(c) for c in args.concurrency.split(",")]
+
+    results = []
+    with FixtureDownloads(audio_path, delay_s=args.download_delay_ms / 1000):
+        runs = []
+        if "stages" in selected:
+            runs.append(stage_benchmarks(audio_path, args.repeat))
+        endpoints = [name for name in ("process", "upload") if name in selected]
+        if endpoints:
+            runs.append(endpoint_benchmarks(endpoints, audio_path, args.requests, concurrency_levels))
+        for run in runs:
+            for result in run:
+                print(json.dumps(result), flush=True)
+                results.append(result)
+
+    if args.output:
+        meta = {
+            "revision": _git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "whisper_model": config.WHISPER_MODEL,
+            "summarizer_model": config.SUMMARIZER_MODEL,
+            "audio": args.audio or f"synthetic {args.seconds}s",
+            "ollama": {"latency_ms": args.ollama_latency_ms, "tokens_per_s": args.ollama_tokens_per_s},
+        }
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures import time of the API and DAG entry points, and model cold-start time.
+
+Each measurement runs in a fresh interpreter so module caches don't leak between runs.
+
+Usage:
+    python benchmarks/startup.py [--repeat 3] [--no-models]
+
+Run it on two checkouts to compare before/after.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "import app.api.routes": "import app.api.routes",
+    "import app.main": "import app.main",
+    "import app.services.pipeline": "import app.services.pipeline",
+    "warmup models": (
+        "from app.services.model_registry import warmup\n"
+        "warmup()"
+    ),
+}
+
+TEMPLATE = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, 'torch' in sys.modules)
+"""
+
+
+def measure(body: str):
+    out = subprocess.run(
+        [sys.executable, "-c", TEMPLATE.format(root=ROOT, body=body)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.strip().splitlines()[-1]
+    elapsed, rss_kb, torch_loaded = out.split()
+    return float(elapsed), int(rss_kb), torch_loaded == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-models", action="store_true", help="skip the model warmup measurement")
+    args = parser.parse_args()
+
+    for name, body in SNIPPETS.items():
+        if args.no_models and name == "warmup models":
+            continue
+        try:
+            runs = [measure(body) for _ in range(args.repeat)]
+        except subprocess.CalledProcessError as e:
+            # e.g. the model registry doesn't exist on older checkouts
+            print(json.dumps({"measure": name, "error": e.stderr.strip().splitlines()[-1]}))
+            continue
+        print(json.dumps({
+            "measure": name,
+            "wall_s_median": round(statistics.median(r[0] for r in runs), 3),
+            "peak_rss_mb": round(max(r[1] for r in runs) / 1024, 1),
+            "torch_imported": runs[0][2],
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Compares the old summarizer (1000-character slices, one forward pass per slice)
+with the token-aware batched summarize_text on a long transcript, and the
+summary modes (extractive pre-reduction) against "full".
+
+Usage:
+    python benchmarks/summarize.py transcript.txt [--batch-sizes 1,4,8] [--reduce] [--modes fast,balanced]
+
+Without a transcript file a synthetic ~12k word text is used. Prints JSON lines
+with wall time, number of chunks and words/second for each variant; modes also
+report their ROUGE against the full summary.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import config  # noqa: E402
+from app.services import summarizer  # noqa: E402
+from app.services.model_registry import get_summarizer  # noqa: E402
+from cpu_fast import rouge  # noqa: E402
+
+SAMPLE = (
+    "Today we are talking about how small teams can ship reliable software. "
+    "The first thing to understand is that most outages come from changes, not from hardware. "
+    "So we invest in review, in automated tests and in gradual rollouts. "
+    "Second, observability matters more than clever code, because you can't fix what you can't see. "
+    "Finally, write things down, since the person on call at three in the morning might be you. "
+)
+
+
+def legacy_summarize(text: str, max_chunk: int = 1000) -> (str, int):
+    pipe = get_summarizer()
+    text = text.strip().replace("\n", " ")
+    chunks = [text[i:i + max_chunk] for i in range(0, len(text), max_chunk)]
+    out = [pipe(chunk, **summarizer.SUMMARIZER_PARAMS)[0]['summary_text'] for chunk in chunks]
+    return " ".join(out), len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("transcript", nargs="?")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--reduce", action="store_true")
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--modes", default="", help="Summary modes to compare with full, e.g. fast,balanced")
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = SAMPLE * 160
+    words = len(text.split())
+    pipe = get_summarizer()  # load outside the timed region
+
+    if not args.skip_legacy:
+        start = time.perf_counter()
+        _, n_chunks = legacy_summarize(text)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"variant": "legacy-chars", "words": words, "chunks": n_chunks,
+                          "wall_s": round(elapsed, 2), "words_per_s": round(words / elapsed, 1)}))
+
+    n_chunks = len(summarizer.chunk_by_tokens(summarizer.split_sentences(text), pipe.tokenizer,
+                                              config.SUMMARY_CHUNK_TOKENS))
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        start = time.perf_counter()
+        summary = summarizer.summarize_text(text, batch_size=batch_size, reduce=args.reduce, mode="full")
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"variant": f"tokens-batch{batch_size}", "words": words, "chunks": n_chunks,
+                          "reduce": args.reduce, "summary_words": len(summary.split()),
+                          "wall_s": round(elapsed, 2), "words_per_s": round(words / elapsed, 1)}))
+
+    # The last full run is the reference; modes run with the last batch size
+    full_s = elapsed
+    for mode in filter(None, args.modes.split(",")):
+        start = time.perf_counter()
+        reduced = summarizer.summarize_text(text, batch_size=batch_size, reduce=args.reduce, mode=mode)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({"variant": f"mode-{mode}", "words": words, "summary_words": len(reduced.split()),
+                          "wall_s": round(elapsed, 2), "speedup_vs_full": round(full_s / elapsed, 2),
+                          "rouge_vs_full": rouge(summary, reduced)}))
+
+
+if __name__ == "__main__":
+    main()
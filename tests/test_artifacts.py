@@ -0,0 +1,75 @@
+import os
+
+from app.services.artifacts import AudioStore
+
+
+def make_store(tmp_path, **kwargs):
+    kwargs.setdefault("max_bytes", 10 ** 9)
+    kwargs.setdefault("max_age_s", 3600)
+    return AudioStore(str(tmp_path), **kwargs)
+
+
+def write(path, size=100):
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_unindexed_file_is_adopted_only_for_its_exact_key(tmp_path):
+    store = make_store(tmp_path)
+    audio_dir = store.directory("audio")
+    # Stored for the clip starting at 1.5 s; its name starts with the open-ended clip's name
+    write(os.path.join(audio_dir, "yt_x_t_1.5_300.webm"))
+
+    assert store.get("yt:x#t=1") is None
+    assert store.get("yt:x#t=1.5,300") == os.path.join(audio_dir, "yt_x_t_1.5_300.webm")
+
+
+def test_adoption_skips_partial_and_foreign_files(tmp_path):
+    store = make_store(tmp_path)
+    audio_dir = store.directory("audio")
+    write(os.path.join(audio_dir, "yt_abc.webm.part"))
+    write(os.path.join(audio_dir, "yt_abc.json"))
+    assert store.get("yt:abc") is None
+
+    write(os.path.join(audio_dir, "yt_abc.m4a"))
+    assert store.get("yt:abc") == os.path.join(audio_dir, "yt_abc.m4a")
+    assert store.entries()[0]["format"] == "m4a"
+
+
+def test_put_replaces_other_format_and_evicts_least_recently_used(tmp_path):
+    store = make_store(tmp_path, max_bytes=250)
+    staging = store.staging_dir()
+
+    first = store.put("yt:a", write(os.path.join(staging, "a.webm")), url="https://youtu.be/a")
+    store.put("yt:b", write(os.path.join(staging, "b.webm")))
+    assert store.total_bytes() == 200
+
+    replaced = store.put("yt:a", write(os.path.join(staging, "a.m4a")))
+    assert not os.path.exists(first)
+    assert replaced.endswith("yt_a.m4a")
+
+    # Audio not used in the last 10 minutes goes first
+    store._db.execute("UPDATE audio SET accessed_at = accessed_at - 3600 WHERE video_id = 'yt:b'")
+    store.put("yt:c", write(os.path.join(staging, "c.webm")))
+    assert store.get("yt:b") is None
+    assert {e["video_id"] for e in store.entries()} == {"yt:a", "yt:c"}
+
+
+def test_recently_used_audio_is_evicted_when_nothing_older_is_left(tmp_path):
+    store = make_store(tmp_path, max_bytes=250)
+    staging = store.staging_dir()
+    for name in "abcd":
+        store.put(f"yt:{name}", write(os.path.join(staging, f"{name}.webm")))
+        assert store.total_bytes() <= 250
+
+    assert {e["video_id"] for e in store.entries()} == {"yt:c", "yt:d"}
+
+
+def test_audio_just_stored_is_kept_even_if_over_the_limit(tmp_path):
+    store = make_store(tmp_path, max_bytes=250)
+    staging = store.staging_dir()
+    store.put("yt:a", write(os.path.join(staging, "a.webm")))
+    path = store.put("yt:big", write(os.path.join(staging, "big.webm"), size=300))
+    assert os.path.exists(path)
+    assert [e["video_id"] for e in store.entries()] == ["yt:big"]
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.main import app
+from app.services import batch, jobs, pipeline
+from app.services.jobs import JobManager, QueueFullError
+
+
+@pytest.fixture
+def started(monkeypatch):
+    monkeypatch.setattr(config, "BATCH_MAX_PENDING", 3)
+    monkeypatch.setattr(batch, "_pending", 0)
+    monkeypatch.setattr(batch, "_batches", {})
+    items = []
+    monkeypatch.setattr(batch, "_run_item", lambda run, url, job, summary_mode=None: items.append((run, job)))
+    return items
+
+
+def test_pending_items_across_batches_are_bounded(started):
+    batch.start_batch(["a", "b"])
+    with pytest.raises(QueueFullError):
+        batch.start_batch(["c", "d"])
+
+    run, job = started[0]
+    run._item_finished(job)
+    batch.start_batch(["c", "d"])
+    assert batch._pending == 3
+
+
+def test_batch_endpoint_returns_429_when_full(started, monkeypatch):
+    monkeypatch.setattr(batch, "_pending", 3)
+    response = TestClient(app).post("/batch", json={"urls": ["https://www.youtube.com/watch?v=abc"]})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+
+
+def test_slot_counts_toward_job_capacity():
+    manager = JobManager(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    def work(on_stage):
+        release.wait(2)
+
+    with manager.slot():
+        assert manager.queue_depth() == 1
+        manager.submit("process", work)
+        with pytest.raises(QueueFullError):
+            manager.submit("process", lambda on_stage: None)
+        release.set()
+    assert manager._external == 0
+
+
+def test_batch_stages_hold_a_job_slot(monkeypatch):
+    manager = JobManager(max_workers=1, max_queue=1)
+    monkeypatch.setattr(jobs, "_manager", manager)
+    monkeypatch.setattr(batch, "_pending", 0)
+    depths = {}
+
+    def stage(name, output):
+        def run(*args, **kwargs):
+            depths[name] = manager.queue_depth()
+            return output
+        return run
+
+    monkeypatch.setattr(pipeline, "download_stage", stage("download", ("audio.wav", "yt:abc")))
+    monkeypatch.setattr(pipeline, "transcribe_stage", stage("transcribe", {"text": "hello", "segments": []}))
+    monkeypatch.setattr(pipeline, "summarize_stage", stage("summarize", "summary"))
+    monkeypatch.setattr(pipeline, "generate_stage", stage("generate", {}))
+    monkeypatch.setattr(pipeline, "save_result", lambda *args, **kwargs: None)
+
+    run = batch.start_batch(["https://www.youtube.com/watch?v=abc"])
+    ((url, job),) = run.items
+    assert job.wait(2)
+    assert depths == {"download": 0, "transcribe": 1, "summarize": 1, "generate": 0}
+    assert manager.queue_depth() == 0 and batch._pending == 0
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from app import config
+from app.services import downloader, fingerprint, pipeline, transcriber, transcript_store
+
+RATE = 16000
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> np.ndarray:
+    """A new random tone pair every 0.25 s plus a little noise: plenty of distinct spectral peaks."""
+    rng = np.random.default_rng(seed)
+    step = RATE // 4
+    t = np.arange(step) / RATE
+    pieces = [np.sin(2 * np.pi * f1 * t) + 0.5 * np.sin(2 * np.pi * f2 * t)
+              for f1, f2 in rng.uniform(200, 3500, size=(int(seconds * 4), 2))]
+    audio = np.concatenate(pieces) + 0.01 * rng.standard_normal(len(pieces) * step)
+    return audio.astype(np.float32)
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "FINGERPRINT_ENABLED", True)
+    monkeypatch.setattr(config, "FINGERPRINT_DB", str(tmp_path / "fingerprints.db"))
+    monkeypatch.setattr(config, "STORE_ENABLED", True)
+    monkeypatch.setattr(config, "DATABASE_URL", f"sqlite:///{tmp_path / 'transcripts.db'}")
+    monkeypatch.setattr(config, "WHISPER_MODEL", "base")
+    monkeypatch.setattr(fingerprint, "_index", None)
+    monkeypatch.setattr(transcript_store, "_store", None)
+    monkeypatch.setattr(pipeline, "cpu_fast", lambda: False)
+    audio = {}
+    monkeypatch.setattr(downloader, "decode_audio", lambda path, use_mmap=False: audio[path])
+    runs = []
+
+    def transcribe_segments(samples, model_name=None):
+        runs.append(len(samples) / RATE)
+        segments = [{"start": float(s), "end": float(s + 5), "text": f"words at {s}"}
+                    for s in range(0, int(len(samples) / RATE), 5)]
+        return {"text": "".join(" " + s["text"] for s in segments), "segments": segments}
+
+    monkeypatch.setattr(transcriber, "transcribe_segments", transcribe_segments)
+    return audio, runs
+
+
+def transcribe(audio, path, samples, source):
+    audio[path] = samples
+    transcript = pipeline._transcribe_file(path, source)
+    pipeline.save_result(source, transcript, "summary", {})
+    return transcript
+
+
+def test_fingerprints_match_the_same_audio_and_a_section_of_it(tmp_path):
+    index = fingerprint.FingerprintIndex(str(tmp_path / "fp.db"))
+    full = synthetic_speech(60)
+    index.add("yt:full", fingerprint.fingerprint(full), 60)
+
+    exact = index.match(fingerprint.fingerprint(full), 60)
+    assert exact["video_id"] == "yt:full" and exact["kind"] == "exact"
+
+    clip = full[20 * RATE:40 * RATE]
+    sub = index.match(fingerprint.fingerprint(clip), 20)
+    assert sub["kind"] == "subrange"
+    assert sub["offset_s"] == pytest.approx(20, abs=0.2)
+
+    assert index.match(fingerprint.fingerprint(synthetic_speech(60, seed=1)), 60) is None
+
+
+def test_reupload_and_clip_reuse_the_stored_transcript(env):
+    audio, runs = env
+    full = synthetic_speech(60)
+    transcribe(audio, "a.webm", full, "yt:full")
+    assert runs == [60]
+
+    again = transcribe(audio, "b.webm", full, "sha256:reupload")
+    assert again["reused_from"]["kind"] == "exact"
+    assert again["text"] == transcript_store.get_transcript_store().get("yt:full")["transcript"]
+
+    audio["c.webm"] = full[20 * RATE:40 * RATE]
+    clip = pipeline._transcribe_file("c.webm", "sha256:clip")
+    assert clip["reused_from"]["kind"] == "subrange"
+    assert [s["text"] for s in clip["segments"]] == [" words at 20", " words at 25", " words at 30", " words at 35"]
+    assert clip["segments"][0]["start"] == pytest.approx(0, abs=0.3)
+    assert runs == [60]
+
+
+def test_int8_run_does_not_reuse_a_full_precision_transcript(env, monkeypatch):
+    audio, runs = env
+    full = synthetic_speech(30)
+    transcribe(audio, "a.webm", full, "yt:full")
+    assert transcript_store.get_transcript_store().get("yt:full")["whisper_model"] == "base"
+
+    monkeypatch.setattr(pipeline, "cpu_fast", lambda: True)
+    transcribe(audio, "b.webm", full, "sha256:reupload")
+    assert runs == [30, 30]
+    assert transcript_store.get_transcript_store().get("sha256:reupload")["whisper_model"] == "base:int8"
+
+
+def test_index_keeps_only_the_newest_sources(tmp_path):
+    index = fingerprint.FingerprintIndex(str(tmp_path / "fp.db"), max_sources=2)
+    clips = [synthetic_speech(20, seed=i) for i in range(3)]
+    for i, clip in enumerate(clips):
+        index.add(f"yt:{i}", fingerprint.fingerprint(clip), 20)
+
+    assert index.sources() == 2
+    assert index.match(fingerprint.fingerprint(clips[0]), 20) is None
+    assert index.match(fingerprint.fingerprint(clips[2]), 20)["video_id"] == "yt:2"
@@ -0,0 +1,109 @@
+import pytest
+
+from app import config
+from app.services import metrics, model_policy
+
+BART = "facebook/bart-large-cnn"
+DISTIL_6 = "sshleifer/distilbart-cnn-6-6"
+DISTIL_12 = "sshleifer/distilbart-cnn-12-6"
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_POLICY", "adaptive")
+    monkeypatch.setattr(config, "WHISPER_MODEL", "base")
+    monkeypatch.setattr(config, "SUMMARIZER_MODEL", BART)
+    monkeypatch.setattr(config, "WHISPER_TIERS", ["tiny", "base", "small", "medium"])
+    monkeypatch.setattr(config, "SUMMARIZER_TIERS", [DISTIL_6, DISTIL_12, BART])
+    monkeypatch.setattr(model_policy, "_throughput", model_policy.Throughput())
+
+    def set_load(depth, capacity=1):
+        monkeypatch.setattr(model_policy, "load", lambda: (depth, capacity))
+
+    set_load(0)
+    return set_load
+
+
+def record(stage, model, wall_s, audio_seconds=None, tokens=None):
+    r = metrics.StageRecord(stage, model)
+    r.wall_s, r.audio_seconds, r.tokens = wall_s, audio_seconds, tokens
+    return r
+
+
+def test_fixed_policy_uses_configured_models(policy, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_POLICY", "fixed")
+    assert model_policy.plan(600, budget_s=10) == {"policy": "fixed", "whisper": "base", "summarizer": BART}
+
+
+def test_idle_system_runs_the_quality_ceiling(policy):
+    models = model_policy.plan(600, summary_mode="full")
+    assert (models["whisper"], models["summarizer"]) == ("base", BART)
+    assert models["within_target"]
+    # 600 s * 0.1 + 2.1k tokens * 2.4
+    assert models["target_s"] == models["predicted_s"] == 65.04
+
+
+def test_backlog_steps_down_to_smaller_tiers(policy):
+    policy(depth=2, capacity=1)  # everything takes twice as long
+    models = model_policy.plan(600, summary_mode="full")
+    assert (models["whisper"], models["summarizer"]) == ("tiny", DISTIL_6)
+    assert models["within_target"]
+
+    policy(depth=5, capacity=1)
+    models = model_policy.plan(600, summary_mode="full")
+    assert (models["whisper"], models["summarizer"]) == ("tiny", DISTIL_6)
+    assert not models["within_target"]
+
+
+def test_latency_budget_picks_largest_tiers_that_fit(policy):
+    models = model_policy.plan(600, budget_s=200, summary_mode="full")
+    assert models["quality"] == "high"
+    # medium alone would take 480 s
+    assert (models["whisper"], models["summarizer"]) == ("small", BART)
+    assert models["predicted_s"] == 185.04
+
+    with pytest.raises(ValueError):
+        model_policy.plan(600, budget_s=200, quality="ultra")
+
+
+def test_learned_costs_replace_priors(policy):
+    # This host runs medium at 0.2 s per audio second, not the 0.8 prior
+    model_policy._learn(record("transcribe", "medium", 120, audio_seconds=600), "ok")
+    # Ignored: failed, and too short to measure
+    model_policy._learn(record("transcribe", "medium", 600, audio_seconds=600), "error")
+    model_policy._learn(record("transcribe", "medium", 50, audio_seconds=5), "ok")
+    assert model_policy._throughput.cost("whisper", "medium") == pytest.approx(0.2)
+
+    models = model_policy.plan(600, budget_s=200, summary_mode="full")
+    assert (models["whisper"], models["summarizer"]) == ("medium", BART)
+
+    model_policy._learn(record("transcribe", "medium", 240, audio_seconds=600), "ok")
+    assert model_policy._throughput.cost("whisper", "medium") == pytest.approx(0.3 * 0.4 + 0.7 * 0.2)
+
+
+def test_summary_mode_caps_summarizer_tokens(policy):
+    full = model_policy.plan(3600, budget_s=10_000, summary_mode="full")
+    fast = model_policy.plan(3600, budget_s=10_000, summary_mode="fast")
+    assert full["predicted_s"] - fast["predicted_s"] == pytest.approx((12.6 - 0.9) * 2.4, abs=0.01)
+
+
+def test_replan_summarizer_uses_real_transcript_length(policy):
+    models = model_policy.plan(600, budget_s=200, summary_mode="full")
+    transcript = "word " * 2000  # 2.7k tokens
+
+    # Without a budget the plan stands
+    assert model_policy.replan_summarizer(models, transcript, None, "full") is models
+
+    replanned = model_policy.replan_summarizer(models, transcript, budget_s=5, summary_mode="full")
+    assert replanned["summarizer"] == DISTIL_12
+    assert replanned["summarizer_predicted_s"] == 4.32
+    assert replanned["within_target"]
+
+    replanned = model_policy.replan_summarizer(models, transcript, budget_s=1, summary_mode="full")
+    assert replanned["summarizer"] == DISTIL_6
+    assert not replanned["within_target"]
+
+
+def test_replan_leaves_fixed_models_alone(policy):
+    fixed = model_policy.fixed_models()
+    assert model_policy.replan_summarizer(fixed, "word " * 2000, budget_s=1) is fixed
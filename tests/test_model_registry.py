@@ -0,0 +1,29 @@
+import pytest
+
+from app.services.model_registry import _quantize
+
+torch = pytest.importorskip("torch")
+
+
+def test_quantize_replaces_whisper_linear_layers():
+    whisper = pytest.importorskip("whisper")
+    from whisper.model import ModelDimensions, Whisper
+
+    dims = ModelDimensions(n_mels=80, n_audio_ctx=50, n_audio_state=32, n_audio_head=2, n_audio_layer=1,
+                           n_vocab=51865, n_text_ctx=16, n_text_state=32, n_text_head=2, n_text_layer=1)
+    model = Whisper(dims).eval()
+    with torch.no_grad():
+        for param in model.parameters():  # some are left as torch.empty until weights are loaded
+            param.normal_(std=0.02)
+    linears = sum(isinstance(m, torch.nn.Linear) for m in model.modules())
+    mel, tokens = torch.randn(1, 80, 100), torch.tensor([[50258, 50259, 50359]])
+    expected = model(mel, tokens)
+
+    quantized = _quantize(model, (whisper.model.Linear,))
+    assert sum(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in quantized.modules()) == linears
+    assert quantized(mel, tokens).shape == expected.shape
+
+
+def test_quantize_fails_when_nothing_is_replaced():
+    with pytest.raises(RuntimeError):
+        _quantize(torch.nn.Sequential(torch.nn.Conv1d(1, 1, 1)))
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+import requests
+
+from app.services.ollama_client import CircuitOpenError, OllamaClient
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.text = ""
+        self._body = body or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code}", response=self)
+
+    def json(self):
+        return self._body
+
+    def iter_lines(self):
+        for line in self._body.get("lines", []):
+            if isinstance(line, BaseException):
+                raise line
+            yield line
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """Stands in for requests.Session: each post() pops the next outcome."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def make_client(*outcomes, **kwargs):
+    kwargs.setdefault("backoff_base_s", 0)
+    client = OllamaClient("http://ollama:11434", "llama3", **kwargs)
+    client.session = FakeSession(*outcomes)
+    return client
+
+
+def test_half_open_trial_failing_with_other_request_error_reopens_breaker():
+    client = make_client(requests.ConnectionError("down"), max_retries=1, failure_threshold=1,
+                         reset_timeout_s=0.05)
+    with pytest.raises(requests.ConnectionError):
+        client.post("/api/generate", {})
+    assert client.breaker.state == "open"
+
+    time.sleep(0.06)
+    client.session.outcomes = [requests.exceptions.ChunkedEncodingError("cut off")]
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.post("/api/generate", {})
+    assert client.breaker.state == "open"
+
+    # After the next timeout a new trial is allowed and closes the circuit
+    time.sleep(0.06)
+    client.session.outcomes = [FakeResponse()]
+    client.post("/api/generate", {})
+    assert client.breaker.state == "closed"
+
+
+def test_unexpected_exception_ends_trial():
+    client = make_client(requests.ConnectionError("down"), max_retries=1, failure_threshold=1,
+                         reset_timeout_s=0.05)
+    with pytest.raises(requests.ConnectionError):
+        client.post("/api/generate", {})
+    time.sleep(0.06)
+    client.session.outcomes = [ValueError("bad payload")]
+    with pytest.raises(ValueError):
+        client.post("/api/generate", {})
+
+    time.sleep(0.06)
+    assert client.breaker.allow()
+
+
+def test_retries_transient_errors_then_succeeds():
+    client = make_client(requests.Timeout("slow"), FakeResponse(503), FakeResponse(body={"response": "ok"}),
+                         max_retries=3)
+    assert client.post("/api/generate", {}).json() == {"response": "ok"}
+    assert client.session.calls == 3
+    assert client.breaker.state == "closed"
+
+
+def test_client_error_is_not_retried():
+    client = make_client(FakeResponse(404), max_retries=3)
+    with pytest.raises(requests.HTTPError):
+        client.post("/api/generate", {})
+    assert client.session.calls == 1
+    assert client.breaker.state == "closed"
+
+
+def test_zero_retries_still_makes_one_attempt():
+    client = make_client(requests.ConnectionError("down"), max_retries=0)
+    with pytest.raises(requests.ConnectionError):
+        client.post("/api/generate", {})
+    assert client.session.calls == 1
+
+    client.session.outcomes = [FakeResponse()]
+    assert client.post("/api/generate", {}).status_code == 200
+
+
+def test_open_circuit_rejects_without_calling():
+    client = make_client(requests.ConnectionError("down"), max_retries=1, failure_threshold=1,
+                         reset_timeout_s=60)
+    with pytest.raises(requests.ConnectionError):
+        client.post("/api/generate", {})
+    with pytest.raises(CircuitOpenError):
+        client.post("/api/generate", {})
+    assert client.session.calls == 1
+
+
+def test_stream_failing_mid_body_counts_against_breaker():
+    cut = FakeResponse(body={"lines": [b'{"response": "a"}', requests.exceptions.ChunkedEncodingError("cut")]})
+    client = make_client(cut, max_retries=1, failure_threshold=1, reset_timeout_s=60)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        with client.post("/api/generate", {}, stream=True) as response:
+            for _ in response.iter_lines():
+                pass
+    assert client.breaker.state == "open"
+
+
+def test_stream_outcome_is_recorded_once_the_body_is_read():
+    client = make_client(requests.ConnectionError("down"), max_retries=1, failure_threshold=1,
+                         reset_timeout_s=0.05)
+    with pytest.raises(requests.ConnectionError):
+        client.post("/api/generate", {})
+    time.sleep(0.06)
+
+    client.session.outcomes = [FakeResponse(body={"lines": [b'{"done": true}']})]
+    with client.post("/api/generate", {}, stream=True) as response:
+        # The half-open trial is still running while the body is read
+        assert client.breaker.state != "closed"
+        assert list(response.iter_lines()) == [b'{"done": true}']
+    assert client.breaker.state == "closed"
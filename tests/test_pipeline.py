@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+from app import config
+from app.services import pipeline
+
+
+@pytest.mark.parametrize("coalesce, runs", [(True, 1), (False, 2)])
+def test_concurrent_identical_stages_share_a_run_only_when_coalescing(monkeypatch, coalesce, runs):
+    monkeypatch.setattr(config, "CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "COALESCE_ENABLED", coalesce)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work(text):
+        calls.append(text)
+        started.set()
+        release.wait(2)
+        return text.upper()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pipeline.run_stage("summarize", "k", work, "a")))
+               for _ in range(2)]
+    threads[0].start()
+    started.wait(2)
+    threads[1].start()
+    threads[1].join(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert results == ["A", "A"]
+    assert len(calls) == runs
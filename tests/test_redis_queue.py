@@ -0,0 +1,137 @@
+"""
+RedisJobQueue against fakeredis, or a real Redis when TEST_REDIS_URL is set
+(e.g. redis://localhost:6379/15; the test keys use a unique prefix and are deleted).
+"""
+import os
+import threading
+import time
+import uuid
+
+import pytest
+import redis
+
+from app.services.redis_queue import RedisJobQueue
+
+
+def task(**kwargs):
+    return kwargs
+
+
+@pytest.fixture
+def client():
+    url = os.getenv("TEST_REDIS_URL")
+    if url:
+        real = redis.Redis.from_url(url)
+        try:
+            real.ping()
+        except redis.ConnectionError:
+            pytest.skip(f"No Redis at {url}")
+        yield real
+        return
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis needs it for Lua scripts
+    yield fakeredis.FakeRedis()
+
+
+@pytest.fixture
+def make_queue(client):
+    prefix = f"test-{uuid.uuid4().hex[:8]}"
+
+    def make(visibility_timeout_s=30, max_attempts=3):
+        return RedisJobQueue(client, prefix, visibility_timeout_s=visibility_timeout_s,
+                             max_attempts=max_attempts, max_pending=100, retention_s=600)
+
+    yield make
+    for key in client.scan_iter(f"{prefix}:*"):
+        client.delete(key)
+
+
+def test_claim_takes_oldest_job_and_leases_it(make_queue):
+    queue = make_queue()
+    first = queue.enqueue("process", task, [], {"url": "a"})
+    second = queue.enqueue("process", task, [], {"url": "b"})
+    assert queue.depth() == 2
+
+    assert queue.claim() == first
+    assert queue.client.zscore(queue.leases_key, first) > time.time()
+    assert queue.load(first)["attempts"] == 1
+    assert queue.load(first)["kwargs"] == {"url": "a"}
+    assert queue.depth() == 2  # one waiting, one leased
+
+    assert queue.claim() == second
+    assert queue.claim() is None
+
+
+def test_expired_lease_is_requeued(make_queue):
+    queue = make_queue(visibility_timeout_s=0.05)
+    job_id = queue.enqueue("process", task, [], {})
+    assert queue.claim() == job_id
+    assert queue.reap() == []  # lease still valid
+
+    time.sleep(0.1)
+    assert queue.reap() == [(job_id, "retry")]
+    assert queue.client.zscore(queue.leases_key, job_id) is None
+    assert queue.claim() == job_id
+    assert queue.load(job_id)["attempts"] == 2
+
+
+def test_failed_job_is_retried_then_dead_lettered(make_queue):
+    queue = make_queue(max_attempts=2)
+    job_id = queue.enqueue("process", task, [], {})
+
+    assert queue.claim() == job_id
+    assert queue.fail(job_id) is True
+    assert queue.dead_letters() == []
+
+    assert queue.claim() == job_id
+    assert queue.fail(job_id) is False
+    assert queue.dead_letters() == [job_id]
+    assert queue.claim() is None
+    assert queue.client.ttl(queue.job_key(job_id)) > 0
+    assert queue.client.ttl(queue.events_key(job_id)) > 0
+
+
+def test_reaped_dead_letter_expires_like_a_finished_job(make_queue):
+    queue = make_queue(visibility_timeout_s=0.05, max_attempts=1)
+    job_id = queue.enqueue("process", task, [], {})
+    assert queue.claim() == job_id
+
+    time.sleep(0.1)
+    assert queue.reap() == [(job_id, "dead")]
+    assert queue.dead_letters() == [job_id]
+    assert 0 < queue.client.ttl(queue.job_key(job_id)) <= 600
+    assert 0 < queue.client.ttl(queue.events_key(job_id)) <= 600
+
+
+def test_heartbeat_keeps_the_lease(make_queue):
+    from app.worker import _heartbeat
+
+    queue = make_queue(visibility_timeout_s=0.3)
+    job_id = queue.enqueue("process", task, [], {})
+    assert queue.claim() == job_id
+
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(queue, job_id, stop), daemon=True)
+    beat.start()
+    time.sleep(0.75)  # well past the original lease
+    assert queue.reap() == []
+    stop.set()
+    beat.join(1)
+
+    time.sleep(0.4)
+    assert queue.reap() == [(job_id, "retry")]
+    assert queue.extend(job_id) is False  # the lease is gone, renewal must not recreate it
+
+
+def test_complete_drops_lease_and_requeued_copy(make_queue):
+    queue = make_queue(visibility_timeout_s=0.05)
+    job_id = queue.enqueue("process", task, [], {})
+    assert queue.claim() == job_id
+    time.sleep(0.1)
+    assert queue.reap() == [(job_id, "retry")]
+
+    # The original worker finishes after all; the requeued copy must not run again
+    queue.complete(job_id)
+    assert queue.claim() is None
+    assert queue.depth() == 0
+    assert queue.client.ttl(queue.job_key(job_id)) > 0
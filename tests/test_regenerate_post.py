@@ -0,0 +1,84 @@
+import pytest
+
+from app import config
+from app.api import routes
+from app.services import cache, generator, pipeline, transcript_store
+
+SUMMARY = "A talk about caching."
+TRANSCRIPT = {"text": "caching is hard", "segments": [{"start": 0.0, "end": 2.0, "text": "caching is hard"}]}
+POSTS = {"twitter": "First tweet", "instagram": "First caption", "shorts_title": "First title"}
+ORIGINAL_GENERATE = generator.generate_social_posts
+
+
+@pytest.fixture
+def stores(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "CACHE_ENABLED", True)
+    monkeypatch.setattr(config, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(config, "STORE_ENABLED", True)
+    monkeypatch.setattr(config, "DATABASE_URL", f"sqlite:///{tmp_path / 'transcripts.db'}")
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(transcript_store, "_store", None)
+    calls = []
+
+    def generate_social_posts(summary):
+        calls.append(summary)
+        return dict(POSTS)
+
+    monkeypatch.setattr(generator, "generate_social_posts", generate_social_posts)
+    monkeypatch.setattr(generator, "generate_platform_post", lambda summary, platform: "Regenerated tweet")
+    return calls
+
+
+def process():
+    posts = pipeline.generate_stage(SUMMARY)
+    pipeline.save_result("yt:abc", TRANSCRIPT, SUMMARY, posts)
+    return posts
+
+
+def test_regenerated_post_survives_reprocessing(stores):
+    process()
+    response = routes.regenerate_post("yt:abc", "twitter")
+    assert response["social_posts"]["twitter"] == "Regenerated tweet"
+
+    # Reprocessing hits the generate cache rather than calling Ollama again
+    posts = process()
+    assert stores == [SUMMARY]
+    assert posts["twitter"] == "Regenerated tweet"
+    stored = transcript_store.get_transcript_store().get("yt:abc")["social_posts"]
+    assert stored == {**POSTS, "twitter": "Regenerated tweet"}
+
+
+def test_partial_posts_are_not_cached(stores):
+    # Stored without posts (generation fell back), so regenerating one platform leaves the others missing
+    pipeline.save_result("yt:abc", TRANSCRIPT, SUMMARY, generator.get_fallback_posts())
+    routes.regenerate_post("yt:abc", "twitter")
+    assert cache.get_cache().get(pipeline.generate_key(SUMMARY)) is None
+    assert transcript_store.get_transcript_store().get("yt:abc")["social_posts"] == {"twitter": "Regenerated tweet"}
+
+
+def test_failed_platform_is_left_empty_and_not_cached(stores, monkeypatch):
+    monkeypatch.setattr(config, "GENERATION_MODE", "per-platform")
+    monkeypatch.setattr(generator, "generate_social_posts", ORIGINAL_GENERATE)
+    monkeypatch.setattr(generator.get_ollama_client(), "is_available", lambda: True)
+    answers = {"twitter": "A tweet", "instagram": None, "shorts_title": "A title"}
+    monkeypatch.setattr(generator, "generate_platform_post", lambda summary, platform: answers[platform])
+
+    posts = process()
+    assert posts == {"twitter": "A tweet", "instagram": "", "shorts_title": "A title"}
+    assert cache.get_cache().get(pipeline.generate_key(SUMMARY)) is None
+    assert transcript_store.get_transcript_store().get("yt:abc")["social_posts"] == posts
+
+    answers["instagram"] = "A caption"
+    routes.regenerate_post("yt:abc", "instagram")
+    assert cache.get_cache().get(pipeline.generate_key(SUMMARY)) == {**posts, "instagram": "A caption"}
+
+
+def test_nothing_generated_stores_no_posts(stores, monkeypatch):
+    monkeypatch.setattr(config, "GENERATION_MODE", "per-platform")
+    monkeypatch.setattr(generator, "generate_social_posts", ORIGINAL_GENERATE)
+    monkeypatch.setattr(generator.get_ollama_client(), "is_available", lambda: True)
+    monkeypatch.setattr(generator, "generate_platform_post", lambda summary, platform: None)
+
+    assert process() == generator.get_fallback_posts()
+    assert cache.get_cache().get(pipeline.generate_key(SUMMARY)) is None
+    assert transcript_store.get_transcript_store().get("yt:abc")["social_posts"] is None
@@ -0,0 +1,20 @@
+import pytest
+
+from app import config
+from app.services import summarizer
+
+
+@pytest.mark.parametrize("name, value", [
+    ("SUMMARY_CHUNK_TOKENS", 123),
+    ("SUMMARY_REDUCE", True),
+    ("SUMMARY_TARGET_TOKENS", 77),
+    ("SUMMARY_MAX_ROUNDS", 9),
+])
+def test_settings_that_change_the_summary_change_the_cache_params(monkeypatch, name, value):
+    before = summarizer.cache_params("full")
+    monkeypatch.setattr(config, name, value)
+    assert summarizer.cache_params("full") != before
+
+
+def test_mode_budget_is_part_of_the_cache_params():
+    assert summarizer.cache_params("fast") != summarizer.cache_params("full")
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app import config
+from app.services import transcriber
+
+
+class FakePool:
+    """Stands in for ProcessPoolExecutor: runs tasks inline."""
+    created = []
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        self.initargs = initargs
+        self.shut_down = False
+        FakePool.created.append(self)
+
+    def submit(self, fn, *args):
+        assert not self.shut_down
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+@pytest.fixture
+def pools(monkeypatch):
+    FakePool.created = []
+    monkeypatch.setattr(transcriber, "ProcessPoolExecutor", FakePool)
+    monkeypatch.setattr(transcriber, "_pools", OrderedDict())
+    monkeypatch.setattr(transcriber, "_pool_users", {})
+    monkeypatch.setattr(config, "WHISPER_MODEL", "base")
+    monkeypatch.setattr(config, "TRANSCRIBE_MAX_POOLS", 1)
+    monkeypatch.setattr(transcriber, "_transcribe_chunk",
+                        lambda audio, offset_s, model_name: [{"start": offset_s, "end": offset_s + 1,
+                                                              "text": model_name}])
+    return FakePool.created
+
+
+AUDIO = np.zeros(transcriber.SAMPLE_RATE * 2, dtype=np.float32)
+
+
+def test_pool_workers_preload_the_requested_model(pools):
+    assert transcriber.transcribe_long_audio(AUDIO, "small")["text"] == "small"
+    transcriber.transcribe_long_audio(AUDIO, "small")
+    transcriber.transcribe_long_audio(AUDIO)
+    assert [pool.initargs[1] for pool in pools] == ["small", "base"]
+
+
+def test_idle_pools_beyond_the_limit_are_shut_down(pools):
+    transcriber.transcribe_long_audio(AUDIO, "small")
+    transcriber.transcribe_long_audio(AUDIO, "base")
+    small, base = pools
+    assert small.shut_down and not base.shut_down
+    assert list(transcriber._pools) == ["base"]
+
+
+def test_pool_in_use_is_kept_until_released(pools):
+    with transcriber._use_pool("small") as small:
+        transcriber.transcribe_long_audio(AUDIO, "base")
+        base = pools[1]
+        # small is older but busy, so the idle base pool goes once its request is done
+        assert base.shut_down and not small.shut_down
+    assert list(transcriber._pools) == ["small"]
+    assert not small.shut_down
@@ -0,0 +1,115 @@
+import asyncio
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import config
+from app.api import routes
+from app.main import MULTIPART_SLACK_BYTES, app
+
+BOUNDARY = "testboundary"
+LIMIT = 256 * 1024
+
+
+def multipart(size: int) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="talk.wav"\r\n'
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode() + b"\0" * size + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def chunks(body: bytes, size: int = 16 * 1024):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+class FakeJob:
+    id = "job-1"
+    status = "queued"
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "MAX_UPLOAD_BYTES", LIMIT)
+    monkeypatch.setattr(config, "UPLOAD_DIR", str(tmp_path))
+    submitted = []
+
+    def submit(kind, fn=None, stream=False, **kwargs):
+        submitted.append(kwargs)
+        return FakeJob()
+
+    monkeypatch.setattr(routes, "_submit", submit)
+    test_client = TestClient(app)
+    test_client.submitted = submitted
+    return test_client
+
+
+HEADERS = {"Content-Type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+
+@pytest.mark.parametrize("path", ["/upload", "/jobs/upload"])
+def test_rejects_on_content_length(client, path):
+    body = multipart(LIMIT + MULTIPART_SLACK_BYTES + 1)
+    response = client.post(path, content=body, headers=HEADERS)
+    assert response.status_code == 413
+    assert not client.submitted
+
+
+def test_rejection_carries_cors_headers(client):
+    body = multipart(LIMIT + MULTIPART_SLACK_BYTES + 1)
+    headers = {**HEADERS, "Origin": "http://localhost:3000"}
+    response = client.post("/jobs/upload", content=body, headers=headers)
+    assert response.status_code == 413
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+
+
+@pytest.mark.parametrize("path", ["/upload", "/jobs/upload"])
+def test_rejects_chunked_upload_without_content_length(client, path, tmp_path):
+    response = client.post(path, content=chunks(multipart(LIMIT * 4)), headers=HEADERS)
+    assert response.status_code == 413
+    assert not client.submitted
+    assert not os.listdir(tmp_path)
+
+
+def test_chunked_upload_stops_reading_at_the_limit(monkeypatch, tmp_path):
+    # TestClient buffers request bodies, so drive the ASGI app directly to see how much was read
+    monkeypatch.setattr(config, "MAX_UPLOAD_BYTES", LIMIT)
+    monkeypatch.setattr(config, "UPLOAD_DIR", str(tmp_path))
+    pieces = list(chunks(multipart(LIMIT * 4)))
+    read, sent = [], []
+
+    async def receive():
+        if len(read) < len(pieces):
+            read.append(len(pieces[len(read)]))
+            return {"type": "http.request", "body": pieces[len(read) - 1], "more_body": len(read) < len(pieces)}
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/jobs/upload", "raw_path": b"/jobs/upload", "root_path": "",
+        "query_string": b"", "headers": [(b"content-type", HEADERS["Content-Type"].encode())],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    asyncio.run(app(scope, receive, send))
+    assert sent[0]["status"] == 413
+    assert sum(read) <= LIMIT + MULTIPART_SLACK_BYTES + 16 * 1024
+
+
+def test_accepts_chunked_upload_under_limit(client, tmp_path):
+    response = client.post("/jobs/upload", content=chunks(multipart(LIMIT // 2)), headers=HEADERS)
+    assert response.status_code == 202
+    (kwargs,) = client.submitted
+    assert os.path.getsize(kwargs["audio_path"]) == LIMIT // 2
+    assert kwargs["cleanup_paths"] == [kwargs["audio_path"]]
+
+
+def test_file_over_limit_within_slack_is_rejected_by_the_copy(client, tmp_path):
+    # The body fits the stream limit (file + multipart slack) but the file itself is too big
+    response = client.post("/jobs/upload", content=multipart(LIMIT + 1), headers=HEADERS)
+    assert response.status_code == 413
+    assert not os.listdir(tmp_path)